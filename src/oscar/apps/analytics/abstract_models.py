@@ -39,6 +39,44 @@ class AbstractProductRecord(models.Model):
         return _("Record for '%s'") % self.product
 
 
+class AbstractProductDailyRecord(models.Model):
+    """
+    The activity of a product on a single day, used to calculate time-decayed
+    product scores.
+    """
+
+    product = models.ForeignKey(
+        'catalogue.Product', verbose_name=_("Product"),
+        related_name='daily_stats', on_delete=models.CASCADE)
+    date = models.DateField(_("Date"), db_index=True)
+
+    num_views = models.PositiveIntegerField(_('Views'), default=0)
+    num_basket_additions = models.PositiveIntegerField(
+        _('Basket Additions'), default=0)
+    num_purchases = models.PositiveIntegerField(_('Purchases'), default=0)
+
+    # The total number of events when the record was last included in a score
+    # calculation. Records with more events have new activity.
+    num_scored_events = models.PositiveIntegerField(
+        _('Scored events'), default=0)
+
+    class Meta:
+        abstract = True
+        app_label = 'analytics'
+        ordering = ['-date']
+        unique_together = ('product', 'date')
+        verbose_name = _('Daily product record')
+        verbose_name_plural = _('Daily product records')
+
+    def __str__(self):
+        return _("Record for '%(product)s' on %(date)s") % {
+            'product': self.product, 'date': self.date}
+
+    @property
+    def num_events(self):
+        return self.num_views + self.num_basket_additions + self.num_purchases
+
+
 class AbstractUserRecord(models.Model):
     """
     A record of a user's activity.
@@ -115,3 +153,113 @@ class AbstractUserSearch(models.Model):
         return _("%(user)s searched for '%(query)s'") % {
             'user': self.user,
             'query': self.query}
+
+
+class AbstractDailyUserProductView(models.Model):
+    """
+    The number of times a user viewed a product on a single day. Older
+    ``UserProductView`` records are compacted into these.
+    """
+
+    user = models.ForeignKey(
+        AUTH_USER_MODEL, verbose_name=_("User"),
+        on_delete=models.CASCADE)
+    product = models.ForeignKey(
+        'catalogue.Product',
+        on_delete=models.CASCADE,
+        verbose_name=_("Product"))
+    date = models.DateField(_("Date"), db_index=True)
+    num_views = models.PositiveIntegerField(_('Views'), default=0)
+    date_last_viewed = models.DateTimeField(_("Last viewed"))
+
+    class Meta:
+        abstract = True
+        app_label = 'analytics'
+        ordering = ['-date']
+        unique_together = ('user', 'product', 'date')
+        verbose_name = _('Daily user product views')
+        verbose_name_plural = _('Daily user product views')
+
+    def __str__(self):
+        return _("%(user)s viewed '%(product)s' %(num_views)d times on %(date)s") % {
+            'user': self.user, 'product': self.product,
+            'num_views': self.num_views, 'date': self.date}
+
+
+class AbstractDailyUserSearch(models.Model):
+    """
+    The number of times a user searched for a query on a single day. Older
+    ``UserSearch`` records are compacted into these.
+    """
+
+    user = models.ForeignKey(
+        AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        verbose_name=_("User"))
+    query = models.CharField(_("Search term"), max_length=255)
+    date = models.DateField(_("Date"), db_index=True)
+    num_searches = models.PositiveIntegerField(_('Searches'), default=0)
+    date_last_searched = models.DateTimeField(_("Last searched"))
+
+    class Meta:
+        abstract = True
+        app_label = 'analytics'
+        ordering = ['-date']
+        unique_together = ('user', 'query', 'date')
+        verbose_name = _("Daily user search queries")
+        verbose_name_plural = _("Daily user search queries")
+
+    def __str__(self):
+        return _("%(user)s searched for '%(query)s' %(num_searches)d times on %(date)s") % {
+            'user': self.user, 'query': self.query,
+            'num_searches': self.num_searches, 'date': self.date}
+
+
+class AbstractOrderStatsRollup(models.Model):
+    """
+    The number of orders, lines, revenue and new customers of an hour, either
+    of the whole shop or of a single partner. Used by the dashboard instead
+    of aggregating the order tables.
+    """
+
+    # The id of the partner, or 0 for the whole shop. This is not a foreign
+    # key so that the shop-wide rows can be part of the unique key.
+    partner_key = models.PositiveIntegerField(_("Partner"), default=0)
+    period_start = models.DateTimeField(_("Start of period"))
+
+    num_orders = models.PositiveIntegerField(_('Orders'), default=0)
+    num_lines = models.PositiveIntegerField(_('Lines'), default=0)
+    total_revenue = models.DecimalField(
+        _('Revenue'), decimal_places=2, max_digits=12,
+        default=Decimal('0.00'))
+    # Customers who joined in this period and placed an order since
+    num_new_customers = models.PositiveIntegerField(
+        _('New customers'), default=0)
+
+    class Meta:
+        abstract = True
+        app_label = 'analytics'
+        ordering = ['partner_key', '-period_start']
+        unique_together = ('partner_key', 'period_start')
+        verbose_name = _('Order statistics')
+        verbose_name_plural = _('Order statistics')
+
+
+class AbstractOrderStatusCount(models.Model):
+    """
+    The number of orders with a given status, either of the whole shop or of
+    a single partner.
+    """
+
+    # The id of the partner, or 0 for the whole shop
+    partner_key = models.PositiveIntegerField(_("Partner"), default=0)
+    status = models.CharField(_("Status"), max_length=100)
+    num_orders = models.IntegerField(_('Orders'), default=0)
+
+    class Meta:
+        abstract = True
+        app_label = 'analytics'
+        ordering = ['partner_key', 'status']
+        unique_together = ('partner_key', 'status')
+        verbose_name = _('Order status count')
+        verbose_name_plural = _('Order status counts')
@@ -12,6 +12,14 @@ class UserProductViewAdmin(admin.ModelAdmin):
     list_display = ('user', 'product', 'date_created')
 
 
+class DailyUserProductViewAdmin(admin.ModelAdmin):
+    list_display = ('user', 'product', 'date', 'num_views')
+
+
+class DailyUserSearchAdmin(admin.ModelAdmin):
+    list_display = ('user', 'query', 'date', 'num_searches')
+
+
 class UserRecordAdmin(admin.ModelAdmin):
     list_display = ('user', 'num_product_views', 'num_basket_additions',
                     'num_orders', 'total_spent', 'date_last_order')
@@ -23,3 +31,7 @@ admin.site.register(get_model('analytics', 'userrecord'), UserRecordAdmin)
 admin.site.register(get_model('analytics', 'usersearch'))
 admin.site.register(get_model('analytics', 'userproductview'),
                     UserProductViewAdmin)
+admin.site.register(get_model('analytics', 'dailyuserproductview'),
+                    DailyUserProductViewAdmin)
+admin.site.register(get_model('analytics', 'dailyusersearch'),
+                    DailyUserSearchAdmin)
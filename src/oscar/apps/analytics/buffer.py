@@ -0,0 +1,142 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.timezone import now
+
+from oscar.apps.analytics.counters import upsert_counters
+from oscar.core.loading import get_model
+
+ProductRecord = get_model('analytics', 'ProductRecord')
+UserProductView = get_model('analytics', 'UserProductView')
+UserRecord = get_model('analytics', 'UserRecord')
+
+logger = logging.getLogger('oscar.analytics')
+
+
+class CounterBuffer(object):
+    """
+    Accumulates analytics counter increments and product views in process
+    memory and writes them to the database in bulk.
+
+    The entries are written by a daemon thread every
+    ``OSCAR_ANALYTICS_BUFFER_FLUSH_INTERVAL`` seconds, as soon as the buffer
+    holds ``OSCAR_ANALYTICS_BUFFER_MAX_SIZE`` entries and when the process
+    exits. Recording an entry never writes to the database itself: a full
+    buffer is only swapped for an empty one, which is left to the thread. If
+    the process dies, at most that many entries (or seconds' worth of
+    entries) are lost.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(int)
+        self.product_views = []
+        # Swapped out entries waiting to be written by the flusher thread
+        self.batches = []
+        self.wakeup = threading.Event()
+        self.flusher = None
+
+    def __len__(self):
+        return len(self.counters) + len(self.product_views)
+
+    def increment(self, model, key_field, key, field_name, increment=1):
+        with self.lock:
+            self.counters[(model, key_field, field_name, key)] += increment
+            self._swap_if_full()
+        self.start_flusher()
+
+    def add_product_view(self, user_id, product_id):
+        with self.lock:
+            self.product_views.append(UserProductView(
+                user_id=user_id, product_id=product_id, date_created=now()))
+            self._swap_if_full()
+        self.start_flusher()
+
+    def _swap(self):
+        # Must be called with the lock held
+        if self.counters or self.product_views:
+            self.batches.append((self.counters, self.product_views))
+            self.counters, self.product_views = defaultdict(int), []
+
+    def _swap_if_full(self):
+        if len(self) >= settings.OSCAR_ANALYTICS_BUFFER_MAX_SIZE:
+            self._swap()
+            self.wakeup.set()
+
+    def start_flusher(self):
+        """
+        Start the thread that flushes the buffer, unless it's running already
+        """
+        if self.flusher is not None and self.flusher.is_alive():
+            return
+        with self.lock:
+            # A forked process doesn't inherit the thread of its parent
+            if self.flusher is None or not self.flusher.is_alive():
+                self.flusher = threading.Thread(
+                    target=self._run_flusher, name='oscar-analytics-flusher',
+                    daemon=True)
+                self.flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            self.wait_for_flush()
+            try:
+                self.flush()
+            finally:
+                # Don't keep a connection open between flushes
+                connections.close_all()
+
+    def wait_for_flush(self):
+        """
+        Block until the buffer is full or the flush interval has passed
+        """
+        self.wakeup.wait(settings.OSCAR_ANALYTICS_BUFFER_FLUSH_INTERVAL)
+        self.wakeup.clear()
+
+    def flush(self):
+        """
+        Write all buffered entries, using one upsert per recording model and
+        one bulk insert for the product views of each batch.
+        """
+        with self.lock:
+            self._swap()
+            batches, self.batches = self.batches, []
+        for counters, product_views in batches:
+            self.write(counters, product_views)
+
+    def write(self, counters, product_views):
+        groups = defaultdict(dict)
+        fields = defaultdict(set)
+        for (model, key_field, field_name, key), increment in counters.items():
+            if isinstance(key_field, tuple):
+                key_values = dict(zip(key_field, key))
+            else:
+                key_values = {key_field: key}
+            row = groups[(model, key_field)].setdefault(key, key_values)
+            row[field_name] = increment
+            fields[(model, key_field)].add(field_name)
+        try:
+            # A savepoint if called within a transaction, which stays usable
+            # if the writes fail
+            with transaction.atomic():
+                for (model, key_field), rows in groups.items():
+                    field_names = sorted(fields[(model, key_field)])
+                    for row in rows.values():
+                        for field_name in field_names:
+                            row.setdefault(field_name, 0)
+                    upsert_counters(model, key_field, list(rows.values()),
+                                    increment_fields=field_names)
+                if product_views:
+                    UserProductView._default_manager.bulk_create(product_views)
+        except Exception:
+            # Losing a batch of analytics is preferable to breaking the
+            # flusher thread or the process that is exiting
+            logger.exception("Unable to flush buffered analytics counters")
+
+
+counter_buffer = CounterBuffer()
+atexit.register(counter_buffer.flush)
@@ -0,0 +1,89 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+from django.utils.timezone import localdate, now
+
+from oscar.apps.analytics.counters import upsert_counters
+from oscar.core.loading import get_model
+
+DailyUserProductView = get_model('analytics', 'DailyUserProductView')
+DailyUserSearch = get_model('analytics', 'DailyUserSearch')
+ProductDailyRecord = get_model('analytics', 'ProductDailyRecord')
+UserProductView = get_model('analytics', 'UserProductView')
+UserSearch = get_model('analytics', 'UserSearch')
+
+
+class Compactor(object):
+    """
+    Rolls ``UserProductView`` and ``UserSearch`` records that are older than
+    ``OSCAR_ANALYTICS_COMPACT_AFTER_DAYS`` into per-user, per-day aggregates
+    and deletes them, one batch at a time.
+
+    If ``OSCAR_ANALYTICS_DAILY_PRODUCT_RECORDS_RETENTION_DAYS`` is set,
+    ``ProductDailyRecord`` instances older than that are deleted as well.
+    """
+    batch_size = 5000
+
+    def __init__(self, logger, days=None, batch_size=None):
+        self.logger = logger
+        if days is None:
+            days = settings.OSCAR_ANALYTICS_COMPACT_AFTER_DAYS
+        self.days = days
+        self.batch_size = batch_size or self.batch_size
+
+    def run(self):
+        cutoff = now() - datetime.timedelta(days=self.days)
+        num_views = self.compact(
+            UserProductView, DailyUserProductView, 'product_id', 'num_views',
+            'date_last_viewed', cutoff)
+        self.logger.info("Compacted %d product views", num_views)
+        num_searches = self.compact(
+            UserSearch, DailyUserSearch, 'query', 'num_searches',
+            'date_last_searched', cutoff)
+        self.logger.info("Compacted %d searches", num_searches)
+        retention_days = settings.OSCAR_ANALYTICS_DAILY_PRODUCT_RECORDS_RETENTION_DAYS
+        if retention_days is not None:
+            num_deleted = self.prune_daily_product_records(retention_days)
+            self.logger.info("Deleted %d daily product records", num_deleted)
+        return num_views, num_searches
+
+    def prune_daily_product_records(self, days):
+        """
+        Delete the daily product records older than ``days`` days and return
+        their number
+        """
+        cutoff = localdate() - datetime.timedelta(days=days)
+        num_deleted, __ = ProductDailyRecord._default_manager.filter(
+            date__lt=cutoff).delete()
+        return num_deleted
+
+    def compact(self, model, daily_model, field_name, count_field, date_field,
+                cutoff):
+        """
+        Compact the records of ``model`` created before ``cutoff`` into
+        ``daily_model`` and return the number of compacted records.
+        """
+        records = model._default_manager.filter(date_created__lt=cutoff)
+        total = 0
+        while True:
+            with transaction.atomic():
+                pks = list(records.order_by('pk').values_list(
+                    'pk', flat=True)[:self.batch_size])
+                if not pks:
+                    break
+                batch = records.filter(pk__gte=pks[0], pk__lte=pks[-1])
+                rows = batch.annotate(
+                    date=TruncDate('date_created')
+                ).values('user_id', field_name, 'date').annotate(**{
+                    count_field: Count('pk'),
+                    date_field: Max('date_created'),
+                }).order_by()
+                upsert_counters(
+                    daily_model, ('user_id', field_name, 'date'), list(rows),
+                    increment_fields=[count_field], update_fields=[date_field])
+                batch.delete()
+            total += len(pks)
+        return total
@@ -0,0 +1,112 @@
+import logging
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
+
+logger = logging.getLogger('oscar.analytics')
+
+
+def supports_upsert(connection):
+    """
+    Whether the database supports ``INSERT ... ON CONFLICT DO UPDATE``
+    """
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 24, 0)
+    return False
+
+
+def upsert_counters(model, key_field, rows, increment_fields=(),
+                    update_fields=()):
+    """
+    Insert a row per item of ``rows``, or, if a row with the same key already
+    exists, add the values of ``increment_fields`` to its counters and
+    overwrite the values of ``update_fields``.
+
+    On PostgreSQL and SQLite this uses a single ``INSERT ... ON CONFLICT DO
+    UPDATE`` statement (per batch of rows), which is atomic. Other databases
+    fall back to an update followed by an insert for each row.
+
+    :param model: The model class of the recording model
+    :param key_field: The name of the unique field identifying a row, e.g.
+                      ``product_id``, or a tuple of the names of fields that
+                      are unique together
+    :param rows: A list of dicts mapping field names to values. Each row has
+                 to contain the key fields and keys have to be unique.
+    :param increment_fields: Names of the counter fields to increment
+    :param update_fields: Names of the fields to overwrite
+    """
+    if not rows:
+        return
+    if not isinstance(key_field, (list, tuple)):
+        key_field = (key_field,)
+    connection = connections[router.db_for_write(model)]
+    if supports_upsert(connection):
+        _upsert(connection, model, key_field, rows, increment_fields,
+                update_fields)
+    else:
+        for row in rows:
+            _update_or_create(model, key_field, row, increment_fields,
+                              update_fields)
+
+
+def _upsert(connection, model, key_fields, rows, increment_fields,
+            update_fields):
+    opts = model._meta
+    qn = connection.ops.quote_name
+    table = qn(opts.db_table)
+    fields = [field for field in opts.concrete_fields
+              if not field.primary_key]
+    assignments = [
+        '%(col)s = %(table)s.%(col)s + EXCLUDED.%(col)s' % {
+            'col': qn(opts.get_field(name).column), 'table': table}
+        for name in increment_fields
+    ] + [
+        '%(col)s = EXCLUDED.%(col)s' % {'col': qn(opts.get_field(name).column)}
+        for name in update_fields
+    ]
+    batch_size = max(1, connection.ops.bulk_batch_size(fields, rows))
+    row_placeholder = '(%s)' % ', '.join(['%s'] * len(fields))
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            params = []
+            for row in batch:
+                for field in fields:
+                    if field.attname in row:
+                        value = row[field.attname]
+                    elif field.name in row:
+                        value = row[field.name]
+                    else:
+                        value = field.get_default()
+                    params.append(field.get_db_prep_save(value, connection))
+            cursor.execute(
+                'INSERT INTO %s (%s) VALUES %s ON CONFLICT (%s) DO UPDATE SET %s' % (
+                    table,
+                    ', '.join(qn(field.column) for field in fields),
+                    ', '.join([row_placeholder] * len(batch)),
+                    ', '.join(qn(opts.get_field(name).column)
+                              for name in key_fields),
+                    ', '.join(assignments)),
+                params)
+
+
+def _update_or_create(model, key_fields, row, increment_fields,
+                      update_fields):
+    manager = model._default_manager
+    values = {name: F(name) + row[name] for name in increment_fields}
+    values.update({name: row[name] for name in update_fields})
+    record = manager.filter(**{name: row[name] for name in key_fields})
+    if record.update(**values):
+        return
+    try:
+        with transaction.atomic():
+            manager.create(**row)
+    except IntegrityError:
+        # Another process created the row in the meantime
+        if not record.update(**values):     # pragma: no cover
+            logger.error(
+                "IntegrityError when updating analytics counter for %s",
+                model)
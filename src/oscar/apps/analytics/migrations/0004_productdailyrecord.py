@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0001_initial'),
+        ('analytics', '0003_auto_20200801_0817'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDailyRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True, verbose_name='Date')),
+                ('num_views', models.PositiveIntegerField(default=0, verbose_name='Views')),
+                ('num_basket_additions', models.PositiveIntegerField(default=0, verbose_name='Basket Additions')),
+                ('num_purchases', models.PositiveIntegerField(default=0, verbose_name='Purchases')),
+                ('num_scored_events', models.PositiveIntegerField(default=0, verbose_name='Scored events')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='catalogue.product', verbose_name='Product')),
+            ],
+            options={
+                'verbose_name': 'Daily product record',
+                'verbose_name_plural': 'Daily product records',
+                'ordering': ['-date'],
+                'abstract': False,
+                'unique_together': {('product', 'date')},
+            },
+        ),
+    ]
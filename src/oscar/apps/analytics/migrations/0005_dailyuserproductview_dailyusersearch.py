@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('analytics', '0004_productdailyrecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUserSearch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=255, verbose_name='Search term')),
+                ('date', models.DateField(db_index=True, verbose_name='Date')),
+                ('num_searches', models.PositiveIntegerField(default=0, verbose_name='Searches')),
+                ('date_last_searched', models.DateTimeField(verbose_name='Last searched')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Daily user search queries',
+                'verbose_name_plural': 'Daily user search queries',
+                'ordering': ['-date'],
+                'abstract': False,
+                'unique_together': {('user', 'query', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyUserProductView',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True, verbose_name='Date')),
+                ('num_views', models.PositiveIntegerField(default=0, verbose_name='Views')),
+                ('date_last_viewed', models.DateTimeField(verbose_name='Last viewed')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='catalogue.product', verbose_name='Product')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Daily user product views',
+                'verbose_name_plural': 'Daily user product views',
+                'ordering': ['-date'],
+                'abstract': False,
+                'unique_together': {('user', 'product', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:44
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_dailyuserproductview_dailyusersearch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('partner_key', models.PositiveIntegerField(default=0, verbose_name='Partner')),
+                ('status', models.CharField(max_length=100, verbose_name='Status')),
+                ('num_orders', models.IntegerField(default=0, verbose_name='Orders')),
+            ],
+            options={
+                'verbose_name': 'Order status count',
+                'verbose_name_plural': 'Order status counts',
+                'ordering': ['partner_key', 'status'],
+                'abstract': False,
+                'unique_together': {('partner_key', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderStatsRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('partner_key', models.PositiveIntegerField(default=0, verbose_name='Partner')),
+                ('period_start', models.DateTimeField(verbose_name='Start of period')),
+                ('num_orders', models.PositiveIntegerField(default=0, verbose_name='Orders')),
+                ('num_lines', models.PositiveIntegerField(default=0, verbose_name='Lines')),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12, verbose_name='Revenue')),
+                ('num_new_customers', models.PositiveIntegerField(default=0, verbose_name='New customers')),
+            ],
+            options={
+                'verbose_name': 'Order statistics',
+                'verbose_name_plural': 'Order statistics',
+                'ordering': ['partner_key', '-period_start'],
+                'abstract': False,
+                'unique_together': {('partner_key', 'period_start')},
+            },
+        ),
+    ]
@@ -1,5 +1,7 @@
 from oscar.apps.analytics.abstract_models import (
-    AbstractProductRecord, AbstractUserProductView,
+    AbstractDailyUserProductView, AbstractDailyUserSearch,
+    AbstractOrderStatsRollup, AbstractOrderStatusCount,
+    AbstractProductDailyRecord, AbstractProductRecord, AbstractUserProductView,
     AbstractUserRecord, AbstractUserSearch)
 from oscar.core.loading import is_model_registered
 
@@ -13,6 +15,13 @@ if not is_model_registered('analytics', 'ProductRecord'):
     __all__.append('ProductRecord')
 
 
+if not is_model_registered('analytics', 'ProductDailyRecord'):
+    class ProductDailyRecord(AbstractProductDailyRecord):
+        pass
+
+    __all__.append('ProductDailyRecord')
+
+
 if not is_model_registered('analytics', 'UserRecord'):
     class UserRecord(AbstractUserRecord):
         pass
@@ -32,3 +41,31 @@ if not is_model_registered('analytics', 'UserSearch'):
         pass
 
     __all__.append('UserSearch')
+
+
+if not is_model_registered('analytics', 'DailyUserProductView'):
+    class DailyUserProductView(AbstractDailyUserProductView):
+        pass
+
+    __all__.append('DailyUserProductView')
+
+
+if not is_model_registered('analytics', 'DailyUserSearch'):
+    class DailyUserSearch(AbstractDailyUserSearch):
+        pass
+
+    __all__.append('DailyUserSearch')
+
+
+if not is_model_registered('analytics', 'OrderStatsRollup'):
+    class OrderStatsRollup(AbstractOrderStatsRollup):
+        pass
+
+    __all__.append('OrderStatsRollup')
+
+
+if not is_model_registered('analytics', 'OrderStatusCount'):
+    class OrderStatusCount(AbstractOrderStatusCount):
+        pass
+
+    __all__.append('OrderStatusCount')
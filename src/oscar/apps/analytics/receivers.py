@@ -1,110 +1,160 @@
-import logging
-
-from django.db import IntegrityError
-from django.db.models import F
-from django.dispatch import receiver
+from django.conf import settings
+from django.db.models import Sum
+from django.utils.timezone import localdate
 
+from oscar.apps.analytics.buffer import counter_buffer
+from oscar.apps.analytics.counters import upsert_counters
 from oscar.apps.basket.signals import basket_addition
 from oscar.apps.catalogue.signals import product_viewed
-from oscar.apps.order.signals import order_placed
+from oscar.apps.order.signals import (
+    order_placed, order_status_changed, order_statuses_changed)
 from oscar.apps.search.signals import user_search
-from oscar.core.loading import get_model
+from oscar.core.deferred import deferred_receiver
+from oscar.core.loading import get_class, get_model
 
+ProductDailyRecord = get_model('analytics', 'ProductDailyRecord')
 ProductRecord = get_model('analytics', 'ProductRecord')
 UserProductView = get_model('analytics', 'UserProductView')
 UserRecord = get_model('analytics', 'UserRecord')
 UserSearch = get_model('analytics', 'UserSearch')
 
-# Helpers
+OrderStatsRollups = get_class('analytics.rollups', 'OrderStatsRollups')
 
-logger = logging.getLogger('oscar.analytics')
+# Helpers
 
 
-def _update_counter(model, field_name, filter_kwargs, increment=1):
+def _update_counter(model, key_field, key, field_name, increment=1):
     """
-    Efficiently updates a counter field by a given increment. Uses Django's
-    update() call to fetch and update in one query.
-
-    TODO: This has a race condition, we should use UPSERT here
+    Atomically increments a counter field by a given increment, creating the
+    record if it doesn't exist yet.
 
     :param model: The model class of the recording model
+    :param key_field: The name of the unique field identifying the record,
+                      e.g. ``product_id``, or a tuple of field names
+    :param key: The value of the key field, or a tuple of values
     :param field_name: The name of the field to update
-    :param filter_kwargs: Parameters to the ORM's filter() function to get the
-                          correct instance
     """
-    try:
-        record = model.objects.filter(**filter_kwargs)
-        affected = record.update(**{field_name: F(field_name) + increment})
-        if not affected:
-            filter_kwargs[field_name] = increment
-            model.objects.create(**filter_kwargs)
-    except IntegrityError:      # pragma: no cover
-        # get_or_create has a race condition (we should use upsert in supported)
-        # databases. For now just ignore these errors
-        logger.error(
-            "IntegrityError when updating analytics counter for %s", model)
+    if isinstance(key_field, tuple):
+        row = dict(zip(key_field, key))
+    else:
+        row = {key_field: key}
+    row[field_name] = increment
+    upsert_counters(model, key_field, [row], increment_fields=[field_name])
+
+
+def _record_product_activity(product, field_name):
+    _update_counter(ProductRecord, 'product_id', product.pk, field_name)
+    if settings.OSCAR_ANALYTICS_DAILY_PRODUCT_RECORDS:
+        _update_counter(ProductDailyRecord, ('product_id', 'date'),
+                        (product.pk, localdate()), field_name)
 
 
 def _record_products_in_order(order):
-    # surely there's a way to do this without causing a query for each line?
-    for line in order.lines.all():
-        _update_counter(
-            ProductRecord, 'num_purchases',
-            {'product': line.product}, line.quantity)
+    # Aggregate the quantities per product so that lines of the same product
+    # are recorded with a single row of one upsert
+    rows = list(order.lines.filter(product_id__isnull=False).values(
+        'product_id').annotate(num_purchases=Sum('quantity')).order_by())
+    upsert_counters(ProductRecord, 'product_id', rows,
+                    increment_fields=['num_purchases'])
+    if settings.OSCAR_ANALYTICS_DAILY_PRODUCT_RECORDS:
+        today = localdate()
+        upsert_counters(ProductDailyRecord, ('product_id', 'date'),
+                        [dict(row, date=today) for row in rows],
+                        increment_fields=['num_purchases'])
 
 
 def _record_user_order(user, order):
-    try:
-        record = UserRecord.objects.filter(user=user)
-        affected = record.update(
-            num_orders=F('num_orders') + 1,
-            num_order_lines=F('num_order_lines') + order.num_lines,
-            num_order_items=F('num_order_items') + order.num_items,
-            total_spent=F('total_spent') + order.total_incl_tax,
-            date_last_order=order.date_placed)
-        if not affected:
-            UserRecord.objects.create(
-                user=user, num_orders=1, num_order_lines=order.num_lines,
-                num_order_items=order.num_items,
-                total_spent=order.total_incl_tax,
-                date_last_order=order.date_placed)
-    except IntegrityError:      # pragma: no cover
-        logger.error(
-            "IntegrityError in analytics when recording a user order.")
+    upsert_counters(
+        UserRecord, 'user_id',
+        [{'user_id': user.pk,
+          'num_orders': 1,
+          'num_order_lines': order.num_lines,
+          'num_order_items': order.num_items,
+          'total_spent': order.total_incl_tax,
+          'date_last_order': order.date_placed}],
+        increment_fields=['num_orders', 'num_order_lines', 'num_order_items',
+                          'total_spent'],
+        update_fields=['date_last_order'])
+
+
+def _buffer_product_activity(product, field_name):
+    counter_buffer.increment(ProductRecord, 'product_id', product.pk, field_name)
+    if settings.OSCAR_ANALYTICS_DAILY_PRODUCT_RECORDS:
+        counter_buffer.increment(ProductDailyRecord, ('product_id', 'date'),
+                                 (product.pk, localdate()), field_name)
+
+
+def _buffer_product_view(product, user):
+    _buffer_product_activity(product, 'num_views')
+    if user and user.is_authenticated:
+        counter_buffer.increment(
+            UserRecord, 'user_id', user.pk, 'num_product_views')
+        counter_buffer.add_product_view(user.pk, product.pk)
+
+
+def _buffer_basket_addition(product, user):
+    _buffer_product_activity(product, 'num_basket_additions')
+    if user and user.is_authenticated:
+        counter_buffer.increment(
+            UserRecord, 'user_id', user.pk, 'num_basket_additions')
 
 
 # Receivers
 
-@receiver(product_viewed)
+@deferred_receiver(product_viewed)
 def receive_product_view(sender, product, user, **kwargs):
     if kwargs.get('raw', False):
         return
-    _update_counter(ProductRecord, 'num_views', {'product': product})
+    if settings.OSCAR_ANALYTICS_BUFFER_COUNTERS:
+        _buffer_product_view(product, user)
+        return
+    _record_product_activity(product, 'num_views')
     if user and user.is_authenticated:
-        _update_counter(UserRecord, 'num_product_views', {'user': user})
+        _update_counter(UserRecord, 'user_id', user.pk, 'num_product_views')
         UserProductView.objects.create(product=product, user=user)
 
 
-@receiver(user_search)
+@deferred_receiver(user_search)
 def receive_product_search(sender, query, user, **kwargs):
     if user and user.is_authenticated and not kwargs.get('raw', False):
         UserSearch._default_manager.create(user=user, query=query)
 
 
-@receiver(basket_addition)
+@deferred_receiver(basket_addition)
 def receive_basket_addition(sender, product, user, **kwargs):
     if kwargs.get('raw', False):
         return
-    _update_counter(
-        ProductRecord, 'num_basket_additions', {'product': product})
+    if settings.OSCAR_ANALYTICS_BUFFER_COUNTERS:
+        _buffer_basket_addition(product, user)
+        return
+    _record_product_activity(product, 'num_basket_additions')
     if user and user.is_authenticated:
-        _update_counter(UserRecord, 'num_basket_additions', {'user': user})
+        _update_counter(
+            UserRecord, 'user_id', user.pk, 'num_basket_additions')
 
 
-@receiver(order_placed)
+@deferred_receiver(order_placed)
 def receive_order_placed(sender, order, user, **kwargs):
     if kwargs.get('raw', False):
         return
     _record_products_in_order(order)
     if user and user.is_authenticated:
         _record_user_order(user, order)
+    if settings.OSCAR_ANALYTICS_ORDER_STATS_ROLLUPS:
+        OrderStatsRollups().record_order(order)
+
+
+@deferred_receiver(order_status_changed)
+def receive_order_status_change(sender, order, old_status, new_status,
+                                **kwargs):
+    if settings.OSCAR_ANALYTICS_ORDER_STATS_ROLLUPS:
+        OrderStatsRollups().record_status_changes(
+            [(order.pk, old_status, new_status)])
+
+
+@deferred_receiver(order_statuses_changed)
+def receive_order_statuses_change(sender, status_changes, **kwargs):
+    if settings.OSCAR_ANALYTICS_ORDER_STATS_ROLLUPS:
+        OrderStatsRollups().record_status_changes([
+            (change.order_id, change.old_status, change.new_status)
+            for change in status_changes])
@@ -0,0 +1,219 @@
+from collections import defaultdict
+from decimal import Decimal as D
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from oscar.apps.analytics.counters import upsert_counters
+from oscar.core.compat import get_user_model
+from oscar.core.loading import get_model
+
+Line = get_model('order', 'Line')
+Order = get_model('order', 'Order')
+OrderStatsRollup = get_model('analytics', 'OrderStatsRollup')
+OrderStatusCount = get_model('analytics', 'OrderStatusCount')
+Partner = get_model('partner', 'Partner')
+
+# The partner key of the shop-wide rollups
+SHOP = 0
+
+COUNTERS = ('num_orders', 'num_lines', 'total_revenue', 'num_new_customers')
+
+
+def truncate_hour(value):
+    """
+    Return the start of the (UTC) hour of a datetime
+    """
+    if timezone.is_aware(value):
+        value = value.astimezone(timezone.utc)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def trunc_hour(field_name):
+    """
+    Return an expression truncating a datetime field like ``truncate_hour``
+    """
+    return Trunc(field_name, 'hour',
+                 tzinfo=timezone.utc if settings.USE_TZ else None)
+
+
+class OrderStatsRollups(object):
+    """
+    Maintains hourly rollups of the order statistics shown on the dashboard,
+    both for the whole shop and per partner, and reads the statistics from
+    them.
+
+    The rollups are updated when orders are placed and when their status
+    changes. Changes made without sending signals, e.g. deleting orders,
+    are only picked up by ``rebuild()``.
+    """
+    batch_size = 1000
+
+    def record_order(self, order):
+        partner_lines = dict(
+            order.lines.filter(partner_id__isnull=False).order_by().values(
+                'partner_id').annotate(num=Count('id')).values_list(
+                'partner_id', 'num'))
+        period = truncate_hour(order.date_placed)
+
+        rows = defaultdict(lambda: defaultdict(int))
+        rows[(SHOP, period)].update(
+            num_orders=1, num_lines=order.num_lines,
+            total_revenue=order.total_incl_tax)
+        for partner_id, num_lines in partner_lines.items():
+            rows[(partner_id, period)].update(
+                num_orders=1, num_lines=num_lines,
+                total_revenue=order.total_incl_tax)
+
+        if order.user_id:
+            # Customers are counted in the hour they joined, once they have
+            # placed their first order (with lines of a partner)
+            joined = truncate_hour(order.user.date_joined)
+            previous_orders = Order._default_manager.filter(
+                user_id=order.user_id).exclude(pk=order.pk)
+            if not previous_orders.exists():
+                rows[(SHOP, joined)]['num_new_customers'] += 1
+            if partner_lines:
+                returning = set(Line._default_manager.filter(
+                    order__in=previous_orders, partner_id__in=partner_lines,
+                ).order_by().values_list('partner_id', flat=True).distinct())
+                for partner_id in partner_lines:
+                    if partner_id not in returning:
+                        rows[(partner_id, joined)]['num_new_customers'] += 1
+
+        self.update_rollups(rows)
+        self.update_status_counts({
+            (partner_key, order.status): 1
+            for partner_key in [SHOP] + list(partner_lines)})
+
+    def record_status_changes(self, changes):
+        """
+        Record status changes given as (order id, old status, new status)
+        tuples.
+        """
+        partner_ids = defaultdict(set)
+        lines = Line._default_manager.filter(
+            order_id__in=[order_id for order_id, __, __ in changes],
+            partner_id__isnull=False)
+        for order_id, partner_id in lines.order_by().values_list(
+                'order_id', 'partner_id').distinct():
+            partner_ids[order_id].add(partner_id)
+
+        deltas = defaultdict(int)
+        for order_id, old_status, new_status in changes:
+            for partner_key in [SHOP] + list(partner_ids[order_id]):
+                deltas[(partner_key, old_status)] -= 1
+                deltas[(partner_key, new_status)] += 1
+        self.update_status_counts(deltas)
+
+    def update_rollups(self, rows):
+        values = []
+        for (partner_key, period), counters in rows.items():
+            row = {name: counters[name] for name in COUNTERS}
+            row.update(partner_key=partner_key, period_start=period)
+            values.append(row)
+        upsert_counters(
+            OrderStatsRollup, ('partner_key', 'period_start'), values,
+            increment_fields=COUNTERS)
+
+    def update_status_counts(self, deltas):
+        upsert_counters(
+            OrderStatusCount, ('partner_key', 'status'),
+            [{'partner_key': partner_key, 'status': status, 'num_orders': delta}
+             for (partner_key, status), delta in deltas.items() if delta],
+            increment_fields=['num_orders'])
+
+    def rebuild(self):
+        """
+        Recalculate all rollups from the orders
+        """
+        User = get_user_model()
+        orders = Order._default_manager.order_by()
+        lines = Line._default_manager.order_by()
+        rows = defaultdict(lambda: defaultdict(int))
+        status_counts = {}
+
+        scopes = [(SHOP, orders, lines)]
+        for partner_id in Partner._default_manager.values_list('pk', flat=True):
+            partner_lines = lines.filter(partner_id=partner_id)
+            scopes.append((partner_id, orders.filter(
+                Exists(partner_lines.filter(order=OuterRef('pk')))),
+                partner_lines))
+
+        for partner_key, scope_orders, scope_lines in scopes:
+            for period, num, revenue in scope_orders.annotate(
+                    period=trunc_hour('date_placed')).values('period').annotate(
+                    num=Count('id'), revenue=Sum('total_incl_tax')).values_list(
+                    'period', 'num', 'revenue'):
+                rows[(partner_key, period)].update(
+                    num_orders=num, total_revenue=revenue)
+            for period, num in scope_lines.annotate(
+                    period=trunc_hour('order__date_placed')).values(
+                    'period').annotate(num=Count('id')).values_list(
+                    'period', 'num'):
+                rows[(partner_key, period)]['num_lines'] = num
+            for period, num in User._default_manager.filter(
+                    Exists(scope_orders.filter(user=OuterRef('pk')))).annotate(
+                    period=trunc_hour('date_joined')).values('period').annotate(
+                    num=Count('id')).order_by().values_list('period', 'num'):
+                rows[(partner_key, period)]['num_new_customers'] = num
+            for status, num in scope_orders.values('status').annotate(
+                    num=Count('id')).values_list('status', 'num'):
+                status_counts[(partner_key, status)] = num
+
+        with transaction.atomic():
+            OrderStatsRollup._default_manager.all().delete()
+            OrderStatusCount._default_manager.all().delete()
+            OrderStatsRollup._default_manager.bulk_create([
+                OrderStatsRollup(partner_key=partner_key, period_start=period,
+                                 **counters)
+                for (partner_key, period), counters in rows.items()
+            ], batch_size=self.batch_size)
+            OrderStatusCount._default_manager.bulk_create([
+                OrderStatusCount(partner_key=partner_key, status=status,
+                                 num_orders=num)
+                for (partner_key, status), num in status_counts.items()
+            ], batch_size=self.batch_size)
+        return len(rows)
+
+    def get_stats(self, partner_key, since):
+        """
+        Return the order statistics of the dashboard for the whole shop or a
+        partner. The statistics "since" a time include the whole hour it
+        falls into.
+        """
+        recent = Q(period_start__gte=truncate_hour(since))
+        fields = {
+            'total_orders': 'num_orders',
+            'total_lines': 'num_lines',
+            'total_revenue': 'total_revenue',
+            'total_customers': 'num_new_customers',
+        }
+        aggregates = {}
+        for name, field_name in fields.items():
+            aggregates['%s_sum' % name] = Sum(field_name)
+            aggregates['%s_last_day_sum' % name] = Sum(field_name, filter=recent)
+        values = OrderStatsRollup._default_manager.filter(
+            partner_key=partner_key).aggregate(**aggregates)
+
+        stats = {}
+        for name in fields:
+            for key in (name, '%s_last_day' % name):
+                value = values['%s_sum' % key]
+                if value is None:
+                    value = D('0.00') if name == 'total_revenue' else 0
+                stats[key] = value
+
+        if stats['total_orders_last_day']:
+            stats['average_order_costs'] = (
+                stats['total_revenue_last_day'] / stats['total_orders_last_day'])
+        else:
+            stats['average_order_costs'] = D('0.00')
+        stats['order_status_breakdown'] = OrderStatusCount._default_manager.filter(
+            partner_key=partner_key, num_orders__gt=0
+        ).order_by('status').annotate(freq=F('num_orders')).values(
+            'status', 'freq')
+        return stats
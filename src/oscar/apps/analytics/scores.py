@@ -1,7 +1,14 @@
+import datetime
+import math
+from collections import defaultdict
+
 from django.db.models import F
+from django.utils.timezone import localdate
 
+from oscar.apps.analytics.counters import upsert_counters
 from oscar.core.loading import get_model
 
+ProductDailyRecord = get_model('analytics', 'ProductDailyRecord')
 ProductRecord = get_model('analytics', 'ProductRecord')
 
 
@@ -27,3 +34,99 @@ class Calculator(object):
             self.weights[name] * F(name) for name in self.weights.keys()]
         ProductRecord.objects.update(
             score=sum(weighted_fields) / total_weight)
+
+
+class DecayedCalculator(Calculator):
+    """
+    Calculates scores from the daily product records of the last ``window``
+    days, halving the weight of a day's activity every ``half_life`` days.
+
+    Scores are stored on a logarithmic scale relative to a fixed epoch::
+
+        score = log2(sum(weight * events * 2 ** ((date - epoch) / half_life)))
+
+    Instead of old activity losing weight, new activity gains weight as time
+    passes. Scores of products without new activity therefore keep their
+    relative order and don't need to be rewritten: only products with
+    activity since the last run, or with records that dropped out of the
+    window, are updated. Run a full calculation after changing the half-life.
+
+    Records outside the window are kept, so that a later run with a longer
+    window still finds them. Old records can be deleted by setting
+    ``OSCAR_ANALYTICS_DAILY_PRODUCT_RECORDS_RETENTION_DAYS``.
+
+    Requires ``OSCAR_ANALYTICS_DAILY_PRODUCT_RECORDS`` to be enabled.
+    """
+    epoch = datetime.date(2000, 1, 1)
+    default_half_life = 7
+    default_window = 90
+    batch_size = 1000
+
+    def __init__(self, logger, half_life=None, window=None, full=False):
+        super().__init__(logger)
+        self.half_life = half_life or self.default_half_life
+        self.window = window or self.default_window
+        self.full = full
+
+    def calculate_scores(self):
+        self.logger.info("Calculating decayed product scores")
+        start = localdate() - datetime.timedelta(days=self.window - 1)
+        records = ProductDailyRecord.objects.order_by()
+
+        # Records that were scored before but are now outside the window
+        expired = records.filter(date__lt=start, num_scored_events__gt=0)
+        product_ids = set(expired.values_list('product_id', flat=True))
+        if self.full:
+            product_ids.update(
+                ProductRecord.objects.values_list('product_id', flat=True))
+            product_ids.update(records.values_list('product_id', flat=True))
+        else:
+            product_ids.update(records.filter(date__gte=start).annotate(
+                num_events=F('num_views') + F('num_basket_additions') + F('num_purchases')
+            ).filter(
+                num_events__gt=F('num_scored_events')
+            ).values_list('product_id', flat=True))
+
+        product_ids = sorted(product_ids)
+        for i in range(0, len(product_ids), self.batch_size):
+            self.update_scores(product_ids[i:i + self.batch_size], start)
+        # Mark them as no longer part of the scores, so that they are picked
+        # up as new activity if the window grows again
+        expired.update(num_scored_events=0)
+        self.logger.info("Updated the scores of %d products", len(product_ids))
+
+    def update_scores(self, product_ids, start):
+        records = list(ProductDailyRecord.objects.filter(
+            product_id__in=product_ids, date__gte=start).order_by())
+
+        exponents = defaultdict(list)
+        for record in records:
+            weight = sum(self.weights[name] * getattr(record, name)
+                         for name in self.weights)
+            if weight:
+                days = (record.date - self.epoch).days
+                exponents[record.product_id].append(
+                    math.log2(weight) + days / self.half_life)
+
+        upsert_counters(
+            ProductRecord, 'product_id',
+            [{'product_id': product_id,
+              'score': self.log_sum(exponents[product_id])}
+             for product_id in product_ids],
+            update_fields=['score'])
+
+        for record in records:
+            record.num_scored_events = record.num_events
+        ProductDailyRecord.objects.bulk_update(
+            records, ['num_scored_events'], batch_size=self.batch_size)
+
+    @staticmethod
+    def log_sum(exponents):
+        """
+        Return ``log2(sum(2 ** x for x in exponents))`` without overflowing
+        """
+        if not exponents:
+            return 0.0
+        largest = max(exponents)
+        return largest + math.log2(
+            sum(2 ** (x - largest) for x in exponents))
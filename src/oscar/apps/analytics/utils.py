@@ -0,0 +1,43 @@
+from django.db.models import Max
+
+from oscar.core.loading import get_model
+
+DailyUserProductView = get_model('analytics', 'DailyUserProductView')
+DailyUserSearch = get_model('analytics', 'DailyUserSearch')
+UserProductView = get_model('analytics', 'UserProductView')
+UserSearch = get_model('analytics', 'UserSearch')
+
+
+def _latest(querysets, field_name, limit):
+    latest = {}
+    for qs in querysets:
+        for value, date in qs.values_list(field_name, 'last')[:limit]:
+            if value not in latest or latest[value] < date:
+                latest[value] = date
+    return sorted(latest, key=latest.get, reverse=True)[:limit]
+
+
+def get_viewed_product_ids(user, limit=20):
+    """
+    Return the ids of the products the user viewed most recently, from both
+    the recent ``UserProductView`` records and their compacted form.
+    """
+    return _latest([
+        UserProductView._default_manager.filter(user=user).values(
+            'product_id').annotate(last=Max('date_created')).order_by('-last'),
+        DailyUserProductView._default_manager.filter(user=user).values(
+            'product_id').annotate(last=Max('date_last_viewed')).order_by('-last'),
+    ], 'product_id', limit)
+
+
+def get_search_queries(user, limit=20):
+    """
+    Return the queries the user searched for most recently, from both the
+    recent ``UserSearch`` records and their compacted form.
+    """
+    return _latest([
+        UserSearch._default_manager.filter(user=user).values(
+            'query').annotate(last=Max('date_created')).order_by('-last'),
+        DailyUserSearch._default_manager.filter(user=user).values(
+            'query').annotate(last=Max('date_last_searched')).order_by('-last'),
+    ], 'query', limit)
@@ -179,7 +179,7 @@ class AddToBasketForm(forms.Form):
         """
         choices = []
         disabled_values = []
-        for child in product.children.public():
+        for child in product.children.public().with_attributes():
             # Build a description of the child, including any pertinent
             # attributes
             attr_summary = child.attribute_summary
@@ -1,5 +1,6 @@
 import logging
 import os
+import time
 from datetime import date, datetime
 
 from django.conf import settings
@@ -11,7 +12,7 @@ from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.core.files.base import File
 from django.core.validators import RegexValidator
 from django.db import models
-from django.db.models import Count, Exists, OuterRef, Sum
+from django.db.models import Count, Exists, OuterRef, Q, Sum
 from django.db.models.fields import Field
 from django.db.models.lookups import StartsWith
 from django.template.defaultfilters import striptags
@@ -148,6 +149,8 @@ class AbstractCategory(MP_Node):
 
     _slug_separator = '/'
     _full_name_separator = ' > '
+    _tree_version_cache_key = 'CATEGORY_TREE_VERSION'
+    url_cache_key_template = 'CATEGORY_URL_%s_%s'
 
     objects = CategoryQuerySet.as_manager()
 
@@ -173,13 +176,109 @@ class AbstractCategory(MP_Node):
 
         cache_key = self.get_url_cache_key()
         full_slug = cache.get(cache_key)
+        if full_slug is None and parent_slug is None and self.pk:
+            # Compute the slugs of all ancestors at once, which caches them
+            # as well
+            full_slug = self.cache_full_slugs(self.path, descendants=False).get(self.pk)
         if full_slug is None:
             parent_slug = parent_slug if parent_slug is not None else self.get_parent().full_slug
-            full_slug = "%s%s%s" % (parent_slug, self._slug_separator, self.slug)
+            full_slug = self.join_full_slug(parent_slug)
             cache.set(cache_key, full_slug)
 
         return full_slug
 
+    def join_full_slug(self, parent_slug):
+        """
+        Return the full slug of this category given the full slug of its
+        parent. Root categories have no parent, so for a ``parent_slug`` of
+        ``None`` their own slug is returned.
+        """
+        if parent_slug is None:
+            return self.slug
+        return "%s%s%s" % (parent_slug, self._slug_separator, self.slug)
+
+    @classmethod
+    def has_custom_full_slug(cls):
+        """
+        Whether the full slug is customised by overriding ``get_full_slug()``,
+        in which case it has to be called for each category instead of
+        joining the slugs in a single pass
+        """
+        return cls.get_full_slug is not AbstractCategory.get_full_slug
+
+    @classmethod
+    def has_custom_url(cls):
+        """
+        Whether the URL is customised by overriding ``get_full_slug()`` or
+        ``_get_absolute_url()``, in which case the latter has to be called for
+        each category instead of reversing the URL of a known full slug
+        """
+        return (cls.has_custom_full_slug()
+                or cls._get_absolute_url is not AbstractCategory._get_absolute_url)
+
+    @classmethod
+    def get_full_slugs(cls, categories, get_full_slug=None):
+        """
+        Return the full slugs of ``categories`` by path, computed in a single
+        pass. The categories have to be ordered by path, and preceded by
+        their ancestors.
+
+        Each full slug is computed by calling ``get_full_slug`` with the
+        category and the full slug of its parent (``None`` for root
+        categories). By default ``join_full_slug`` is used, which ignores the
+        cached slugs.
+        """
+        if get_full_slug is None:
+            def get_full_slug(category, parent_slug):
+                return category.join_full_slug(parent_slug)
+        full_slugs = {}
+        for category in categories:
+            parent_slug = full_slugs.get(category.path[:-cls.steplen])
+            full_slugs[category.path] = get_full_slug(category, parent_slug)
+        return full_slugs
+
+    @classmethod
+    def cache_full_slugs(cls, path='', descendants=True):
+        """
+        Compute the full slugs of the category with the given ``path`` and of
+        its ancestors, and unless ``descendants`` is ``False`` of all
+        categories below it (by default of all categories). The slugs are
+        computed with a single query and cached for the current language.
+
+        Returns a dict of the full slugs of the category and the categories
+        below it by primary key.
+        """
+        ancestor_paths = [path[:end] for end in range(cls.steplen, len(path), cls.steplen)]
+        if descendants:
+            lookup = Q(path__startswith=path)
+        else:
+            lookup = Q(path=path)
+        categories = list(cls.objects.filter(
+            lookup | Q(path__in=ancestor_paths)).order_by('path').only('pk', 'path', 'slug'))
+        full_slugs = cls.get_full_slugs(categories)
+
+        current_locale = get_language()
+        cache.set_many({
+            cls.url_cache_key_template % (current_locale, category.pk): full_slugs[category.path]
+            for category in categories})
+        return {category.pk: full_slugs[category.path]
+                for category in categories if category.path.startswith(path)}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored slug, so that the cached full slugs are only
+        # recomputed when it changes
+        if 'slug' in field_names:
+            instance._loaded_slug = values[field_names.index('slug')]
+        return instance
+
+    def has_slug_changed(self):
+        """
+        Whether the slug differs from the one this category was loaded with
+        """
+        return getattr(self, '_loaded_slug', None) != self.slug
+
     @property
     def full_slug(self):
         """
@@ -225,6 +324,36 @@ class AbstractCategory(MP_Node):
         # Correctly populate ancestors_are_public
         self.refresh_from_db()
 
+    def move(self, target, pos=None):
+        super().move(target, pos)
+        self.bump_tree_version()
+        # Only the slugs of the moved subtree change
+        self.cache_full_slugs(
+            self.__class__.objects.values_list('path', flat=True).get(pk=self.pk))
+
+    @classmethod
+    def get_tree_version(cls):
+        """
+        Return a number identifying the current state of the category tree.
+        It changes whenever a category is saved, moved or deleted, and is
+        used to invalidate in-memory copies of the tree.
+        """
+        version = cache.get(cls._tree_version_cache_key)
+        if version is None:
+            # Don't start from zero again if the key was evicted, otherwise
+            # copies of an older tree could be considered current
+            version = int(time.time() * 1000)
+            if not cache.add(cls._tree_version_cache_key, version, None):
+                version = cache.get(cls._tree_version_cache_key, version)
+        return version
+
+    @classmethod
+    def bump_tree_version(cls):
+        try:
+            cache.incr(cls._tree_version_cache_key)
+        except ValueError:
+            cache.set(cls._tree_version_cache_key, int(time.time() * 1000), None)
+
     @classmethod
     def fix_tree(cls, destructive=False):
         super().fix_tree(destructive)
@@ -236,6 +365,7 @@ class AbstractCategory(MP_Node):
                 node.save()
             else:
                 node.set_ancestors_are_public()
+        cls.bump_tree_version()
 
     def get_meta_title(self):
         return self.meta_title or self.name
@@ -264,7 +394,7 @@ class AbstractCategory(MP_Node):
 
     def get_url_cache_key(self):
         current_locale = get_language()
-        cache_key = 'CATEGORY_URL_%s_%s' % (current_locale, self.pk)
+        cache_key = self.url_cache_key_template % (current_locale, self.pk)
         return cache_key
 
     def _get_absolute_url(self, parent_slug=None):
@@ -276,8 +406,11 @@ class AbstractCategory(MP_Node):
         you change that logic, you'll have to reconsider the caching
         approach.
         """
+        return self.get_url_for_full_slug(self.get_full_slug(parent_slug=parent_slug))
+
+    def get_url_for_full_slug(self, full_slug):
         return reverse('catalogue:category', kwargs={
-            'category_slug': self.get_full_slug(parent_slug=parent_slug), 'pk': self.pk
+            'category_slug': full_slug, 'pk': self.pk
         })
 
     def get_absolute_url(self):
@@ -609,7 +742,9 @@ class AbstractProduct(models.Model):
         """
         Return a string of all of a product's attributes
         """
-        attributes = self.get_attribute_values()
+        attributes = self.get_prefetched_attribute_values()
+        if attributes is None:
+            attributes = self.get_attribute_values()
         pairs = [attribute.summary() for attribute in attributes]
         return ", ".join(pairs)
 
@@ -677,6 +812,26 @@ class AbstractProduct(models.Model):
 
         return attribute_values
 
+    def get_prefetched_attribute_values(self):
+        """
+        Return the attribute values prefetched with
+        ``ProductQuerySet.with_attributes()`` as a list, or None if they
+        haven't been prefetched. Mirrors ``get_attribute_values()``.
+        """
+        attribute_values = getattr(self, 'prefetched_attribute_values', None)
+        if attribute_values is None or not self.is_child:
+            return attribute_values
+
+        parent_attribute_values = getattr(
+            self.parent, 'prefetched_attribute_values', None)
+        if parent_attribute_values is None:
+            return None
+        codes = {value.attribute.code for value in attribute_values}
+        return sorted(
+            attribute_values + [value for value in parent_attribute_values
+                                if value.attribute.code not in codes],
+            key=lambda value: value.pk)
+
     # Images
 
     def get_missing_image(self):
@@ -741,6 +896,16 @@ class AbstractProduct(models.Model):
             rating = float(reviews_sum) / reviews_count
         return rating
 
+    @classmethod
+    def has_custom_rating(cls):
+        """
+        Whether the rating is customised by overriding ``calculate_rating()``
+        or ``update_rating()``, in which case ``update_ratings()`` of the
+        product queryset recalculates ratings per product
+        """
+        return (cls.calculate_rating is not AbstractProduct.calculate_rating
+                or cls.update_rating is not AbstractProduct.update_rating)
+
     def has_review_by(self, user):
         if user.is_anonymous:
             return False
@@ -1157,6 +1322,73 @@ class AbstractProductAttributeValue(models.Model):
         return mark_safe(self.value)
 
 
+class AbstractIndexedAttributeValue(models.Model):
+    """
+    A denormalised attribute value of a product that products can be filtered
+    and sorted by (see ``OSCAR_PRODUCT_ATTRIBUTE_INDEX``).
+
+    Values are stored per attribute code with one typed column per kind of
+    value. Option values are stored as their text and multi option values as
+    one row per option, so that filtering by an attribute only needs an
+    indexed lookup on this table.
+    """
+    #: The column values of each attribute type are stored in. Values of the
+    #: other types (rich text, entities, files and images) aren't indexed.
+    TYPE_COLUMNS = {
+        'text': 'value_text',
+        'option': 'value_text',
+        'multi_option': 'value_text',
+        'integer': 'value_number',
+        'float': 'value_number',
+        'boolean': 'value_boolean',
+        'date': 'value_date',
+        'datetime': 'value_datetime',
+    }
+
+    product = models.ForeignKey(
+        'catalogue.Product',
+        on_delete=models.CASCADE,
+        related_name='indexed_attribute_values',
+        verbose_name=_("Product"))
+    code = models.CharField(_('Code'), max_length=128)
+    value_text = models.CharField(
+        _('Text'), max_length=255, blank=True, null=True)
+    value_number = models.FloatField(_('Number'), blank=True, null=True)
+    value_boolean = models.BooleanField(_('Boolean'), blank=True, null=True)
+    value_date = models.DateField(_('Date'), blank=True, null=True)
+    value_datetime = models.DateTimeField(
+        _('DateTime'), blank=True, null=True)
+
+    class Meta:
+        abstract = True
+        app_label = 'catalogue'
+        indexes = [
+            models.Index(fields=['code', 'value_text'],
+                         name='catalogue_attr_index_text'),
+            models.Index(fields=['code', 'value_number'],
+                         name='catalogue_attr_index_number'),
+            models.Index(fields=['code', 'value_boolean'],
+                         name='catalogue_attr_index_boolean'),
+            models.Index(fields=['code', 'value_date'],
+                         name='catalogue_attr_index_date'),
+            models.Index(fields=['code', 'value_datetime'],
+                         name='catalogue_attr_index_datetime'),
+        ]
+        verbose_name = _('Indexed attribute value')
+        verbose_name_plural = _('Indexed attribute values')
+
+    def __str__(self):
+        return "%s: %s" % (self.code, self.value)
+
+    @property
+    def value(self):
+        for field_name in ('value_text', 'value_number', 'value_boolean',
+                           'value_date', 'value_datetime'):
+            value = getattr(self, field_name)
+            if value is not None:
+                return value
+
+
 class AbstractAttributeOptionGroup(models.Model):
     """
     Defines a group of options that collectively may be used as an
@@ -1,8 +1,11 @@
 from collections import defaultdict
 
+from django.conf import settings
 from django.db import models
-from django.db.models import Exists, OuterRef
+from django.db.models import (
+    Avg, Exists, F, FloatField, OuterRef, Prefetch, Subquery)
 from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Cast, Coalesce
 from treebeard.mp_tree import MP_NodeQuerySet
 
 from oscar.core.loading import get_model
@@ -48,7 +51,57 @@ class AttributeFilter(dict):
 
         return _filter
 
-    def fast_query(self, attribute_types, queryset):
+    @staticmethod
+    def is_indexed(types):
+        """
+        Whether values of all the passed attribute types are stored in the
+        attribute index (see ``OSCAR_PRODUCT_ATTRIBUTE_INDEX``)
+        """
+        IndexedAttributeValue = get_model('catalogue', 'IndexedAttributeValue')
+        return bool(types) and all(
+            _type in IndexedAttributeValue.TYPE_COLUMNS for _type in types)
+
+    @staticmethod
+    def is_indexed_value(lookup, value):
+        """
+        Whether products with the passed value can be found in the attribute
+        index. Text values longer than the indexed column aren't indexed, so
+        equality filters on them have to use the attribute values.
+        """
+        IndexedAttributeValue = get_model('catalogue', 'IndexedAttributeValue')
+        max_length = IndexedAttributeValue._meta.get_field(
+            'value_text').max_length
+        if lookup in (None, 'exact', 'iexact'):
+            values = [value]
+        elif lookup == 'in':
+            values = value
+        else:
+            return True
+        return not any(
+            isinstance(item, str) and len(item) > max_length for item in values)
+
+    def _select_indexed_value(self, code, types, lookup, value):
+        IndexedAttributeValue = get_model('catalogue', 'IndexedAttributeValue')
+        columns = sorted(
+            {IndexedAttributeValue.TYPE_COLUMNS[_type] for _type in types})
+        _filter = models.Q()
+        for column in columns:
+            if lookup is not None:
+                column = "%s%s%s" % (column, LOOKUP_SEP, lookup)
+            _filter |= models.Q(**{column: value})
+
+        return Exists(IndexedAttributeValue._default_manager.filter(
+            _filter, product=OuterRef('pk'), code=code))
+
+    def fast_query(self, attribute_types, queryset, indexed=False):
+        """
+        Filter the queryset by the attribute values.
+
+        If ``indexed`` is true, attributes whose types are all stored in the
+        attribute index are looked up in it with one indexed subquery each,
+        instead of joining the attribute values. Equality filters on text
+        that is too long to be indexed still join the attribute values.
+        """
         qs = queryset
         typedict = defaultdict(list)
 
@@ -56,6 +109,12 @@ class AttributeFilter(dict):
             typedict[code].append(attribute_type)
 
         for code, (lookup, value) in self.items():
+            if indexed and self.is_indexed(typedict[code]) \
+                    and self.is_indexed_value(lookup, value):
+                qs = qs.filter(self._select_indexed_value(
+                    code, typedict[code], lookup, value))
+                continue
+
             selected_values = self._select_value(typedict[code], lookup, value)
             if not selected_values:  # if no value clause can be formed, no result can be formed.
                 return queryset.none()
@@ -86,7 +145,43 @@ class ProductQuerySet(models.query.QuerySet):
             code__in=attribute_filter.field_names()
         )
 
-        return attribute_filter.fast_query(attribute_types, self)
+        return attribute_filter.fast_query(
+            attribute_types, self,
+            indexed=settings.OSCAR_PRODUCT_ATTRIBUTE_INDEX)
+
+    def order_by_attribute(self, code, descending=False):
+        """
+        Orders the products by the value of the attribute with the passed
+        code. Products without a value come last, and products with several
+        values of a multi option attribute are ordered by the first one.
+
+        The values are read from the attribute index if it's enabled (see
+        ``OSCAR_PRODUCT_ATTRIBUTE_INDEX``) and the attribute is indexed.
+        """
+        ProductAttribute = self.model.attributes.rel.model
+        types = list(ProductAttribute.objects.filter(code=code).values_list(
+            "type", flat=True).order_by("type").distinct())
+        if not types:
+            return self
+
+        if settings.OSCAR_PRODUCT_ATTRIBUTE_INDEX and AttributeFilter.is_indexed(types):
+            IndexedAttributeValue = get_model('catalogue', 'IndexedAttributeValue')
+            column = IndexedAttributeValue.TYPE_COLUMNS[types[0]]
+            values = IndexedAttributeValue._default_manager.filter(
+                product=OuterRef('pk'), code=code)
+        else:
+            ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+            column = 'value_%s' % types[0]
+            if types[0] in ('option', 'multi_option'):
+                column = '%s%soption' % (column, LOOKUP_SEP)
+            values = ProductAttributeValue._default_manager.filter(
+                product=OuterRef('pk'), attribute__code=code)
+
+        annotation = '%s_attribute_value' % code
+        value = Subquery(values.order_by(column).values(column)[:1])
+        ordering = F(annotation).desc(nulls_last=True) if descending else \
+            F(annotation).asc(nulls_last=True)
+        return self.annotate(**{annotation: value}).order_by(ordering)
 
     def base_queryset(self):
         """
@@ -101,6 +196,26 @@ class ProductQuerySet(models.query.QuerySet):
             .annotate(has_product_class_options=Exists(product_class_options),
                       has_product_options=Exists(product_options))
 
+    def with_attributes(self):
+        """
+        Prefetches the attribute values of the products, including their
+        option, multi option and entity values, and the attribute values of
+        the parents of child products.
+
+        The attribute containers (``product.attr``) and attribute summaries of
+        the products then use the prefetched values, so that the attributes of
+        a list of products are loaded with a few queries in total.
+        """
+        ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
+        values = ProductAttributeValue.objects.select_related(
+            'attribute', 'value_option').prefetch_related(
+            'value_multi_option', 'value_entity')
+        return self.prefetch_related(
+            Prefetch('attribute_values', queryset=values,
+                     to_attr='prefetched_attribute_values'),
+            Prefetch('parent__attribute_values', queryset=values,
+                     to_attr='prefetched_attribute_values'))
+
     def browsable(self):
         """
         Excludes non-canonical products and non-public products
@@ -113,6 +228,41 @@ class ProductQuerySet(models.query.QuerySet):
         """
         return self.filter(is_public=True)
 
+    def update_ratings(self):
+        """
+        Recalculates the denormalised ratings of the products from their
+        approved reviews with a single ``UPDATE`` statement, which only writes
+        the products whose rating changed. Returns the number of updated
+        products.
+
+        If the product model overrides ``calculate_rating()`` or
+        ``update_rating()``, e.g. for a weight-based rating, the ratings are
+        recalculated by calling ``update_rating()`` on every product instead.
+        """
+        if self.model.has_custom_rating():
+            num_updated = 0
+            for product in self.iterator():
+                rating = product.rating
+                product.update_rating()
+                if product.rating != rating:
+                    num_updated += 1
+            return num_updated
+
+        ProductReview = self.model.reviews.rel.related_model
+        rating = Subquery(
+            ProductReview._default_manager.filter(
+                product=OuterRef('pk'), status=ProductReview.APPROVED,
+            ).order_by().values('product').annotate(
+                avg=Avg(Cast('score', FloatField()))).values('avg'),
+            output_field=FloatField())
+        # Scores are never negative, so -1 stands for "no rating" to compare
+        # the ratings in a single condition
+        return self.annotate(
+            old_rating=Coalesce('rating', -1.0),
+            new_rating=Coalesce(rating, -1.0),
+        ).exclude(old_rating=F('new_rating')).update(rating=rating)
+    update_ratings.alters_data = True
+
     def browsable_dashboard(self):
         """
         Products that should be browsable in the dashboard.
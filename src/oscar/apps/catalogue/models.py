@@ -56,6 +56,13 @@ if not is_model_registered('catalogue', 'ProductAttributeValue'):
     __all__.append('ProductAttributeValue')
 
 
+if not is_model_registered('catalogue', 'IndexedAttributeValue'):
+    class IndexedAttributeValue(AbstractIndexedAttributeValue):
+        pass
+
+    __all__.append('IndexedAttributeValue')
+
+
 if not is_model_registered('catalogue', 'AttributeOptionGroup'):
     class AttributeOptionGroup(AbstractAttributeOptionGroup):
         pass
@@ -1,6 +1,8 @@
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
+from oscar.core.loading import get_class
+
 
 class ProductAttributesContainer:
     """
@@ -13,6 +15,9 @@ class ProductAttributesContainer:
     To refetch the attribute values from the database:
 
         product.attr.refresh()
+
+    The values prefetched with ``Product.objects.with_attributes()`` are used
+    if available.
     """
 
     def __setstate__(self, state):
@@ -20,10 +25,18 @@ class ProductAttributesContainer:
 
     def __init__(self, product):
         self.product = product
-        self.refresh()
+        values = product.get_prefetched_attribute_values()
+        if values is None:
+            self.refresh()
+        else:
+            self._set_values(values)
 
     def refresh(self):
-        values = self.get_values().select_related('attribute')
+        # Prefetched values may be outdated
+        self.product.__dict__.pop('prefetched_attribute_values', None)
+        self._set_values(self.get_values().select_related('attribute'))
+
+    def _set_values(self, values):
         for v in values:
             setattr(self, v.attribute.code, v.value)
 
@@ -60,10 +73,18 @@ class ProductAttributesContainer:
         return self.get_all_attributes().get(code=code)
 
     def __iter__(self):
-        return iter(self.get_values())
+        values = self.product.get_prefetched_attribute_values()
+        if values is None:
+            values = self.get_values()
+        return iter(values)
 
     def save(self):
-        for attribute in self.get_all_attributes():
-            if hasattr(self, attribute.code):
-                value = getattr(self, attribute.code)
-                attribute.save_value(self.product, value)
+        ProductAttributeIndexer = get_class(
+            'catalogue.utils', 'ProductAttributeIndexer')
+        # The product is indexed once after all its values are saved
+        with ProductAttributeIndexer.deferred(self.product):
+            for attribute in self.get_all_attributes():
+                if hasattr(self, attribute.code):
+                    value = getattr(self, attribute.code)
+                    attribute.save_value(self.product, value)
+            self.product.__dict__.pop('prefetched_attribute_values', None)
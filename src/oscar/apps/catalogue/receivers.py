@@ -1,11 +1,21 @@
 # -*- coding: utf-8 -*-
 from django.conf import settings
-from django.db.models.signals import post_delete, post_save
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
-from oscar.core.loading import get_model
+from oscar.core.deferred import defer
+from oscar.core.loading import get_class, get_model
 
+AttributeOption = get_model("catalogue", "AttributeOption")
 Category = get_model("catalogue", "Category")
+Product = get_model("catalogue", "Product")
+ProductAttributeValue = get_model("catalogue", "ProductAttributeValue")
+ProductImage = get_model("catalogue", "ProductImage")
+
+ProductAttributeIndexer = get_class("catalogue.utils", "ProductAttributeIndexer")
+ThumbnailGenerator = get_class("catalogue.utils", "ThumbnailGenerator")
 
 
 if settings.OSCAR_DELETE_IMAGE_FILES:
@@ -13,8 +23,6 @@ if settings.OSCAR_DELETE_IMAGE_FILES:
 
     from oscar.core.thumbnails import get_thumbnailer
 
-    ProductImage = get_model('catalogue', 'ProductImage')
-
     def delete_image_files(sender, instance, **kwargs):
         """
         Deletes the original image and created thumbnails.
@@ -36,3 +44,73 @@ if settings.OSCAR_DELETE_IMAGE_FILES:
 @receiver(post_save, sender=Category, dispatch_uid='set_ancestors_are_public')
 def post_save_set_ancestors_are_public(sender, instance, **kwargs):
     instance.set_ancestors_are_public()
+
+
+@receiver(post_save, sender=Category, dispatch_uid='cache_category_full_slugs')
+def post_save_cache_full_slugs(sender, instance, created, **kwargs):
+    # If the slug of the category changed, so did the full slugs of its
+    # subtree
+    if created or kwargs.get('raw', False):
+        return
+    if instance.has_slug_changed():
+        instance.cache_full_slugs(instance.path)
+    instance._loaded_slug = instance.slug
+
+
+@receiver(post_save, sender=Category, dispatch_uid='bump_category_tree_version_on_save')
+@receiver(post_delete, sender=Category, dispatch_uid='bump_category_tree_version_on_delete')
+def bump_category_tree_version(sender, instance, **kwargs):
+    sender.bump_tree_version()
+
+
+@receiver(post_save, sender=ProductAttributeValue, dispatch_uid='index_attribute_value_on_save')
+@receiver(post_delete, sender=ProductAttributeValue, dispatch_uid='index_attribute_value_on_delete')
+def reindex_product_attributes(sender, instance, **kwargs):
+    if kwargs.get('raw', False) or not settings.OSCAR_PRODUCT_ATTRIBUTE_INDEX:
+        return
+    try:
+        product = instance.product
+    except ObjectDoesNotExist:
+        # The product is being deleted as well
+        return
+    ProductAttributeIndexer().update(product)
+
+
+@receiver(m2m_changed, sender=ProductAttributeValue.value_multi_option.through,
+          dispatch_uid='index_attribute_multi_options')
+def reindex_product_multi_options(sender, instance, action, reverse, pk_set,
+                                  **kwargs):
+    if not settings.OSCAR_PRODUCT_ATTRIBUTE_INDEX:
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        ProductAttributeIndexer().update(instance.product)
+    elif pk_set:
+        # Attribute values were added to or removed from an option
+        ProductAttributeIndexer().index_products(
+            Product._default_manager.filter(
+                attribute_values__in=pk_set).distinct())
+
+
+@receiver(post_save, sender=AttributeOption, dispatch_uid='index_attribute_option')
+def reindex_products_of_option(sender, instance, created, **kwargs):
+    # The text of the option is indexed for the products that use it
+    if created or kwargs.get('raw', False):
+        return
+    if settings.OSCAR_PRODUCT_ATTRIBUTE_INDEX:
+        products = Product._default_manager.filter(
+            Q(attribute_values__value_option=instance)
+            | Q(attribute_values__value_multi_option=instance)).distinct()
+        ProductAttributeIndexer().index_products(products)
+
+
+def generate_image_thumbnails(image_id):
+    ThumbnailGenerator(processes=1).generate(
+        ProductImage._default_manager.filter(pk=image_id))
+
+
+@receiver(post_save, sender=ProductImage, dispatch_uid='generate_image_thumbnails')
+def post_save_generate_image_thumbnails(sender, instance, **kwargs):
+    if settings.OSCAR_THUMBNAIL_GENERATE_ON_UPLOAD and not kwargs.get('raw', False):
+        defer(generate_image_thumbnails, instance.pk)
@@ -102,14 +102,27 @@ class AbstractProductReview(models.Model):
     def vote_down(self, user):
         self.votes.create(user=user, delta=AbstractVote.DOWN)
 
+    # The product and score of the review as last loaded or saved, if it
+    # counted towards the rating of the product
+    _rating_key = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._rating_key = instance.get_rating_key()
+        return instance
+
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        self.product.update_rating()
+        old_key, self._rating_key = self._rating_key, self.get_rating_key()
+        # Saving e.g. the vote totals doesn't change the rating
+        if old_key != self._rating_key:
+            self.update_product_ratings(old_key, self._rating_key)
 
     def delete(self, *args, **kwargs):
         super().delete(*args, **kwargs)
-        if self.product is not None:
-            self.product.update_rating()
+        old_key, self._rating_key = self._rating_key, None
+        self.update_product_ratings(old_key, self.get_rating_key())
 
     # Properties
 
@@ -163,6 +176,29 @@ class AbstractProductReview(models.Model):
         self.delta_votes = result['score'] or 0
         self.save()
 
+    def get_rating_key(self):
+        """
+        Return the product and score of the review if it counts towards the
+        rating of the product, i.e. if it's approved
+        """
+        if self.product_id is None or not self.is_approved:
+            return None
+        return (self.product_id, self.score)
+
+    def update_product_ratings(self, *rating_keys):
+        """
+        Update the ratings of the products of the passed rating keys with a
+        single ``UPDATE`` statement, instead of saving the products
+        """
+        product_ids = {key[0] for key in rating_keys if key is not None}
+        if not product_ids:
+            return
+        field = self._meta.get_field('product')
+        field.related_model._default_manager.filter(
+            pk__in=product_ids).update_ratings()
+        if self.product_id in product_ids and field.is_cached(self):
+            self.product.refresh_from_db(fields=['rating'])
+
     def can_user_vote(self, user):
         """
         Test whether the passed user is allowed to vote on this
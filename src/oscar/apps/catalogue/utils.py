@@ -1,10 +1,15 @@
+import hashlib
 import os
 import shutil
 import tarfile
 import tempfile
 import zipfile
 import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
+from django.conf import settings
 from django.core.exceptions import FieldError
 from django.core.files import File
 from django.db.transaction import atomic
@@ -12,9 +17,11 @@ from django.utils.translation import gettext_lazy as _
 from PIL import Image
 
 from oscar.apps.catalogue.exceptions import (
-    IdenticalImageError, ImageImportError, InvalidImageArchive)
+    ImageImportError, InvalidImageArchive)
 from oscar.core.loading import get_model
+from oscar.core.thumbnails import generate_thumbnails
 
+IndexedAttributeValue = get_model('catalogue', 'IndexedAttributeValue')
 Product = get_model('catalogue', 'product')
 ProductImage = get_model('catalogue', 'productimage')
 
@@ -22,57 +29,198 @@ ProductImage = get_model('catalogue', 'productimage')
 # This is an old class only really intended to be used by the internal sandbox
 # site. It's not recommended to be used by your project.
 class Importer(object):
+    """
+    Imports product images from a folder or archive, matching the file names
+    (without extension) against a product field.
+
+    Images are imported in batches of ``batch_size`` files. The products of a
+    batch are looked up with a single query, and the files are checked,
+    hashed and written to storage by a pool of ``workers`` threads. Images
+    whose content is identical to an image of the product are skipped. Each
+    batch is committed separately and recorded in the ``journal`` file, if
+    one is passed, so that an interrupted import continues where it stopped
+    when it's run again. The journal is removed once the import is complete.
+    """
 
     allowed_extensions = ['.jpeg', '.jpg', '.gif', '.png']
+    batch_size = 100
 
-    def __init__(self, logger, field):
+    def __init__(self, logger, field, workers=None, journal=None):
         self.logger = logger
         self._field = field
+        self.workers = workers
+        self.journal = journal
 
-    @atomic  # noqa (too complex (10))
     def handle(self, dirname):
         stats = {
             'num_processed': 0,
             'num_skipped': 0,
             'num_invalid': 0}
         image_dir, filenames = self._get_image_files(dirname)
-        if image_dir:
-            for filename in filenames:
-                try:
-                    lookup_value \
-                        = self._get_lookup_value_from_filename(filename)
-                    self._process_image(image_dir, filename, lookup_value)
-                    stats['num_processed'] += 1
-                except Product.MultipleObjectsReturned:
-                    self.logger.warning("Multiple products matching %s='%s',"
-                                        " skipping"
-                                        % (self._field, lookup_value))
-                    stats['num_skipped'] += 1
-                except Product.DoesNotExist:
-                    self.logger.warning("No item matching %s='%s'"
-                                        % (self._field, lookup_value))
-                    stats['num_skipped'] += 1
-                except IdenticalImageError:
-                    self.logger.warning("Identical image already exists for"
-                                        " %s='%s', skipping"
-                                        % (self._field, lookup_value))
-                    stats['num_skipped'] += 1
-                except IOError as e:
-                    stats['num_invalid'] += 1
-                    raise ImageImportError(_('%(filename)s is not a valid'
-                                             ' image (%(error)s)')
-                                           % {'filename': filename,
-                                              'error': e})
-                except FieldError as e:
-                    raise ImageImportError(e)
-            if image_dir != dirname:
-                shutil.rmtree(image_dir)
-        else:
+        if not image_dir:
             raise InvalidImageArchive(_('%s is not a valid image archive')
                                       % dirname)
+        try:
+            imported = self._read_journal()
+            if imported:
+                self.logger.info("Resuming image import, skipping %d images"
+                                 " imported before" % len(imported))
+            filenames = [filename for filename in sorted(filenames)
+                         if filename not in imported]
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for start in range(0, len(filenames), self.batch_size):
+                    batch = filenames[start:start + self.batch_size]
+                    self._import_batch(executor, image_dir, batch, stats)
+                    self._write_journal(batch)
+        finally:
+            if image_dir != dirname:
+                shutil.rmtree(image_dir)
+        self._remove_journal()
         self.logger.info("Finished image import: %(num_processed)d imported,"
                          " %(num_skipped)d skipped" % stats)
 
+    def _import_batch(self, executor, image_dir, filenames, stats):
+        paths = [os.path.join(image_dir, filename) for filename in filenames]
+        digests = list(executor.map(self._hash_image, paths))
+        for filename, digest in zip(filenames, digests):
+            if isinstance(digest, IOError):
+                stats['num_invalid'] += 1
+                raise ImageImportError(_('%(filename)s is not a valid'
+                                         ' image (%(error)s)')
+                                       % {'filename': filename,
+                                          'error': digest})
+
+        lookup_values = [self._get_lookup_value_from_filename(filename)
+                         for filename in filenames]
+        products = self._fetch_products(set(lookup_values))
+        product_ids = {pks[0] for pks in products.values() if len(pks) == 1}
+        existing_digests, next_indexes, broken_images = \
+            self._get_existing_images(executor, product_ids)
+
+        new_images = []
+        for path, lookup_value, digest in zip(paths, lookup_values, digests):
+            matches = products.get(lookup_value, [])
+            if len(matches) > 1:
+                self.logger.warning("Multiple products matching %s='%s',"
+                                    " skipping"
+                                    % (self._field, lookup_value))
+                stats['num_skipped'] += 1
+                continue
+            if not matches:
+                self.logger.warning("No item matching %s='%s'"
+                                    % (self._field, lookup_value))
+                stats['num_skipped'] += 1
+                continue
+            product_id = matches[0]
+            if digest in existing_digests[product_id]:
+                self.logger.warning("Identical image already exists for"
+                                    " %s='%s', skipping"
+                                    % (self._field, lookup_value))
+                stats['num_skipped'] += 1
+                continue
+            existing_digests[product_id].add(digest)
+            new_images.append((path, ProductImage(
+                product_id=product_id,
+                display_order=next_indexes[product_id])))
+            next_indexes[product_id] += 1
+
+        # The files are written to storage by the workers, the rows are
+        # inserted when they all have been written
+        images = list(executor.map(self._save_image_file, new_images))
+        with atomic():
+            for image in broken_images:
+                # The file of the image probably doesn't exist
+                image.delete()
+            for image in images:
+                image.save()
+                self.logger.debug('Image added to product %s' % image.product_id)
+        stats['num_processed'] += len(images)
+
+    def _fetch_products(self, lookup_values):
+        """
+        Return the primary keys of the products matching each lookup value
+        """
+        products = defaultdict(list)
+        lookup_values = list(lookup_values)
+        lookup = '%s__in' % self._field
+        for start in range(0, len(lookup_values), self.batch_size):
+            batch = lookup_values[start:start + self.batch_size]
+            try:
+                matches = Product._default_manager.filter(
+                    **{lookup: batch}).values_list(self._field, 'pk')
+                for value, pk in matches:
+                    products[str(value)].append(pk)
+            except FieldError as e:
+                raise ImageImportError(e)
+        return products
+
+    def _get_existing_images(self, executor, product_ids):
+        """
+        Return the content hashes and the next display order of the images of
+        the passed products, and the images whose files can't be read
+        """
+        digests = defaultdict(set)
+        next_indexes = defaultdict(int)
+        broken_images = []
+        images = list(ProductImage._default_manager.filter(
+            product_id__in=product_ids).order_by('display_order'))
+        for image, digest in zip(
+                images, executor.map(self._hash_existing_image, images)):
+            next_indexes[image.product_id] = image.display_order + 1
+            if isinstance(digest, IOError):
+                broken_images.append(image)
+            else:
+                digests[image.product_id].add(digest)
+        return digests, next_indexes, broken_images
+
+    def _hash_image(self, file_path):
+        # Runs in a worker thread. Errors are returned to be reported in order.
+        try:
+            trial_image = Image.open(file_path)
+            trial_image.verify()
+            with open(file_path, 'rb') as f:
+                return self._hash_file(f)
+        except IOError as e:
+            return e
+
+    def _hash_existing_image(self, image):
+        try:
+            image.original.open('rb')
+            try:
+                return self._hash_file(image.original)
+            finally:
+                image.original.close()
+        except IOError as e:
+            return e
+
+    def _hash_file(self, f):
+        digest = hashlib.sha1()
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def _save_image_file(self, item):
+        file_path, image = item
+        with open(file_path, 'rb') as f:
+            image.original.save(os.path.basename(file_path), File(f),
+                                save=False)
+        return image
+
+    def _read_journal(self):
+        if not self.journal or not os.path.exists(self.journal):
+            return set()
+        with open(self.journal) as f:
+            return {line.rstrip('\n') for line in f if line.strip()}
+
+    def _write_journal(self, filenames):
+        if self.journal:
+            with open(self.journal, 'a') as f:
+                f.writelines('%s\n' % filename for filename in filenames)
+
+    def _remove_journal(self):
+        if self.journal and os.path.exists(self.journal):
+            os.remove(self.journal)
+
     def _get_image_files(self, dirname):
         filenames = []
         image_dir = self._extract_images(dirname)
@@ -117,34 +265,142 @@ class Importer(object):
         # unknown archive - perhaps this should be treated differently
         return ""
 
-    def _process_image(self, dirname, filename, lookup_value):
-        file_path = os.path.join(dirname, filename)
-        trial_image = Image.open(file_path)
-        trial_image.verify()
+    def _get_lookup_value_from_filename(self, filename):
+        return os.path.splitext(filename)[0]
 
-        kwargs = {self._field: lookup_value}
-        item = Product._default_manager.get(**kwargs)
 
-        new_data = open(file_path, 'rb').read()
-        next_index = 0
-        for existing in item.images.all():
-            next_index = existing.display_order + 1
-            try:
-                if new_data == existing.original.read():
-                    raise IdenticalImageError()
-            except IOError:
-                # File probably doesn't exist
-                existing.delete()
-
-        new_file = File(open(file_path, 'rb'))
-        im = ProductImage(product=item, display_order=next_index)
-        im.original.save(filename, new_file, save=False)
-        im.save()
-        self.logger.debug('Image added to "%s"' % item)
-
-    def _fetch_item(self, filename):
-        kwargs = {self._field: self._get_lookup_value_from_filename(filename)}
-        return Product._default_manager.get(**kwargs)
+class ProductAttributeIndexer(object):
+    """
+    Maintains the denormalised attribute values products are filtered and
+    sorted by (see ``OSCAR_PRODUCT_ATTRIBUTE_INDEX``).
+    """
 
-    def _get_lookup_value_from_filename(self, filename):
-        return os.path.splitext(filename)[0]
+    def get_values(self, product):
+        """
+        Return the (code, column, value) triples of a product's own attribute
+        values
+        """
+        values = getattr(product, 'prefetched_attribute_values', None)
+        if values is None:
+            values = product.attribute_values.select_related(
+                'attribute', 'value_option').prefetch_related(
+                'value_multi_option')
+
+        max_length = IndexedAttributeValue._meta.get_field(
+            'value_text').max_length
+        triples = []
+        for value in values:
+            attribute = value.attribute
+            column = IndexedAttributeValue.TYPE_COLUMNS.get(attribute.type)
+            if column is None:
+                continue
+            if attribute.is_option:
+                items = [value.value_option.option] if value.value_option else []
+            elif attribute.is_multi_option:
+                items = [option.option for option in value.value_multi_option.all()]
+            else:
+                items = [value.value]
+            for item in items:
+                # Text values that are too long can't be indexed
+                if item is None or (
+                        column == 'value_text' and len(item) > max_length):
+                    continue
+                triples.append((attribute.code, column, item))
+        return triples
+
+    def index(self, product):
+        """
+        Replace the indexed attribute values of a single product
+        """
+        self.index_products([product])
+
+    def update(self, product):
+        """
+        Reindex a product whose attribute values changed, unless that is
+        deferred until they are all saved (see ``deferred()``)
+        """
+        if '_attribute_index_outdated' in product.__dict__:
+            product._attribute_index_outdated = True
+        else:
+            self.index(product)
+
+    @classmethod
+    @contextmanager
+    def deferred(cls, product):
+        """
+        Reindex the product once when the block exits, instead of every time
+        one of its attribute values is saved inside it
+        """
+        product._attribute_index_outdated = False
+        try:
+            yield
+        finally:
+            outdated = product.__dict__.pop('_attribute_index_outdated')
+        if outdated:
+            cls().index(product)
+
+    def index_products(self, products):
+        """
+        Replace the indexed attribute values of the passed products using one
+        delete and one bulk insert.
+
+        The products' attribute values should be prefetched with
+        ``with_attributes()`` when indexing many products.
+        """
+        products = list(products)
+        with atomic():
+            IndexedAttributeValue._default_manager.filter(
+                product__in=[product.pk for product in products]).delete()
+            IndexedAttributeValue._default_manager.bulk_create([
+                IndexedAttributeValue(product=product, code=code,
+                                      **{column: value})
+                for product in products
+                for code, column, value in self.get_values(product)])
+
+    def get_indexing_queryset(self):
+        """
+        Return the products to (re)build the index for, with their attribute
+        values prefetched
+        """
+        return Product._default_manager.with_attributes().order_by('pk')
+
+
+class ThumbnailGenerator(object):
+    """
+    Generates the thumbnails of product images for the options in
+    ``OSCAR_THUMBNAIL_GEOMETRIES`` ahead of time, so that rendering a page
+    doesn't have to resize images. Thumbnails that exist already are skipped,
+    so that runs are incremental.
+    """
+
+    def __init__(self, geometries=None, processes=None):
+        if geometries is None:
+            geometries = settings.OSCAR_THUMBNAIL_GEOMETRIES
+        self.geometries = geometries
+        self.processes = processes
+
+    def get_images(self, since=None):
+        """
+        Return the product images to generate thumbnails of, optionally only
+        those created since the passed time
+        """
+        images = ProductImage._default_manager.order_by('pk')
+        if since is not None:
+            images = images.filter(date_created__gte=since)
+        return images
+
+    def get_tasks(self, images):
+        for name in images.values_list('original', flat=True).iterator():
+            if not name:
+                continue
+            for options in self.geometries:
+                yield name, options
+
+    def generate(self, images=None):
+        """
+        Generate the missing thumbnails of the passed images, by default of
+        all product images. Returns the counts of ``generate_thumbnails``.
+        """
+        if images is None:
+            images = self.get_images()
+        return generate_thumbnails(self.get_tasks(images), self.processes)
@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.db.models.signals import post_save
 
+from oscar.core.deferred import deferred_receiver
 from oscar.core.loading import get_class, get_model
 
 AlertsDispatcher = get_class('customer.alerts.utils', 'AlertsDispatcher')
@@ -14,4 +15,4 @@ def send_product_alerts(sender, instance, created, **kwargs):
 
 if settings.OSCAR_EAGER_ALERTS:
     StockRecord = get_model('partner', 'StockRecord')
-    post_save.connect(send_product_alerts, sender=StockRecord)
+    deferred_receiver(post_save, sender=StockRecord)(send_product_alerts)
@@ -33,6 +33,8 @@ class DashboardConfig(OscarDashboardConfig):
         self.comms_app = apps.get_app_config('communications_dashboard')
         self.shipping_app = apps.get_app_config('shipping_dashboard')
 
+        from . import receivers  # noqa
+
     def get_urls(self):
         from django.contrib.auth import views as auth_views
 
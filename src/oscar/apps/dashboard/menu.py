@@ -1,25 +1,85 @@
+import hashlib
+
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
 from django.utils.module_loading import import_string
 
 from oscar.core.loading import get_class
 
 Node = get_class('dashboard.nav', 'Node')
 
+CACHE_KEY_PREFIX = 'oscar_dashboard_nav'
+VERSION_CACHE_KEY = 'oscar_dashboard_nav_version'
+
+_menu = {}
+
 
 def get_nodes(user):
     """
     Return the visible navigation nodes for the passed user
+
+    The unfiltered navigation tree is only built once per process. Which of
+    its nodes are visible is cached per permission set of the user, see
+    ``get_permission_key``.
     """
-    all_nodes = create_menu(settings.OSCAR_DASHBOARD_NAVIGATION)
-    visible_nodes = []
-    for node in all_nodes:
-        filtered_node = node.filter(user)
-        # don't append headings without children
-        if filtered_node and (filtered_node.has_children()
-                              or not filtered_node.is_heading):
-            visible_nodes.append(filtered_node)
-    return visible_nodes
+    all_nodes = get_menu()
+    timeout = settings.OSCAR_DASHBOARD_NAVIGATION_CACHE_TIMEOUT
+    if not timeout:
+        return _get_nodes_by_indexes(
+            all_nodes, _get_visible_indexes(all_nodes, user))
+
+    cache_key = get_cache_key(user)
+    indexes = cache.get(cache_key)
+    if indexes is None:
+        indexes = _get_visible_indexes(all_nodes, user)
+        cache.set(cache_key, indexes, timeout)
+    return _get_nodes_by_indexes(all_nodes, indexes)
+
+
+def get_menu():
+    """
+    Return the unfiltered navigation tree, creating it on first use
+    """
+    if 'nodes' not in _menu:
+        nodes = create_menu(settings.OSCAR_DASHBOARD_NAVIGATION)
+        _menu['fingerprint'] = _get_fingerprint(nodes)
+        _menu['nodes'] = nodes
+    return _menu['nodes']
+
+
+def get_permission_key(user):
+    """
+    Return the attributes of a user that determine which nodes are visible
+    for them: the user flags, the partners they belong to and the codes of
+    their permissions.
+    """
+    if not user.is_authenticated:
+        return ('anonymous',)
+    return (
+        user.is_active, user.is_staff, user.is_superuser,
+        tuple(sorted(user.partners.values_list('pk', flat=True))),
+        tuple(sorted(user.get_all_permissions())),
+    )
+
+
+def get_cache_key(user):
+    get_menu()
+    key = repr((_menu['fingerprint'], cache.get(VERSION_CACHE_KEY, 0),
+                get_permission_key(user)))
+    return '%s_%s' % (CACHE_KEY_PREFIX,
+                      hashlib.md5(key.encode('utf-8')).hexdigest())
+
+
+def invalidate_nodes_cache():
+    """
+    Invalidate the cached visible nodes of all users
+    """
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
 
 
 def create_menu(menu_items, parent=None):
@@ -52,3 +112,59 @@ def create_menu(menu_items, parent=None):
         else:
             parent.add_child(node)
     return nodes
+
+
+# Helpers
+
+def _get_fingerprint(nodes):
+    """
+    Identify the structure of the navigation tree, so that cached nodes of
+    processes with another navigation aren't used
+    """
+    def describe(node):
+        access_fn = node.access_fn
+        return (
+            node.url_name, node.url_args, node.url_kwargs,
+            getattr(access_fn, '__module__', None),
+            getattr(access_fn, '__qualname__', None),
+            [describe(child) for child in node.children])
+    key = repr([describe(node) for node in nodes])
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+def _get_visible_indexes(all_nodes, user):
+    # The visible nodes are stored as the positions of the nodes and of their
+    # visible children, which can be cached regardless of the access functions
+    indexes = []
+    for position, node in enumerate(all_nodes):
+        if not node.is_visible(user):
+            continue
+        children = [index for index, child in enumerate(node.children)
+                    if child.is_visible(user)]
+        # don't append headings without children
+        if children or not node.is_heading:
+            indexes.append((position, children))
+    return indexes
+
+
+def _get_nodes_by_indexes(all_nodes, indexes):
+    visible_nodes = []
+    for position, child_indexes in indexes:
+        node = all_nodes[position]
+        filtered_node = Node(
+            label=node.label, url_name=node.url_name, url_args=node.url_args,
+            url_kwargs=node.url_kwargs, access_fn=node.access_fn,
+            icon=node.icon)
+        for index in child_indexes:
+            filtered_node.add_child(node.children[index])
+        visible_nodes.append(filtered_node)
+    return visible_nodes
+
+
+def _reset_menu(setting, **kwargs):
+    if setting in ('OSCAR_DASHBOARD_NAVIGATION',
+                   'OSCAR_DASHBOARD_DEFAULT_ACCESS_FUNCTION'):
+        _menu.clear()
+
+
+setting_changed.connect(_reset_menu, dispatch_uid='oscar_dashboard_menu_reset')
@@ -1,12 +1,13 @@
 import datetime
+import io
 from decimal import Decimal as D
 from decimal import InvalidOperation
 
 from django.conf import settings
 from django.contrib import messages
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Count, Q, Sum, fields
-from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.db.models import Count, Q, QuerySet, Sum, fields
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
@@ -26,6 +27,7 @@ SourceType = get_model('payment', 'SourceType')
 Order = get_model('order', 'Order')
 OrderNote = get_model('order', 'OrderNote')
 ShippingAddress = get_model('order', 'ShippingAddress')
+OrderSearchTerm = get_model('order', 'OrderSearchTerm')
 Line = get_model('order', 'Line')
 ShippingEventType = get_model('order', 'ShippingEventType')
 PaymentEventType = get_model('order', 'PaymentEventType')
@@ -117,15 +119,18 @@ class OrderListView(BulkEditMixin, ListView):
     paginate_by = settings.OSCAR_DASHBOARD_ITEMS_PER_PAGE
     actions = ('download_selected_orders', 'change_order_statuses')
     CSV_COLUMNS = {
-        'number', _('Order number'),
-        'value', _('Order value'),
-        'date', _('Date of purchase'),
-        'num_items', _('Number of items'),
-        'status', _('Order status'),
-        'customer', _('Customer email address'),
-        'shipping_address_name', _('Deliver to name'),
-        'billing_address_name', _('Bill to name'),
+        'number': _('Order number'),
+        'value': _('Order value'),
+        'date': _('Date of purchase'),
+        'num_items': _('Number of items'),
+        'status': _('Order status'),
+        'customer': _('Customer email address'),
+        'shipping_address_name': _('Deliver to name'),
+        'billing_address_name': _('Bill to name'),
     }
+    # Number of orders fetched from the database (and written to the
+    # response) at a time when streaming a CSV download
+    csv_chunk_size = 2000
 
     def dispatch(self, request, *args, **kwargs):
         # base_queryset is equal to all orders the user is allowed to access
@@ -160,8 +165,39 @@ class OrderListView(BulkEditMixin, ListView):
 
         data = self.form.cleaned_data
 
+        if settings.OSCAR_ORDER_SEARCH_INDEX:
+            queryset = self.filter_by_search_index(queryset, data)
+        else:
+            queryset = self.filter_by_text_fields(queryset, data)
+
+        if data['date_from'] and data['date_to']:
+            date_to = datetime_combine(data['date_to'], datetime.time.max)
+            date_from = datetime_combine(data['date_from'], datetime.time.min)
+            queryset = queryset.filter(
+                date_placed__gte=date_from, date_placed__lt=date_to)
+        elif data['date_from']:
+            date_from = datetime_combine(data['date_from'], datetime.time.min)
+            queryset = queryset.filter(date_placed__gte=date_from)
+        elif data['date_to']:
+            date_to = datetime_combine(data['date_to'], datetime.time.max)
+            queryset = queryset.filter(date_placed__lt=date_to)
+
+        if data['payment_method']:
+            queryset = queryset.filter(
+                sources__source_type__code=data['payment_method']).distinct()
+
+        if data['status']:
+            queryset = queryset.filter(status=data['status'])
+
+        return queryset
+
+    def filter_by_text_fields(self, queryset, data):
+        """
+        Filter by the free-text fields of the search form by querying the
+        order's customer, addresses, lines and discounts directly.
+        """
         if data['order_number']:
-            queryset = self.base_queryset.filter(
+            queryset = queryset.filter(
                 number__istartswith=data['order_number'])
 
         if data['name']:
@@ -195,28 +231,70 @@ class OrderListView(BulkEditMixin, ListView):
         if data['partner_sku']:
             queryset = queryset.filter(lines__partner_sku=data['partner_sku'])
 
-        if data['date_from'] and data['date_to']:
-            date_to = datetime_combine(data['date_to'], datetime.time.max)
-            date_from = datetime_combine(data['date_from'], datetime.time.min)
-            queryset = queryset.filter(
-                date_placed__gte=date_from, date_placed__lt=date_to)
-        elif data['date_from']:
-            date_from = datetime_combine(data['date_from'], datetime.time.min)
-            queryset = queryset.filter(date_placed__gte=date_from)
-        elif data['date_to']:
-            date_to = datetime_combine(data['date_to'], datetime.time.max)
-            queryset = queryset.filter(date_placed__lt=date_to)
-
         if data['voucher']:
             queryset = queryset.filter(
                 discounts__voucher_code=data['voucher']).distinct()
 
-        if data['payment_method']:
-            queryset = queryset.filter(
-                sources__source_type__code=data['payment_method']).distinct()
+        return queryset
 
-        if data['status']:
-            queryset = queryset.filter(status=data['status'])
+    def filter_by_search_index(self, queryset, data):  # noqa (too complex (11))
+        """
+        Filter by the free-text fields of the search form using the
+        denormalised ``OrderSearchTerm`` index. Each field is an indexed
+        lookup on a single table, so no joins or DISTINCT are needed on the
+        orders queryset.
+        """
+        def matching_ids(field, value, prefix=False):
+            terms = OrderSearchTerm._default_manager.filter(field=field)
+            if prefix:
+                terms = terms.filter(value__startswith=value.lower())
+            else:
+                terms = terms.filter(value=value.lower())
+            return terms.values('order_id')
+
+        if data['order_number']:
+            queryset = queryset.filter(pk__in=matching_ids(
+                OrderSearchTerm.NUMBER, data['order_number'], prefix=True))
+
+        if data['name']:
+            # If the value is two words, then assume they are first name and
+            # last name
+            parts = data['name'].split()
+            if len(parts) == 1:
+                first_name = last_name = data['name']
+            else:
+                first_name, last_name = parts[0], ' '.join(parts[1:])
+            allow_anon = getattr(settings, 'OSCAR_ALLOW_ANON_CHECKOUT', False)
+
+            filter = Q(pk__in=matching_ids(
+                OrderSearchTerm.FIRST_NAME, first_name, prefix=True))
+            filter |= Q(pk__in=matching_ids(
+                OrderSearchTerm.LAST_NAME, last_name, prefix=True))
+            if allow_anon:
+                filter |= Q(pk__in=matching_ids(
+                    OrderSearchTerm.ADDRESS_FIRST_NAME, first_name,
+                    prefix=True))
+                filter |= Q(pk__in=matching_ids(
+                    OrderSearchTerm.ADDRESS_LAST_NAME, last_name,
+                    prefix=True))
+            queryset = queryset.filter(filter)
+
+        if data['product_title']:
+            queryset = queryset.filter(pk__in=matching_ids(
+                OrderSearchTerm.PRODUCT_TITLE, data['product_title'],
+                prefix=True))
+
+        if data['upc']:
+            queryset = queryset.filter(pk__in=matching_ids(
+                OrderSearchTerm.UPC, data['upc']))
+
+        if data['partner_sku']:
+            queryset = queryset.filter(pk__in=matching_ids(
+                OrderSearchTerm.PARTNER_SKU, data['partner_sku']))
+
+        if data['voucher']:
+            queryset = queryset.filter(pk__in=matching_ids(
+                OrderSearchTerm.VOUCHER, data['voucher']))
 
         return queryset
 
@@ -375,48 +453,80 @@ class OrderListView(BulkEditMixin, ListView):
             row['billing_address_name'] = order.billing_address.name
         return row
 
-    def download_selected_orders(self, request, orders):
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename=%s' \
-            % self.get_download_filename(request)
-        writer = UnicodeCSVWriter(open_file=response)
+    def get_download_queryset(self, orders):
+        """
+        Return a queryset of the orders to export.
+
+        ``orders`` is either a queryset (when downloading search results) or
+        a list of selected orders.
+        """
+        if not isinstance(orders, QuerySet):
+            orders = self.base_queryset.filter(
+                pk__in=[order.pk for order in orders])
+        # Prefetching is ignored when iterating in chunks, so drop it
+        return orders.prefetch_related(None)
 
+    def generate_csv(self, orders):
+        """
+        Yield the CSV export of the passed queryset in chunks, fetching the
+        orders through a server-side cursor where the database supports it.
+        """
+        buffer = io.StringIO()
+        writer = UnicodeCSVWriter(open_file=buffer)
         writer.writerow(self.CSV_COLUMNS.values())
-        for order in orders:
+        for index, order in enumerate(
+                orders.iterator(chunk_size=self.csv_chunk_size), 1):
             row_values = self.get_row_values(order)
             writer.writerow([row_values.get(column, "") for column in self.CSV_COLUMNS])
+            if index % self.csv_chunk_size == 0:
+                yield self._flush_buffer(buffer)
+        yield self._flush_buffer(buffer)
+
+    def _flush_buffer(self, buffer):
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    def download_selected_orders(self, request, orders):
+        response = StreamingHttpResponse(
+            self.generate_csv(self.get_download_queryset(orders)),
+            content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename=%s' \
+            % self.get_download_filename(request)
         return response
 
     def change_order_statuses(self, request, orders):
-        for order in orders:
-            self.change_order_status(request, order)
-        return redirect('dashboard:order-list')
-
-    def change_order_status(self, request, order):
-        # This method is pretty similar to what
-        # OrderDetailView.change_order_status does. Ripe for refactoring.
         new_status = request.POST['new_status'].strip()
         if not new_status:
             messages.error(request, _("The new status '%s' is not valid")
                            % new_status)
-        elif new_status not in order.available_statuses():
-            messages.error(request, _("The new status '%s' is not valid for"
-                                      " this order") % new_status)
-        else:
-            handler = EventHandler(request.user)
-            old_status = order.status
-            try:
-                handler.handle_order_status_change(order, new_status)
-            except PaymentError as e:
-                messages.error(request, _("Unable to change order status due"
-                                          " to payment error: %s") % e)
-            else:
-                msg = _("Order status changed from '%(old_status)s' to"
-                        " '%(new_status)s'") % {'old_status': old_status,
-                                                'new_status': new_status}
-                messages.info(request, msg)
-                order.notes.create(
-                    user=request.user, message=msg, note_type=OrderNote.SYSTEM)
+            return redirect('dashboard:order-list')
+
+        handler = EventHandler(request.user)
+        status_changes, invalid_orders = \
+            handler.handle_bulk_order_status_change(orders, new_status)
+        for order in invalid_orders:
+            messages.error(request, _("The new status '%(status)s' is not"
+                                      " valid for order %(number)s")
+                           % {'status': new_status, 'number': order.number})
+
+        notes, num_changed = [], {}
+        for change in status_changes:
+            msg = _("Order status changed from '%(old_status)s' to"
+                    " '%(new_status)s'") % {'old_status': change.old_status,
+                                            'new_status': new_status}
+            notes.append((change.order_id, msg))
+            num_changed[change.old_status] = num_changed.get(
+                change.old_status, 0) + 1
+        handler.create_notes(notes, note_type=OrderNote.SYSTEM)
+        for old_status, count in num_changed.items():
+            messages.info(request, _("Status of %(count)d order(s) changed"
+                                     " from '%(old_status)s' to"
+                                     " '%(new_status)s'")
+                          % {'count': count, 'old_status': old_status,
+                             'new_status': new_status})
+        return redirect('dashboard:order-list')
 
 
 class OrderDetailView(DetailView):
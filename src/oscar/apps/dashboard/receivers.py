@@ -0,0 +1,24 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+
+from oscar.core.compat import get_user_model
+from oscar.core.loading import get_class, get_model
+
+Partner = get_model('partner', 'Partner')
+User = get_user_model()
+
+invalidate_nodes_cache = get_class('dashboard.menu', 'invalidate_nodes_cache')
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Partner.users.through)
+@receiver(post_delete, sender=Group)
+def receive_permission_change(sender, **kwargs):
+    """
+    Invalidate the cached dashboard navigation when permissions change
+    """
+    if kwargs.get('action', 'post_delete').startswith('post_'):
+        invalidate_nodes_cache()
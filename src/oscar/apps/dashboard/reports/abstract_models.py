@@ -0,0 +1,95 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import DefaultStorage
+from django.db import models
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+
+from oscar.core.compat import AUTH_USER_MODEL
+
+
+def get_report_storage():
+    """
+    Return the storage report files are saved to (see
+    ``OSCAR_REPORTS_STORAGE``)
+    """
+    if settings.OSCAR_REPORTS_STORAGE is None:
+        # A separate instance, so that the field's migration doesn't depend
+        # on the setting
+        return DefaultStorage()
+    return import_string(settings.OSCAR_REPORTS_STORAGE)()
+
+
+def get_report_upload_path(instance, filename):
+    # Reports can contain personal data, so the path mustn't be guessable
+    return os.path.join(settings.OSCAR_REPORTS_FOLDER, uuid.uuid4().hex,
+                        filename)
+
+
+class AbstractReportJob(models.Model):
+    """
+    A report generated in the background, and the file it was written to
+    """
+    PENDING, RUNNING, COMPLETE, FAILED = (
+        'Pending', 'Running', 'Complete', 'Failed')
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (RUNNING, _('Running')),
+        (COMPLETE, _('Complete')),
+        (FAILED, _('Failed')),
+    )
+
+    user = models.ForeignKey(
+        AUTH_USER_MODEL, related_name='report_jobs', null=True, blank=True,
+        on_delete=models.SET_NULL, verbose_name=_("User"))
+    report_type = models.CharField(_("Report type"), max_length=128)
+    date_from = models.DateField(_("Date from"), null=True, blank=True)
+    date_to = models.DateField(_("Date to"), null=True, blank=True)
+    status = models.CharField(
+        _("Status"), max_length=32, choices=STATUS_CHOICES, default=PENDING)
+
+    # Progress of the generation
+    num_rows = models.PositiveIntegerField(_("Rows written"), default=0)
+    total_rows = models.PositiveIntegerField(
+        _("Total rows"), null=True, blank=True)
+
+    file = models.FileField(
+        _("File"), upload_to=get_report_upload_path,
+        storage=get_report_storage, max_length=255, blank=True)
+    error = models.TextField(_("Error"), blank=True)
+    date_created = models.DateTimeField(
+        _("Date created"), auto_now_add=True, db_index=True)
+    date_finished = models.DateTimeField(
+        _("Date finished"), null=True, blank=True)
+
+    class Meta:
+        abstract = True
+        app_label = 'reports_dashboard'
+        ordering = ['-date_created']
+        verbose_name = _('Report job')
+        verbose_name_plural = _('Report jobs')
+
+    def __str__(self):
+        return _("%(report_type)s report #%(id)s") % {
+            'report_type': self.report_type, 'id': self.pk}
+
+    @property
+    def is_finished(self):
+        return self.status in (self.COMPLETE, self.FAILED)
+
+    @property
+    def progress(self):
+        """
+        Return the percentage of rows written, if known
+        """
+        if self.status == self.COMPLETE:
+            return 100
+        if not self.total_rows:
+            return None
+        return min(100, self.num_rows * 100 // self.total_rows)
+
+    @property
+    def filename(self):
+        return os.path.basename(self.file.name)
@@ -13,10 +13,19 @@ class ReportsDashboardConfig(OscarDashboardConfig):
     default_permissions = ['is_staff', ]
 
     def ready(self):
+        from . import receivers  # noqa
+
         self.index_view = get_class('dashboard.reports.views', 'IndexView')
+        self.job_list_view = get_class('dashboard.reports.views',
+                                       'ReportJobListView')
+        self.job_download_view = get_class('dashboard.reports.views',
+                                           'ReportJobDownloadView')
 
     def get_urls(self):
         urls = [
             path('', self.index_view.as_view(), name='reports-index'),
+            path('jobs/', self.job_list_view.as_view(), name='reports-jobs'),
+            path('jobs/<int:pk>/download/', self.job_download_view.as_view(),
+                 name='reports-job-download'),
         ]
         return self.post_process_urls(urls)
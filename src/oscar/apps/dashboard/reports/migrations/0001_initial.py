@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import oscar.apps.dashboard.reports.abstract_models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_type', models.CharField(max_length=128, verbose_name='Report type')),
+                ('date_from', models.DateField(blank=True, null=True, verbose_name='Date from')),
+                ('date_to', models.DateField(blank=True, null=True, verbose_name='Date to')),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Running', 'Running'), ('Complete', 'Complete'), ('Failed', 'Failed')], default='Pending', max_length=32, verbose_name='Status')),
+                ('num_rows', models.PositiveIntegerField(default=0, verbose_name='Rows written')),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True, verbose_name='Total rows')),
+                ('file', models.FileField(blank=True, max_length=255, upload_to=oscar.apps.dashboard.reports.abstract_models.get_report_upload_path, verbose_name='File')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('date_created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Date created')),
+                ('date_finished', models.DateTimeField(blank=True, null=True, verbose_name='Date finished')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_jobs', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Report job',
+                'verbose_name_plural': 'Report jobs',
+                'ordering': ['-date_created'],
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:29
+
+from django.db import migrations, models
+import oscar.apps.dashboard.reports.abstract_models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports_dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportjob',
+            name='file',
+            field=models.FileField(blank=True, max_length=255, storage=oscar.apps.dashboard.reports.abstract_models.get_report_storage, upload_to=oscar.apps.dashboard.reports.abstract_models.get_report_upload_path, verbose_name='File'),
+        ),
+    ]
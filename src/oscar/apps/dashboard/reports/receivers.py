@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from oscar.core.loading import get_model
+
+ReportJob = get_model('reports_dashboard', 'ReportJob')
+
+
+@receiver(post_delete, sender=ReportJob)
+def delete_report_file(sender, instance, **kwargs):
+    """
+    Delete the file of a report job along with the job
+    """
+    if instance.file:
+        instance.file.delete(save=False)
@@ -1,5 +1,6 @@
 from datetime import time
 
+from django.db.models import QuerySet
 from django.http import HttpResponse
 from django.template.defaultfilters import date
 from django.utils.translation import gettext_lazy as _
@@ -109,17 +110,62 @@ class ReportFormatter(object):
 
 
 class ReportCSVFormatter(ReportFormatter):
+    #: When set, the report is written into this file instead of a response,
+    #: see ``ReportJobRunner``
+    output_file = None
+    output_filename = None
+    #: Number of objects fetched from the database at a time when writing
+    #: into ``output_file``
+    chunk_size = 2000
+    #: Called with the number of rows written and the total number of rows
+    progress_callback = None
 
     def get_csv_writer(self, file_handle, **kwargs):
         return UnicodeCSVWriter(open_file=file_handle, **kwargs)
 
     def generate_response(self, objects, **kwargs):
+        if self.output_file is not None:
+            self.output_filename = self.filename(**kwargs)
+            self.generate_csv(self.output_file, self.iterate(objects))
+            return self.output_file
+
         response = HttpResponse(content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename=%s' \
             % self.filename(**kwargs)
         self.generate_csv(response, objects)
         return response
 
+    def iterate(self, objects):
+        """
+        Iterate over the objects of a report in chunks, rather than loading
+        them all at once, and report the progress
+        """
+        if not isinstance(objects, QuerySet):
+            yield from objects
+            return
+
+        total = objects.count()
+        self.report_progress(0, total)
+        if objects._prefetch_related_lookups:
+            # iterator() ignores prefetch_related()
+            chunks = (objects[start:start + self.chunk_size]
+                      for start in range(0, total, self.chunk_size))
+        else:
+            chunks = [objects.iterator(chunk_size=self.chunk_size)]
+
+        num_rows = 0
+        for chunk in chunks:
+            for obj in chunk:
+                yield obj
+                num_rows += 1
+                if num_rows % self.chunk_size == 0:
+                    self.report_progress(num_rows, total)
+        self.report_progress(num_rows, total)
+
+    def report_progress(self, num_rows, total):
+        if self.progress_callback is not None:
+            self.progress_callback(num_rows, total)
+
 
 class ReportHTMLFormatter(ReportFormatter):
 
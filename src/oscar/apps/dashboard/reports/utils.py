@@ -1,4 +1,19 @@
-from oscar.core.loading import get_class, get_classes
+import functools
+import io
+import logging
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from oscar.core.deferred import Task, get_backend
+from oscar.core.loading import get_class, get_classes, get_model
+
+logger = logging.getLogger('oscar.reports')
+
+ReportJob = get_model('reports_dashboard', 'ReportJob')
 
 OrderReportGenerator = get_class('order.reports', 'OrderReportGenerator')
 ProductReportGenerator, UserReportGenerator \
@@ -29,3 +44,74 @@ class GeneratorRepository(object):
             if generator.code == code:
                 return generator
         return None
+
+
+class ReportJobRunner(object):
+    """
+    Generates the CSV files of reports outside of the request/response cycle,
+    using the backend configured with ``OSCAR_REPORTS_BACKEND``.
+
+    The rows are written into a temporary file, fetching the objects from the
+    database in chunks and recording the progress on the job, and the file is
+    then stored with the storage of ``ReportJob.file``. This works with any
+    generator whose CSV formatter is a ``ReportCSVFormatter``.
+    """
+    generator_repository = GeneratorRepository
+
+    def create_job(self, user, report_type, date_from=None, date_to=None):
+        job = ReportJob._default_manager.create(
+            user=user, report_type=report_type, date_from=date_from,
+            date_to=date_to)
+        self.schedule(job)
+        return job
+
+    def schedule(self, job):
+        backend = get_backend(settings.OSCAR_REPORTS_BACKEND)
+        # The job's progress must be visible while the report is generated
+        task = Task(self.run, (job.pk,), atomic=False)
+        # Make sure the worker sees the job
+        transaction.on_commit(functools.partial(backend.enqueue, task))
+
+    def run(self, job_id):
+        job = ReportJob._default_manager.get(pk=job_id)
+        self.update_job(job, status=ReportJob.RUNNING)
+        try:
+            self.generate(job)
+        except Exception as e:
+            logger.exception("Generating report job %s failed", job.pk)
+            self.update_job(job, status=ReportJob.FAILED, error=str(e),
+                            date_finished=timezone.now())
+        else:
+            job.status = ReportJob.COMPLETE
+            job.date_finished = timezone.now()
+            job.save()
+        return job
+
+    def generate(self, job):
+        generator_cls = self.generator_repository().get_generator(
+            job.report_type)
+        if generator_cls is None:
+            raise ValueError("Unknown report type '%s'" % job.report_type)
+        generator = generator_cls(start_date=job.date_from,
+                                  end_date=job.date_to, formatter='CSV')
+        formatter = generator.formatter
+        formatter.chunk_size = settings.OSCAR_REPORTS_CHUNK_SIZE
+        formatter.progress_callback = functools.partial(
+            self.update_progress, job)
+
+        with tempfile.TemporaryFile() as output:
+            text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+            formatter.output_file = text
+            generator.generate()
+            text.flush()
+            text.detach()
+            output.seek(0)
+            job.file.save(formatter.output_filename, File(output), save=False)
+
+    def update_progress(self, job, num_rows, total):
+        self.update_job(job, num_rows=num_rows, total_rows=total)
+
+    def update_job(self, job, **fields):
+        for name, value in fields.items():
+            setattr(job, name, value)
+        ReportJob._default_manager.filter(pk=job.pk).update(**fields)
@@ -1,14 +1,17 @@
 from django.conf import settings
-from django.http import Http404, HttpResponseForbidden
+from django.contrib import messages
+from django.http import FileResponse, Http404, HttpResponseForbidden
+from django.shortcuts import get_object_or_404, redirect
 from django.template.response import TemplateResponse
 from django.utils.translation import gettext_lazy as _
-from django.views.generic import ListView
+from django.views.generic import ListView, View
 
-from oscar.core.loading import get_class
+from oscar.core.loading import get_class, get_classes, get_model
 
 ReportForm = get_class('dashboard.reports.forms', 'ReportForm')
-GeneratorRepository = get_class('dashboard.reports.utils',
-                                'GeneratorRepository')
+GeneratorRepository, ReportJobRunner = get_classes(
+    'dashboard.reports.utils', ['GeneratorRepository', 'ReportJobRunner'])
+ReportJob = get_model('reports_dashboard', 'ReportJob')
 
 
 class IndexView(ListView):
@@ -17,6 +20,7 @@ class IndexView(ListView):
     context_object_name = 'objects'
     report_form_class = ReportForm
     generator_repository = GeneratorRepository
+    job_runner = ReportJobRunner
 
     def _get_generator(self, form):
         code = form.cleaned_data['report_type']
@@ -42,6 +46,10 @@ class IndexView(ListView):
                     return HttpResponseForbidden(_("You do not have access to"
                                                    " this report"))
 
+                if (form.cleaned_data['download']
+                        and settings.OSCAR_REPORTS_IN_BACKGROUND):
+                    return self.generate_in_background(form)
+
                 report = generator.generate()
 
                 if form.cleaned_data['download']:
@@ -52,7 +60,44 @@ class IndexView(ListView):
                     context = self.get_context_data(object_list=self.queryset)
                     context['form'] = form
                     context['description'] = generator.report_description()
+                    context['background_reports'] = settings.OSCAR_REPORTS_IN_BACKGROUND
                     return self.render_to_response(context)
         else:
             form = self.report_form_class()
-        return TemplateResponse(request, self.template_name, {'form': form})
+        return TemplateResponse(request, self.template_name, {
+            'form': form,
+            'background_reports': settings.OSCAR_REPORTS_IN_BACKGROUND})
+
+    def generate_in_background(self, form):
+        self.job_runner().create_job(
+            self.request.user, form.cleaned_data['report_type'],
+            date_from=form.cleaned_data['date_from'],
+            date_to=form.cleaned_data['date_to'])
+        messages.info(self.request, _("The report is being generated. It can"
+                                      " be downloaded once it is complete."))
+        return redirect('dashboard:reports-jobs')
+
+
+class ReportJobListView(ListView):
+    """
+    Lists the reports generated in the background for the current user
+    """
+    template_name = 'oscar/dashboard/reports/job_list.html'
+    paginate_by = settings.OSCAR_DASHBOARD_ITEMS_PER_PAGE
+    context_object_name = 'jobs'
+
+    def get_queryset(self):
+        return ReportJob._default_manager.filter(user=self.request.user)
+
+
+class ReportJobDownloadView(View):
+    """
+    Serves the file of a completed report job of the current user
+    """
+
+    def get(self, request, *args, **kwargs):
+        job = get_object_or_404(
+            ReportJob, pk=kwargs['pk'], user=request.user,
+            status=ReportJob.COMPLETE)
+        return FileResponse(job.file.open('rb'), as_attachment=True,
+                            filename=job.filename, content_type='text/csv')
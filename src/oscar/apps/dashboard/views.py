@@ -3,6 +3,7 @@ from datetime import timedelta
 from decimal import ROUND_UP
 from decimal import Decimal as D
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.forms import AuthenticationForm
@@ -14,8 +15,10 @@ from django.views.generic import TemplateView
 
 from oscar.core.compat import get_user_model
 from oscar.core.loading import get_class, get_model
+from oscar.core.utils import time_series
 
 RelatedFieldWidgetWrapper = get_class('dashboard.widgets', 'RelatedFieldWidgetWrapper')
+OrderStatsRollups = get_class('analytics.rollups', 'OrderStatsRollups')
 ConditionalOffer = get_model('offer', 'ConditionalOffer')
 Voucher = get_model('voucher', 'Voucher')
 Basket = get_model('basket', 'Basket')
@@ -23,6 +26,7 @@ StockAlert = get_model('partner', 'StockAlert')
 Product = get_model('catalogue', 'Product')
 Order = get_model('order', 'Order')
 Line = get_model('order', 'Line')
+OrderStatsRollup = get_model('analytics', 'OrderStatsRollup')
 User = get_user_model()
 
 
@@ -53,7 +57,8 @@ class IndexView(TemplateView):
         """
         return Voucher.objects.filter(end_datetime__gt=now())
 
-    def get_hourly_report(self, orders, hours=24, segments=10):
+    def get_hourly_report(self, orders, hours=24, segments=10,
+                          date_field='date_placed', total_field='total_incl_tax'):
         """
         Get report of order revenue split up in hourly chunks. A report is
         generated for the last *hours* (default=24) from the current time.
@@ -62,24 +67,25 @@ class IndexView(TemplateView):
         ``order_total_hourly``, a list of properties for hourly chunks.
         *segments* defines the number of labelling segments used for the y-axis
         when generating the y-axis labels (default=10).
+
+        *orders* can also be a queryset of statistics rollups, in which case
+        *date_field* and *total_field* name its time and revenue fields.
         """
         # Get datetime for 24 hours ago
-        time_now = now().replace(minute=0, second=0)
+        time_now = now().replace(minute=0, second=0, microsecond=0)
         start_time = time_now - timedelta(hours=hours - 1)
 
+        series = time_series(
+            orders, date_field, 'hour', start_time,
+            start_time + timedelta(hours=hours), total=Sum(total_field))
         order_total_hourly = []
-        for hour in range(0, hours, 2):
-            end_time = start_time + timedelta(hours=2)
-            hourly_orders = orders.filter(date_placed__gte=start_time,
-                                          date_placed__lt=end_time)
-            total = hourly_orders.aggregate(
-                Sum('total_incl_tax')
-            )['total_incl_tax__sum'] or D('0.0')
+        for i in range(0, hours, 2):
+            chunk = series[i:i + 2]
             order_total_hourly.append({
-                'end_time': end_time,
-                'total_incl_tax': total
+                'end_time': chunk[-1]['end'],
+                'total_incl_tax': sum(
+                    (item['total'] or D('0.0') for item in chunk), D('0.0')),
             })
-            start_time = end_time
 
         max_value = max([x['total_incl_tax'] for x in order_total_hourly])
         divisor = 1
@@ -108,6 +114,53 @@ class IndexView(TemplateView):
         }
         return ctx
 
+    def get_stats_partner_key(self, partner_ids):
+        """
+        Return the partner key of the statistics rollups to read the order
+        statistics from, or ``None`` to calculate them from the orders.
+
+        Rollups are only used for staff and for users of a single partner, as
+        the statistics of several partners can't be combined without counting
+        orders twice.
+        """
+        if not settings.OSCAR_ANALYTICS_ORDER_STATS_ROLLUPS:
+            return None
+        if partner_ids is None:
+            return 0
+        if len(partner_ids) == 1:
+            return partner_ids[0]
+        return None
+
+    def get_order_stats(self, orders, lines, customers, since):
+        orders_last_day = orders.filter(date_placed__gt=since)
+        return {
+            'total_orders_last_day': orders_last_day.count(),
+            'total_lines_last_day': lines.filter(order__in=orders_last_day).count(),
+
+            'average_order_costs': orders_last_day.aggregate(
+                Avg('total_incl_tax')
+            )['total_incl_tax__avg'] or D('0.00'),
+
+            'total_revenue_last_day': orders_last_day.aggregate(
+                Sum('total_incl_tax')
+            )['total_incl_tax__sum'] or D('0.00'),
+
+            'total_customers_last_day': customers.filter(
+                date_joined__gt=since,
+            ).count(),
+
+            'total_customers': customers.count(),
+            'total_orders': orders.count(),
+            'total_lines': lines.count(),
+            'total_revenue': orders.aggregate(
+                Sum('total_incl_tax')
+            )['total_incl_tax__sum'] or D('0.00'),
+
+            'order_status_breakdown': orders.order_by(
+                'status'
+            ).values('status').annotate(freq=Count('id'))
+        }
+
     def get_stats(self):
         datetime_24hrs_ago = now() - timedelta(hours=24)
 
@@ -119,6 +172,7 @@ class IndexView(TemplateView):
         products = Product.objects.all()
 
         user = self.request.user
+        partners_ids = None
         if not user.is_staff:
             partners_ids = tuple(user.partners.values_list('id', flat=True))
             orders = orders.filter(
@@ -134,29 +188,10 @@ class IndexView(TemplateView):
             lines = lines.filter(partner_id__in=partners_ids)
             products = products.filter(stockrecords__partner_id__in=partners_ids)
 
-        orders_last_day = orders.filter(date_placed__gt=datetime_24hrs_ago)
-
         open_alerts = alerts.filter(status=StockAlert.OPEN)
         closed_alerts = alerts.filter(status=StockAlert.CLOSED)
 
-        total_lines_last_day = lines.filter(order__in=orders_last_day).count()
         stats = {
-            'total_orders_last_day': orders_last_day.count(),
-            'total_lines_last_day': total_lines_last_day,
-
-            'average_order_costs': orders_last_day.aggregate(
-                Avg('total_incl_tax')
-            )['total_incl_tax__avg'] or D('0.00'),
-
-            'total_revenue_last_day': orders_last_day.aggregate(
-                Sum('total_incl_tax')
-            )['total_incl_tax__sum'] or D('0.00'),
-
-            'hourly_report_dict': self.get_hourly_report(orders),
-            'total_customers_last_day': customers.filter(
-                date_joined__gt=datetime_24hrs_ago,
-            ).count(),
-
             'total_open_baskets_last_day': baskets.filter(
                 date_created__gt=datetime_24hrs_ago
             ).count(),
@@ -164,19 +199,21 @@ class IndexView(TemplateView):
             'total_products': products.count(),
             'total_open_stock_alerts': open_alerts.count(),
             'total_closed_stock_alerts': closed_alerts.count(),
-
-            'total_customers': customers.count(),
             'total_open_baskets': baskets.count(),
-            'total_orders': orders.count(),
-            'total_lines': lines.count(),
-            'total_revenue': orders.aggregate(
-                Sum('total_incl_tax')
-            )['total_incl_tax__sum'] or D('0.00'),
-
-            'order_status_breakdown': orders.order_by(
-                'status'
-            ).values('status').annotate(freq=Count('id'))
         }
+
+        partner_key = self.get_stats_partner_key(partners_ids)
+        if partner_key is None:
+            stats.update(self.get_order_stats(
+                orders, lines, customers, datetime_24hrs_ago))
+            stats['hourly_report_dict'] = self.get_hourly_report(orders)
+        else:
+            stats.update(OrderStatsRollups().get_stats(
+                partner_key, datetime_24hrs_ago))
+            stats['hourly_report_dict'] = self.get_hourly_report(
+                OrderStatsRollup.objects.filter(partner_key=partner_key),
+                date_field='period_start', total_field='total_revenue')
+
         if user.is_staff:
             stats.update(
                 offer_maps=(ConditionalOffer.objects.filter(end_datetime__gt=now())
@@ -6,6 +6,7 @@ from decimal import Decimal as D
 from django.conf import settings
 from django.core import exceptions
 from django.db import models
+from django.db.models import F
 from django.db.models.query import Q
 from django.template.defaultfilters import date as date_filter
 from django.urls import reverse
@@ -350,10 +351,25 @@ class AbstractConditionalOffer(models.Model):
         return self.benefit.proxy().shipping_discount(charge, currency)
 
     def record_usage(self, discount):
-        self.num_applications += discount['freq']
-        self.total_discount += discount['discount']
-        self.num_orders += 1
-        self.save()
+        """
+        Record a usage of this offer in an order.
+
+        The counters are incremented in a single UPDATE statement, so that
+        concurrent orders don't overwrite each other's usage.
+        """
+        counters = ['num_applications', 'total_discount', 'num_orders']
+        self.__class__._default_manager.filter(pk=self.pk).update(
+            num_applications=F('num_applications') + discount['freq'],
+            total_discount=F('total_discount') + discount['discount'],
+            num_orders=F('num_orders') + 1)
+        self.refresh_from_db(fields=counters)
+
+        # Check to see if consumption thresholds have been broken
+        status = self.status
+        if not self.is_suspended:
+            status = self.CONSUMED if self.get_max_applications() == 0 else self.OPEN
+        if status != self.status:
+            self.save(update_fields=['status'])
     record_usage.alters_data = True
 
     def availability_description(self):
@@ -3,8 +3,8 @@ from decimal import Decimal as D
 
 from django.conf import settings
 from django.core.signing import BadSignature, Signer
-from django.db import models
-from django.db.models import Sum
+from django.db import models, transaction
+from django.db.models import Count, F, Sum
 from django.utils import timezone
 from django.utils.crypto import constant_time_compare
 from django.utils.timezone import now
@@ -12,7 +12,7 @@ from django.utils.translation import gettext_lazy as _
 from django.utils.translation import pgettext_lazy
 
 from oscar.apps.order.signals import (
-    order_line_status_changed, order_status_changed)
+    order_line_status_changed, order_status_changed, order_statuses_changed)
 from oscar.core.compat import AUTH_USER_MODEL
 from oscar.core.loading import get_model
 from oscar.core.utils import get_default_currency
@@ -23,7 +23,34 @@ from . import exceptions
 logger = logging.getLogger('oscar.order')
 
 
-class AbstractOrder(models.Model):
+class SearchIndexValuesMixin(object):
+    """
+    Remembers the values of the ``search_index_fields`` of a model instance
+    when it's loaded, so that saving it only rebuilds the order search terms
+    (see ``OSCAR_ORDER_SEARCH_INDEX``) when one of them changed
+    """
+    search_index_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.mark_search_index_values()
+        return instance
+
+    def get_search_index_values(self):
+        # Deferred fields are treated as unknown rather than fetched
+        return tuple(self.__dict__.get(name)
+                     for name in self.search_index_fields)
+
+    def mark_search_index_values(self):
+        self._search_index_values = self.get_search_index_values()
+
+    def have_search_index_values_changed(self):
+        return (getattr(self, '_search_index_values', None)
+                != self.get_search_index_values())
+
+
+class AbstractOrder(SearchIndexValuesMixin, models.Model):
     """
     The main order model
     """
@@ -88,6 +115,11 @@ class AbstractOrder(models.Model):
     # Index added to this field for reporting
     date_placed = models.DateTimeField(db_index=True)
 
+    # Denormalised from the lines so that order lists don't need to query
+    # the lines of each order
+    num_lines = models.PositiveIntegerField(_("Number of lines"), default=0)
+    num_items = models.PositiveIntegerField(_("Number of items"), default=0)
+
     #: Order status pipeline.  This should be a dict where each (key, value) #:
     #: corresponds to a status and a list of possible statuses that can follow
     #: that one.
@@ -149,6 +181,66 @@ class AbstractOrder(models.Model):
 
     set_status.alters_data = True
 
+    @classmethod
+    def bulk_set_status(cls, orders, new_status):
+        """
+        Set a new status for many orders at once.
+
+        Transitions are validated against the pipeline in memory, rows are
+        updated with one query per old status and the status change records
+        are bulk created. A single ``order_statuses_changed`` signal is sent
+        instead of an ``order_status_changed`` signal per order.
+
+        Returns a tuple of the created status changes and the orders whose
+        status could not be changed to ``new_status``. Orders that already
+        have the new status are left untouched. ``orders`` may contain order
+        instances or primary keys.
+        """
+        OrderStatusChange = get_model('order', 'OrderStatusChange')
+        Line = get_model('order', 'Line')
+        orders = list(orders)
+        order_ids = [getattr(order, 'pk', order) for order in orders]
+        with transaction.atomic():
+            locked_orders = cls._default_manager.select_for_update().filter(
+                pk__in=order_ids).only('pk', 'number', 'status')
+            groups, invalid_orders = {}, []
+            for order in locked_orders:
+                if order.status == new_status:
+                    continue
+                if new_status not in order.available_statuses():
+                    invalid_orders.append(order)
+                    continue
+                groups.setdefault(order.status, []).append(order.pk)
+
+            status_changes = []
+            for old_status, ids in groups.items():
+                cls._default_manager.filter(pk__in=ids).update(
+                    status=new_status)
+                status_changes.extend(
+                    OrderStatusChange(
+                        order_id=order_id, old_status=old_status,
+                        new_status=new_status)
+                    for order_id in ids)
+            if new_status in cls.cascade and groups:
+                Line._default_manager.filter(
+                    order_id__in=[change.order_id for change in status_changes]
+                ).update(status=cls.cascade[new_status])
+            status_changes = OrderStatusChange._default_manager.bulk_create(
+                status_changes)
+
+        # Keep any passed instances in sync with the database
+        changed_ids = {change.order_id for change in status_changes}
+        for order in orders:
+            if getattr(order, 'pk', None) in changed_ids:
+                order.status = new_status
+
+        if status_changes:
+            order_statuses_changed.send(sender=cls,
+                                        status_changes=status_changes,
+                                        new_status=new_status,
+                                        )
+        return status_changes, invalid_orders
+
     def _create_order_status_change(self, old_status, new_status):
         # Not setting the status on the order as that should be handled before
         self.status_changes.create(old_status=old_status, new_status=new_status)
@@ -229,19 +321,33 @@ class AbstractOrder(models.Model):
     def surcharge_incl_tax(self):
         return sum(charge.incl_tax for charge in self.surcharges.all())
 
-    @property
-    def num_lines(self):
-        return self.lines.count()
+    def update_line_counts(self):
+        """
+        Recalculate the denormalised number of lines and items of this order
+        from its lines.
+        """
+        counts = self.lines.aggregate(
+            num_lines=Count('id'), num_items=Sum('quantity'))
+        self.num_lines = counts['num_lines']
+        self.num_items = counts['num_items'] or 0
+        self.__class__._default_manager.filter(pk=self.pk).update(
+            num_lines=self.num_lines, num_items=self.num_items)
 
-    @property
-    def num_items(self):
+    update_line_counts.alters_data = True
+
+    def add_to_line_counts(self, num_items, num_lines=1):
         """
-        Returns the number of items in this order.
+        Add ``num_lines`` lines of ``num_items`` items in total to the
+        denormalised number of lines and items of this order. Pass negative
+        numbers for removed lines.
         """
-        num_items = 0
-        for line in self.lines.all():
-            num_items += line.quantity
-        return num_items
+        self.__class__._default_manager.filter(pk=self.pk).update(
+            num_lines=F('num_lines') + num_lines,
+            num_items=F('num_items') + num_items)
+        self.num_lines += num_lines
+        self.num_items += num_items
+
+    add_to_line_counts.alters_data = True
 
     @property
     def shipping_tax(self):
@@ -353,6 +459,11 @@ class AbstractOrder(models.Model):
         if self.date_placed is None:
             self.date_placed = now()
 
+    #: The fields the search terms of an order are built from, besides its
+    #: lines and discounts (see ``OSCAR_ORDER_SEARCH_INDEX``)
+    search_index_fields = (
+        'number', 'user_id', 'shipping_address_id', 'billing_address_id')
+
     def save(self, *args, **kwargs):
         # Ensure the date_placed field works as it auto_now_add was set. But
         # this gives us the ability to set the date_placed explicitly (which is
@@ -433,6 +544,57 @@ class AbstractOrderStatusChange(models.Model):
             % {'order': self.order, 'old_status': self.old_status, 'new_status': self.new_status, }
 
 
+class AbstractOrderSearchTerm(models.Model):
+    """
+    A lower-cased value that an order can be searched by in the dashboard.
+
+    Terms are denormalised from the order, its customer, addresses, lines and
+    discounts so that searching orders only needs an indexed lookup on this
+    table rather than joins across all of those.
+    """
+    NUMBER, FIRST_NAME, LAST_NAME = 'number', 'first_name', 'last_name'
+    ADDRESS_FIRST_NAME, ADDRESS_LAST_NAME = (
+        'address_first_name', 'address_last_name')
+    PRODUCT_TITLE, UPC, PARTNER_SKU, VOUCHER = (
+        'product_title', 'upc', 'partner_sku', 'voucher')
+    FIELD_CHOICES = (
+        (NUMBER, _("Order number")),
+        (FIRST_NAME, _("Customer first name")),
+        (LAST_NAME, _("Customer last name")),
+        (ADDRESS_FIRST_NAME, _("Address first name")),
+        (ADDRESS_LAST_NAME, _("Address last name")),
+        (PRODUCT_TITLE, _("Product title")),
+        (UPC, _("UPC")),
+        (PARTNER_SKU, _("Partner SKU")),
+        (VOUCHER, _("Voucher code")),
+    )
+
+    order = models.ForeignKey(
+        'order.Order',
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name=_("Order"))
+    field = models.CharField(_("Field"), max_length=32, choices=FIELD_CHOICES)
+    value = models.CharField(_("Value"), max_length=255)
+
+    class Meta:
+        abstract = True
+        app_label = 'order'
+        indexes = [
+            # The pattern operator class lets PostgreSQL use the index for
+            # prefix searches; other backends ignore it
+            models.Index(fields=['field', 'value'],
+                         name='order_search_field_value',
+                         opclasses=['varchar_pattern_ops',
+                                    'varchar_pattern_ops']),
+        ]
+        verbose_name = _("Order Search Term")
+        verbose_name_plural = _("Order Search Terms")
+
+    def __str__(self):
+        return "%s: %s" % (self.field, self.value)
+
+
 class AbstractCommunicationEvent(models.Model):
     """
     An order-level event involving a communication to the customer, such
@@ -464,7 +626,7 @@ class AbstractCommunicationEvent(models.Model):
 # LINES
 
 
-class AbstractLine(models.Model):
+class AbstractLine(SearchIndexValuesMixin, models.Model):
     """
     An order line
     """
@@ -570,6 +732,25 @@ class AbstractLine(models.Model):
         return _("Product '%(name)s', quantity '%(qty)s'") % {
             'name': title, 'qty': self.quantity}
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored quantity, so that the counts of the order are
+        # only recalculated when it changes
+        if 'quantity' in field_names:
+            instance._loaded_quantity = values[field_names.index('quantity')]
+        return instance
+
+    def has_quantity_changed(self):
+        """
+        Whether the quantity differs from the one this line was loaded with
+        """
+        return getattr(self, '_loaded_quantity', None) != self.quantity
+
+    #: The fields of the line that are part of the search terms of its order
+    #: (see ``OSCAR_ORDER_SEARCH_INDEX``)
+    search_index_fields = ('title', 'upc', 'partner_sku')
+
     @classmethod
     def all_statuses(cls):
         """
@@ -7,3 +7,6 @@ class OrderConfig(OscarConfig):
     label = 'order'
     name = 'oscar.apps.order'
     verbose_name = _('Order')
+
+    def ready(self):
+        from . import receivers  # noqa
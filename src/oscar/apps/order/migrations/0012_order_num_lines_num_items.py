@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0011_auto_20200801_0817'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='num_items',
+            field=models.PositiveIntegerField(default=0, verbose_name='Number of items'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='num_lines',
+            field=models.PositiveIntegerField(default=0, verbose_name='Number of lines'),
+        ),
+    ]
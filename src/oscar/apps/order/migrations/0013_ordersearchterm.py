@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-19 08:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0012_order_num_lines_num_items'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('number', 'Order number'), ('first_name', 'Customer first name'), ('last_name', 'Customer last name'), ('address_first_name', 'Address first name'), ('address_last_name', 'Address last name'), ('product_title', 'Product title'), ('upc', 'UPC'), ('partner_sku', 'Partner SKU'), ('voucher', 'Voucher code')], max_length=32, verbose_name='Field')),
+                ('value', models.CharField(max_length=255, verbose_name='Value')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='order.order', verbose_name='Order')),
+            ],
+            options={
+                'verbose_name': 'Order Search Term',
+                'verbose_name_plural': 'Order Search Terms',
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ordersearchterm',
+            index=models.Index(fields=['field', 'value'], name='order_search_field_value', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+        ),
+    ]
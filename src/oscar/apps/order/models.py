@@ -27,6 +27,13 @@ if not is_model_registered('order', 'OrderStatusChange'):
     __all__.append('OrderStatusChange')
 
 
+if not is_model_registered('order', 'OrderSearchTerm'):
+    class OrderSearchTerm(AbstractOrderSearchTerm):
+        pass
+
+    __all__.append('OrderSearchTerm')
+
+
 if not is_model_registered('order', 'CommunicationEvent'):
     class CommunicationEvent(AbstractCommunicationEvent):
         pass
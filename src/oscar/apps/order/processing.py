@@ -1,8 +1,12 @@
 from decimal import Decimal as D
 
+from django.db import connections, router, transaction
+from django.db.models import Sum
 from django.utils.translation import gettext_lazy as _
 
 from oscar.apps.order import exceptions
+from oscar.apps.partner.exceptions import InvalidStockAdjustment
+from oscar.core.loading import get_model
 
 
 class EventHandler(object):
@@ -37,6 +41,40 @@ class EventHandler(object):
         return self.create_shipping_event(
             order, event_type, lines, line_quantities, **kwargs)
 
+    def handle_shipping_events(self, event_type, shipments,
+                               consume_stock=False, **kwargs):
+        """
+        Handle a shipping event of the same type for many orders at once.
+
+        ``shipments`` is an iterable of ``(order, lines, line_quantities)``
+        tuples. Prior events and stock records are loaded in bulk, the
+        requested quantities are validated in memory and the shipping events,
+        their line quantities and (optionally) the stock consumption are
+        written with bulk operations.
+
+        As the validation happens in bulk, overriding
+        ``Line.is_shipping_event_permitted`` has no effect here; override
+        ``validate_shipping_events`` instead.
+        """
+        # As with ShippingEventQuantity.save, a zero quantity means the whole
+        # line
+        materialised = []
+        for order, lines, line_quantities in shipments:
+            lines = list(lines)
+            materialised.append((order, lines, [
+                qty or line.quantity
+                for line, qty in zip(lines, line_quantities)]))
+        shipments = materialised
+        with transaction.atomic():
+            self.validate_shipping_events(event_type, shipments, **kwargs)
+            if consume_stock:
+                lines, line_quantities = [], []
+                for __, shipment_lines, shipment_quantities in shipments:
+                    lines.extend(shipment_lines)
+                    line_quantities.extend(shipment_quantities)
+                self.bulk_consume_stock_allocations(lines, line_quantities)
+            return self.create_shipping_events(event_type, shipments, **kwargs)
+
     def handle_payment_event(self, order, event_type, amount, lines=None,
                              line_quantities=None, **kwargs):
         """
@@ -64,6 +102,18 @@ class EventHandler(object):
         if note_msg:
             self.create_note(order, note_msg)
 
+    def handle_bulk_order_status_change(self, orders, new_status):
+        """
+        Handle a requested status change for many orders at once
+
+        Unlike ``handle_order_status_change`` this doesn't call into per-order
+        hooks: the status change is applied with set-based queries. Returns a
+        tuple of the created status changes and the orders whose status
+        could not be changed.
+        """
+        Order = get_model('order', 'Order')
+        return Order.bulk_set_status(orders, new_status)
+
     # Validation methods
     # ------------------
 
@@ -86,6 +136,28 @@ class EventHandler(object):
         if errors:
             raise exceptions.InvalidShippingEvent(", ".join(errors))
 
+    def validate_shipping_events(self, event_type, shipments, **kwargs):
+        """
+        Test if the requested shipping events are permitted, using a single
+        query for the quantities that went through earlier events.
+
+        If not, raise InvalidShippingEvent
+        """
+        lines = [line for __, shipment_lines, __ in shipments
+                 for line in shipment_lines]
+        event_quantities = self.get_shipping_event_quantities(
+            lines, event_type)
+        errors = []
+        for __, shipment_lines, shipment_quantities in shipments:
+            for line, qty in zip(shipment_lines, shipment_quantities):
+                event_quantities[line.id] = event_quantities.get(line.id, 0) + qty
+                if event_quantities[line.id] > line.quantity:
+                    msg = _("The selected quantity for line #%(line_id)s is"
+                            " too large") % {'line_id': line.id}
+                    errors.append(msg)
+        if errors:
+            raise exceptions.InvalidShippingEvent(", ".join(errors))
+
     def validate_payment_event(self, order, event_type, amount, lines=None,
                                line_quantities=None, **kwargs):
         if lines and line_quantities:
@@ -111,11 +183,25 @@ class EventHandler(object):
         This is useful for validating if certain shipping events are allowed
         (i.e. you can't return something before it has shipped).
         """
+        event_quantities = self.get_shipping_event_quantities(
+            lines, event_type)
         for line, line_qty in zip(lines, line_quantities):
-            if line.shipping_event_quantity(event_type) < line_qty:
+            if event_quantities.get(line.id, 0) < line_qty:
                 return False
         return True
 
+    def get_shipping_event_quantities(self, lines, event_type):
+        """
+        Return a dict mapping the passed lines' ids to the quantity that has
+        been involved in shipping events of the passed type.
+        """
+        ShippingEventQuantity = get_model('order', 'ShippingEventQuantity')
+        quantities = ShippingEventQuantity._default_manager.filter(
+            line__in=[line.id for line in lines],
+            event__event_type=event_type,
+        ).order_by().values('line').annotate(total=Sum('quantity'))
+        return {row['line']: row['total'] for row in quantities}
+
     # Payment stuff
     # -------------
 
@@ -209,6 +295,44 @@ class EventHandler(object):
             if line.stockrecord:
                 line.stockrecord.consume_allocation(qty)
 
+    def bulk_consume_stock_allocations(self, lines, line_quantities):
+        """
+        Consume the stock allocations for the passed lines, which may belong
+        to different orders.
+
+        Stock records are locked and loaded in one query, the consumption is
+        validated in memory and all changed records are written with a single
+        bulk update. Unlike ``consume_stock_allocations`` no save signals are
+        sent for the stock records.
+
+        Raises ``InvalidStockAdjustment`` if any allocation can't be consumed.
+        """
+        StockRecord = get_model('partner', 'StockRecord')
+        quantities = {}
+        for line, qty in zip(lines, line_quantities):
+            if line.stockrecord_id:
+                quantities[line.stockrecord_id] = quantities.get(
+                    line.stockrecord_id, 0) + qty
+
+        records = StockRecord._default_manager.select_for_update(
+            of=('self',)).select_related(
+                'product__product_class',
+                'product__parent__product_class').filter(pk__in=quantities)
+        changed = []
+        for record in records:
+            if not record.can_track_allocations:
+                continue
+            qty = quantities[record.pk]
+            if not record.is_allocation_consumption_possible(qty):
+                raise InvalidStockAdjustment(
+                    _('Invalid stock consumption request'))
+            record.num_allocated -= qty
+            record.num_in_stock -= qty
+            changed.append(record)
+        StockRecord._default_manager.bulk_update(
+            changed, ['num_allocated', 'num_in_stock'])
+        return changed
+
     def cancel_stock_allocations(self, order, lines=None, line_quantities=None):
         """
         Cancel the stock allocations for the passed lines.
@@ -240,6 +364,30 @@ class EventHandler(object):
             raise
         return event
 
+    def create_shipping_events(self, event_type, shipments, **kwargs):
+        """
+        Bulk create a shipping event for each shipment and their line
+        quantities. Quantities are expected to have been validated already.
+        """
+        ShippingEvent = get_model('order', 'ShippingEvent')
+        ShippingEventQuantity = get_model('order', 'ShippingEventQuantity')
+        reference = kwargs.get('reference', '')
+        events = [ShippingEvent(order=order, event_type=event_type,
+                                notes=reference)
+                  for order, __, __ in shipments]
+        connection = connections[router.db_for_write(ShippingEvent)]
+        if connection.features.can_return_rows_from_bulk_insert:
+            ShippingEvent._default_manager.bulk_create(events)
+        else:
+            # The primary keys are needed for the event quantities below
+            for event in events:
+                event.save()
+        ShippingEventQuantity._default_manager.bulk_create([
+            ShippingEventQuantity(event=event, line=line, quantity=quantity)
+            for event, (__, lines, line_quantities) in zip(events, shipments)
+            for line, quantity in zip(lines, line_quantities)])
+        return events
+
     def create_payment_event(self, order, event_type, amount, lines=None,
                              line_quantities=None, **kwargs):
         reference = kwargs.get('reference', "")
@@ -257,3 +405,13 @@ class EventHandler(object):
     def create_note(self, order, message, note_type='System'):
         return order.notes.create(
             message=message, note_type=note_type, user=self.user)
+
+    def create_notes(self, order_messages, note_type='System'):
+        """
+        Bulk create notes from an iterable of (order id, message) pairs
+        """
+        OrderNote = get_model('order', 'OrderNote')
+        return OrderNote._default_manager.bulk_create([
+            OrderNote(order_id=order_id, message=message,
+                      note_type=note_type, user=self.user)
+            for order_id, message in order_messages])
@@ -0,0 +1,134 @@
+import threading
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from oscar.apps.order.signals import order_placed
+from oscar.core.compat import get_user_model
+from oscar.core.loading import get_class, get_model
+
+Order = get_model('order', 'Order')
+Line = get_model('order', 'Line')
+ShippingAddress = get_model('order', 'ShippingAddress')
+BillingAddress = get_model('order', 'BillingAddress')
+OrderSearchIndexer = get_class('order.utils', 'OrderSearchIndexer')
+User = get_user_model()
+
+_local = threading.local()
+
+
+@receiver(post_save, sender=Line)
+def update_order_line_counts_on_save(sender, instance, created, **kwargs):
+    """
+    Keep the order's denormalised line counts up-to-date when a line is added
+    or its quantity changes.
+    """
+    if kwargs.get('raw', False):
+        return
+    if created:
+        # Orders placed by OrderCreator are created with their line counts
+        if not getattr(instance.order, 'is_creating_lines', False):
+            instance.order.add_to_line_counts(instance.quantity)
+    elif instance.has_quantity_changed():
+        instance.order.update_line_counts()
+    instance._loaded_quantity = instance.quantity
+
+
+@receiver(post_save, sender=Line)
+def reindex_order_of_updated_line(sender, instance, created, **kwargs):
+    if kwargs.get('raw', False) or not settings.OSCAR_ORDER_SEARCH_INDEX:
+        return
+    if created:
+        # The lines of orders that are being placed are indexed with the
+        # order once it's placed
+        reindex = (not getattr(instance.order, 'is_creating_lines', False)
+                   and instance.order.search_terms.exists())
+    else:
+        reindex = instance.have_search_index_values_changed()
+    if reindex:
+        OrderSearchIndexer().index(instance.order)
+    instance.mark_search_index_values()
+
+
+@receiver(post_delete, sender=Line)
+def reindex_order_of_deleted_line(sender, instance, **kwargs):
+    if (not settings.OSCAR_ORDER_SEARCH_INDEX
+            or instance.order_id in _get_orders_being_deleted()):
+        return
+    OrderSearchIndexer().index(instance.order)
+
+
+@receiver(pre_delete, sender=Order)
+def mark_order_being_deleted(sender, instance, **kwargs):
+    # The lines of the order are deleted before it, which doesn't need to
+    # update its line counts
+    _get_orders_being_deleted().add(instance.pk)
+
+
+@receiver(post_delete, sender=Order)
+def unmark_order_being_deleted(sender, instance, **kwargs):
+    _get_orders_being_deleted().discard(instance.pk)
+
+
+def _get_orders_being_deleted():
+    if not hasattr(_local, 'orders_being_deleted'):
+        _local.orders_being_deleted = set()
+    return _local.orders_being_deleted
+
+
+@receiver(post_delete, sender=Line)
+def update_order_line_counts_on_delete(sender, instance, **kwargs):
+    if instance.order_id in _get_orders_being_deleted():
+        return
+    # The stored quantity is removed from the counts
+    quantity = getattr(instance, '_loaded_quantity', instance.quantity)
+    if Line.order.is_cached(instance):
+        instance.order.add_to_line_counts(-quantity, num_lines=-1)
+    else:
+        Order._default_manager.filter(pk=instance.order_id).update(
+            num_lines=F('num_lines') - 1, num_items=F('num_items') - quantity)
+
+
+@receiver(order_placed)
+def index_placed_order(sender, order, **kwargs):
+    if settings.OSCAR_ORDER_SEARCH_INDEX:
+        OrderSearchIndexer().index(order)
+        order.mark_search_index_values()
+
+
+@receiver(post_save, sender=Order)
+def reindex_updated_order(sender, instance, created, **kwargs):
+    # New orders are indexed once placed, when their lines exist
+    if created or kwargs.get('raw', False):
+        return
+    # Saves that don't change the indexed values, e.g. status changes, leave
+    # the search terms alone
+    if (settings.OSCAR_ORDER_SEARCH_INDEX
+            and instance.have_search_index_values_changed()):
+        OrderSearchIndexer().index(instance)
+        instance.mark_search_index_values()
+
+
+@receiver(post_save, sender=User)
+def reindex_orders_of_renamed_user(sender, instance, created, update_fields=None,
+                                   **kwargs):
+    if created or kwargs.get('raw', False) or not settings.OSCAR_ORDER_SEARCH_INDEX:
+        return
+    # E.g. the last login time is saved on its own
+    if update_fields is not None and not {'first_name', 'last_name'} & set(update_fields):
+        return
+    indexer = OrderSearchIndexer()
+    if indexer.have_user_terms_changed(instance):
+        indexer.index_orders(
+            indexer.get_indexing_queryset().filter(user=instance))
+
+
+@receiver(post_save, sender=ShippingAddress)
+@receiver(post_save, sender=BillingAddress)
+def reindex_orders_of_address(sender, instance, created, **kwargs):
+    if created or kwargs.get('raw', False):
+        return
+    if settings.OSCAR_ORDER_SEARCH_INDEX:
+        OrderSearchIndexer().index_orders(instance.order_set.all())
@@ -17,6 +17,7 @@ CommunicationEvent = get_model('order', 'CommunicationEvent')
 CommunicationEventType = get_model('communication', 'CommunicationEventType')
 Dispatcher = get_class('communication.utils', 'Dispatcher')
 Surcharge = get_model('order', 'Surcharge')
+OrderSearchTerm = get_model('order', 'OrderSearchTerm')
 
 
 class OrderNumberGenerator(object):
@@ -66,9 +67,13 @@ class OrderCreator(object):
             order = self.create_order_model(
                 user, basket, shipping_address, shipping_method, shipping_charge,
                 billing_address, total, order_number, status, request, **kwargs)
+            # The line counts of the order are set from the basket, so they
+            # aren't updated for every line that is created
+            order.is_creating_lines = True
             for line in basket.all_lines():
                 self.create_line_models(order, line)
                 self.update_stock_records(line)
+            order.is_creating_lines = False
 
             for voucher in basket.vouchers.select_for_update():
                 if not voucher.is_active():  # basket ignores inactive vouchers
@@ -110,6 +115,7 @@ class OrderCreator(object):
                            shipping_method, shipping_charge, billing_address,
                            total, order_number, status, request=None, surcharges=None, **extra_order_fields):
         """Create an order model."""
+        basket_lines = basket.all_lines()
         order_data = {'basket': basket,
                       'number': order_number,
                       'currency': total.currency,
@@ -118,7 +124,10 @@ class OrderCreator(object):
                       'shipping_incl_tax': shipping_charge.incl_tax,
                       'shipping_excl_tax': shipping_charge.excl_tax,
                       'shipping_method': shipping_method.name,
-                      'shipping_code': shipping_method.code}
+                      'shipping_code': shipping_method.code,
+                      'num_lines': len(basket_lines),
+                      'num_items': sum(
+                          line.quantity for line in basket_lines)}
         if shipping_address:
             order_data['shipping_address'] = shipping_address
         if billing_address:
@@ -311,3 +320,94 @@ class OrderDispatcher:
         event_code = self.ORDER_PLACED_EVENT_CODE
         messages = self.dispatcher.get_messages(event_code, extra_context)
         self.dispatch_order_messages(order, messages, event_code, attachments=attachments)
+
+
+class OrderSearchIndexer(object):
+    """
+    Maintains the denormalised search terms used to search orders in the
+    dashboard (see ``OSCAR_ORDER_SEARCH_INDEX``).
+    """
+
+    def get_terms(self, order):
+        """
+        Return the (field, value) pairs an order can be searched by
+        """
+        terms = [(OrderSearchTerm.NUMBER, order.number)]
+        if order.user:
+            terms.extend(self.get_user_terms(order.user))
+        for address in (order.shipping_address, order.billing_address):
+            if address:
+                terms.append((OrderSearchTerm.ADDRESS_FIRST_NAME,
+                              address.first_name))
+                terms.append((OrderSearchTerm.ADDRESS_LAST_NAME,
+                              address.last_name))
+        for line in order.lines.all():
+            terms.append((OrderSearchTerm.PRODUCT_TITLE, line.title))
+            terms.append((OrderSearchTerm.UPC, line.upc))
+            terms.append((OrderSearchTerm.PARTNER_SKU, line.partner_sku))
+        for discount in order.discounts.all():
+            terms.append((OrderSearchTerm.VOUCHER, discount.voucher_code))
+
+        return self.normalise(terms)
+
+    def get_user_terms(self, user):
+        """
+        Return the (field, value) pairs of the customer of an order
+        """
+        return [(OrderSearchTerm.FIRST_NAME, getattr(user, 'first_name', '')),
+                (OrderSearchTerm.LAST_NAME, getattr(user, 'last_name', ''))]
+
+    def normalise(self, terms):
+        """
+        Return the sorted, distinct and lower-cased non-empty terms, cut to
+        the length of the indexed values
+        """
+        max_length = OrderSearchTerm._meta.get_field('value').max_length
+        normalised = set()
+        for field, value in terms:
+            if value:
+                normalised.add((field, str(value).lower()[:max_length]))
+        return sorted(normalised)
+
+    def have_user_terms_changed(self, user):
+        """
+        Whether the indexed customer terms of the user's orders differ from
+        the user's current names
+        """
+        fields = [field for field, __ in self.get_user_terms(user)]
+        indexed = OrderSearchTerm._default_manager.filter(
+            order__user=user, field__in=fields).values_list(
+            'field', 'value').distinct()
+        return set(indexed) != set(self.normalise(self.get_user_terms(user)))
+
+    def index(self, order):
+        """
+        Replace the search terms of a single order
+        """
+        self.index_orders([order])
+
+    def index_orders(self, orders):
+        """
+        Replace the search terms of the passed orders using one delete and
+        one bulk insert.
+
+        The orders' customers, addresses, lines and discounts should be
+        fetched up front when indexing many orders.
+        """
+        orders = list(orders)
+        with transaction.atomic():
+            OrderSearchTerm._default_manager.filter(
+                order__in=[order.pk for order in orders]).delete()
+            OrderSearchTerm._default_manager.bulk_create([
+                OrderSearchTerm(order=order, field=field, value=value)
+                for order in orders
+                for field, value in self.get_terms(order)])
+
+    def get_indexing_queryset(self):
+        """
+        Return the orders to (re)build the index for, with everything
+        ``get_terms`` needs fetched up front
+        """
+        return Order._default_manager.select_related(
+            'user', 'shipping_address', 'billing_address',
+        ).prefetch_related('lines', 'discounts').order_by('pk')
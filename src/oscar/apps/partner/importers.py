@@ -1,11 +1,20 @@
 import csv
 import os
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal as D
+from decimal import InvalidOperation
+from itertools import islice
 
+from django.db import IntegrityError, connections
+from django.db.models import Q
 from django.db.transaction import atomic
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from oscar.apps.partner.signals import stockrecords_changed
 from oscar.core.loading import get_class, get_model
+from oscar.core.utils import slugify
 
 ImportingError = get_class('partner.exceptions', 'ImportingError')
 
@@ -23,14 +32,39 @@ class CatalogueImporter(object):
     """
     CSV product importer used to built sandbox. Might not work very well
     for anything else.
+
+    The file is streamed and imported in chunks of ``chunk_size`` rows. The
+    products and stock records of a chunk are looked up with one query each
+    and written with bulk inserts and updates, in a transaction per chunk.
+    Product classes, categories and partners are cached for the whole import.
+
+    Products, their categories and new stock records are written with
+    ``bulk_create`` and ``bulk_update``, which don't call ``save()`` and don't
+    send the ``pre_save`` and ``post_save`` signals. Receivers of these
+    signals, e.g. a search backend that updates its index when products are
+    saved, don't see the imported products; only updated stock records are
+    announced with the ``stockrecords_changed`` signal.
+
+    With more than one ``workers``, chunks are imported by a pool of threads
+    with their own database connections, which requires a database that
+    allows concurrent writes (i.e. not SQLite). A chunk is only imported once
+    the earlier chunks with the same UPCs or SKUs have been, so that the last
+    row of a product or stock record wins as in a serial import. A chunk that
+    fails with an ``IntegrityError`` anyway is imported again straight away,
+    before the results of later chunks are used.
     """
 
     _flush = False
+    chunk_size = 1000
 
-    def __init__(self, logger, delimiter=",", flush=False):
+    def __init__(self, logger, delimiter=",", flush=False, chunk_size=None,
+                 workers=1):
         self.logger = logger
         self._delimiter = delimiter
         self._flush = flush
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+        self.workers = workers
 
     def handle(self, file_path=None):
         """Handles the actual import process"""
@@ -49,73 +83,362 @@ class CatalogueImporter(object):
         Partner.objects.all().delete()
         StockRecord.objects.all().delete()
 
-    @atomic
     def _import(self, file_path):
         """Imports given file"""
-        stats = {'new_items': 0,
-                 'updated_items': 0}
-        row_number = 0
+        self._product_classes = {}
+        self._categories = {}
+        self._partners = {}
+        stats = defaultdict(int)
         with open(file_path, 'rt') as f:
-            reader = csv.reader(f, escapechar='\\')
-            for row in reader:
-                row_number += 1
-                self._import_row(row_number, row, stats)
+            chunks = self._read_chunks(csv.reader(f, escapechar='\\'))
+            if self.workers > 1:
+                results = self._import_chunks_in_parallel(chunks)
+            else:
+                results = (self._import_chunk(chunk) for chunk in chunks)
+            for chunk, chunk_stats in results:
+                self._log_chunk_stats(chunk, chunk_stats)
+                for key, value in chunk_stats.items():
+                    stats[key] += value
         msg = "New items: %d, updated items: %d" % (stats['new_items'],
                                                     stats['updated_items'])
         self.logger.info(msg)
 
-    def _import_row(self, row_number, row, stats):
-        if len(row) != 5 and len(row) != 9:
-            self.logger.error("Row number %d has an invalid number of fields"
-                              " (%d), skipping..." % (row_number, len(row)))
-            return
-        item = self._create_item(*row[:5], stats=stats)
-        if len(row) == 9:
-            # With stock data
-            self._create_stockrecord(item, *row[5:9], stats=stats)
-
-    def _create_item(self, product_class, category_str, upc, title,
-                     description, stats):
-        # Ignore any entries that are NULL
-        if description == 'NULL':
-            description = ''
-
-        # Create item class and item
-        product_class, __ \
-            = ProductClass.objects.get_or_create(name=product_class)
+    def _read_chunks(self, reader):
+        """
+        Yield the valid rows of the file in chunks of (row number, row) pairs,
+        with the product classes, categories and partners they refer to
+        """
+        row_number = 0
+        while True:
+            chunk = []
+            rows = list(islice(reader, self.chunk_size))
+            if not rows:
+                return
+            for row in rows:
+                row_number += 1
+                if len(row) != 5 and len(row) != 9:
+                    self.logger.error(
+                        "Row number %d has an invalid number of fields"
+                        " (%d), skipping..." % (row_number, len(row)))
+                    continue
+                if not row[2]:
+                    # Products are looked up and linked by their UPC
+                    self.logger.error(
+                        "Row number %d has no UPC, skipping..." % row_number)
+                    continue
+                chunk.append((row_number, row))
+            if not chunk:
+                continue
+            # These are shared by the chunks, so they are created up front
+            for __, row in chunk:
+                self._get_product_class(row[0])
+                self._get_category(row[1])
+                if len(row) == 9:
+                    self._get_partner(row[5])
+            yield chunk
+
+    def _import_chunks_in_parallel(self, chunks):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for chunk in chunks:
+                keys = self._get_chunk_keys(chunk)
+                # Only read as many chunks ahead as there are workers, and
+                # wait for the chunks that import the same products or stock
+                # records so that later rows still win
+                while pending and (
+                        len(pending) >= self.workers
+                        or any(keys & pending_keys
+                               for __, pending_keys, __ in pending)):
+                    yield self._get_chunk_result(*pending.popleft())
+                pending.append((
+                    chunk, keys,
+                    executor.submit(self._import_chunk_in_thread, chunk)))
+            while pending:
+                yield self._get_chunk_result(*pending.popleft())
+
+    def _get_chunk_keys(self, chunk):
+        keys = set()
+        for __, row in chunk:
+            keys.add(('upc', row[2]))
+            if len(row) == 9:
+                keys.add(('sku', row[6]))
+        return keys
+
+    def _get_chunk_result(self, chunk, keys, future):
         try:
-            item = Product.objects.get(upc=upc)
-            stats['updated_items'] += 1
-        except Product.DoesNotExist:
-            item = Product()
-            stats['new_items'] += 1
-        item.upc = upc
-        item.title = title
-        item.description = description
-        item.product_class = product_class
-        item.save()
+            return future.result()
+        except IntegrityError:
+            # Import the chunk again before any later chunk is yielded
+            return self._import_chunk(chunk)
+
+    def _import_chunk_in_thread(self, chunk):
+        try:
+            return self._import_chunk(chunk)
+        finally:
+            # Each thread has its own database connection
+            connections.close_all()
+
+    @atomic
+    def _import_chunk(self, chunk):
+        stats = defaultdict(int)
+        items = self._create_items(chunk, stats)
+        stock_rows = [(items[row[2]], row) for __, row in chunk if len(row) == 9]
+        self._create_stockrecords(stock_rows, stats)
+        return chunk, stats
+
+    def _log_chunk_stats(self, chunk, stats):
+        self.logger.info(
+            "Rows %d-%d: %d new items, %d updated items, %d new stock records,"
+            " %d updated stock records" % (
+                chunk[0][0], chunk[-1][0], stats['new_items'],
+                stats['updated_items'], stats['new_stockrecords'],
+                stats['updated_stockrecords']))
+
+    def _get_product_class(self, name):
+        if name not in self._product_classes:
+            self._product_classes[name], __ \
+                = ProductClass.objects.get_or_create(name=name)
+        return self._product_classes[name]
+
+    def _get_category(self, category_str):
+        if category_str not in self._categories:
+            self._categories[category_str] = create_from_breadcrumbs(
+                category_str)
+        return self._categories[category_str]
+
+    def _get_partner(self, name):
+        if name not in self._partners:
+            self._partners[name], __ = Partner.objects.get_or_create(name=name)
+        return self._partners[name]
+
+    def _create_items(self, chunk, stats):
+        """
+        Create or update the products of the chunk and add them to their
+        categories. Returns the products by UPC.
+        """
+        now = timezone.now()
+        upcs = {row[2] for __, row in chunk}
+        items = Product.objects.in_bulk(upcs, field_name='upc')
+        new_upcs = set()
+        for __, row in chunk:
+            product_class, category_str, upc, title, description = row[:5]
+            # Ignore any entries that are NULL
+            if description == 'NULL':
+                description = ''
+            item = items.get(upc)
+            if item is None:
+                item = items[upc] = Product(upc=upc)
+                new_upcs.add(upc)
+                stats['new_items'] += 1
+            else:
+                stats['updated_items'] += 1
+            item.title = title
+            item.description = description
+            item.product_class = self._get_product_class(product_class)
+            # Bulk updates don't set auto_now fields
+            item.date_updated = now
+
+        new_items = [items[upc] for upc in new_upcs]
+        for item in new_items:
+            item.slug = slugify(item.get_title())
+        Product.objects.bulk_create(new_items)
+        Product.objects.bulk_update(
+            [item for upc, item in items.items() if upc not in new_upcs],
+            ['title', 'description', 'product_class', 'date_updated'])
+        if new_upcs:
+            # Not all databases return the primary keys of inserted rows
+            for upc, pk in Product.objects.filter(
+                    upc__in=new_upcs).order_by().values_list('upc', 'pk'):
+                items[upc].pk = pk
 
         # Category
-        cat = create_from_breadcrumbs(category_str)
-        ProductCategory.objects.update_or_create(product=item, category=cat)
+        links = {(items[row[2]].pk, self._get_category(row[1]).pk)
+                 for __, row in chunk}
+        existing_links = set(ProductCategory.objects.filter(
+            product__in=[item.pk for item in items.values()]).order_by().values_list(
+            'product_id', 'category_id'))
+        ProductCategory.objects.bulk_create([
+            ProductCategory(product_id=product_id, category_id=category_id)
+            for product_id, category_id in links - existing_links])
+
+        return items
+
+    def _create_stockrecords(self, stock_rows, stats):
+        skus = {row[6] for __, row in stock_rows}
+        stockrecords = {stock.partner_sku: stock for stock in
+                        StockRecord.objects.filter(partner_sku__in=skus)}
+        new_skus = set()
+        now = timezone.now()
+        for item, row in stock_rows:
+            partner_name, partner_sku, price, num_in_stock = row[5:9]
+            stock = stockrecords.get(partner_sku)
+            if stock is None:
+                stock = stockrecords[partner_sku] = StockRecord()
+                new_skus.add(partner_sku)
+            stock.product = item
+            stock.partner = self._get_partner(partner_name)
+            stock.partner_sku = partner_sku
+            stock.price = D(price)
+            stock.num_in_stock = num_in_stock
+            stock.date_updated = now
 
-        return item
+        updated = [stock for sku, stock in stockrecords.items()
+                   if sku not in new_skus]
+        StockRecord.objects.bulk_create(
+            [stockrecords[sku] for sku in new_skus])
+        StockRecord.objects.bulk_update(
+            updated, ['product', 'partner', 'price', 'num_in_stock',
+                      'date_updated'])
+        stats['new_stockrecords'] += len(new_skus)
+        stats['updated_stockrecords'] += len(updated)
+        if updated:
+            stockrecords_changed.send(
+                sender=StockRecord,
+                stockrecord_ids=[stock.pk for stock in updated])
 
-    def _create_stockrecord(self, item, partner_name, partner_sku, price, num_in_stock, stats):
-        # Create partner and stock record
-        partner, _ = Partner.objects.get_or_create(
-            name=partner_name)
+
+class StockSyncImporter(object):
+    """
+    Synchronises the prices and stock levels of existing stock records with
+    a CSV file of (partner name, partner SKU, price, number in stock) rows.
+
+    The rows are compared with the current values in batches of
+    ``batch_size`` rows, and only the stock records whose price or stock
+    level changed are updated, with a bulk update per batch. Empty prices and
+    stock levels leave the stored values unchanged. Instead of a
+    ``post_save`` signal per stock record, a single ``stockrecords_changed``
+    signal is sent with the ids of all changed stock records. Rows of unknown
+    partners or stock records are skipped.
+    """
+
+    batch_size = 1000
+
+    def __init__(self, logger, delimiter=",", batch_size=None):
+        self.logger = logger
+        self._delimiter = delimiter
+        if batch_size is not None:
+            self.batch_size = batch_size
+
+    def handle(self, file_path=None):
+        """
+        Synchronise the stock records with the passed file and return the ids
+        of the changed stock records
+        """
+        if not file_path:
+            raise ImportingError(_("No file path supplied"))
+        Validator().validate(file_path)
+        return self._sync(file_path)
+
+    def _sync(self, file_path):
+        self._partners = {}
+        stats = defaultdict(int)
+        changed_ids = []
+        with open(file_path, 'rt') as f:
+            reader = csv.reader(f, delimiter=self._delimiter, escapechar='\\')
+            row_number = 0
+            while True:
+                rows = list(islice(reader, self.batch_size))
+                if not rows:
+                    break
+                values = {}
+                for row in rows:
+                    row_number += 1
+                    key_and_values = self._parse_row(row_number, row)
+                    if key_and_values is None:
+                        stats['skipped'] += 1
+                        continue
+                    # Later rows for the same stock record win, except for
+                    # their empty cells
+                    key, row_values = key_and_values
+                    if key in values:
+                        row_values = tuple(
+                            old if new is None else new
+                            for new, old in zip(row_values, values[key]))
+                    values[key] = row_values
+                changed_ids.extend(self._sync_batch(values, stats))
+
+        if changed_ids:
+            stockrecords_changed.send(sender=StockRecord,
+                                      stockrecord_ids=changed_ids)
+        self.logger.info(
+            "Updated stock records: %d, unchanged stock records: %d,"
+            " skipped rows: %d" % (stats['updated'], stats['unchanged'],
+                                   stats['skipped']))
+        return changed_ids
+
+    def _parse_row(self, row_number, row):
+        if len(row) != 4:
+            self.logger.error(
+                "Row number %d has an invalid number of fields (%d),"
+                " skipping..." % (row_number, len(row)))
+            return None
+        partner_name, partner_sku, price, num_in_stock = row
         try:
-            stock = StockRecord.objects.get(partner_sku=partner_sku)
-        except StockRecord.DoesNotExist:
-            stock = StockRecord()
-
-        stock.product = item
-        stock.partner = partner
-        stock.partner_sku = partner_sku
-        stock.price = D(price)
-        stock.num_in_stock = num_in_stock
-        stock.save()
+            price = D(price) if price else None
+            num_in_stock = int(num_in_stock) if num_in_stock else None
+        except (InvalidOperation, ValueError):
+            self.logger.error(
+                "Row number %d has an invalid price or stock level,"
+                " skipping..." % row_number)
+            return None
+        partner = self._get_partner(partner_name)
+        if partner is None:
+            self.logger.error(
+                "Row number %d refers to the unknown partner '%s',"
+                " skipping..." % (row_number, partner_name))
+            return None
+        return (partner.pk, partner_sku), (price, num_in_stock)
+
+    def _get_partner(self, name):
+        if name not in self._partners:
+            self._partners[name] = Partner.objects.filter(name=name).first()
+        return self._partners[name]
+
+    @atomic
+    def _sync_batch(self, values, stats):
+        """
+        Update the stock records of the batch whose values differ from the
+        passed ones and return their ids
+        """
+        if not values:
+            return []
+        skus = defaultdict(list)
+        for partner_id, partner_sku in values:
+            skus[partner_id].append(partner_sku)
+        lookup = Q()
+        for partner_id, partner_skus in skus.items():
+            lookup |= Q(partner_id=partner_id, partner_sku__in=partner_skus)
+        stockrecords = StockRecord.objects.filter(lookup).only(
+            'pk', 'partner_id', 'partner_sku', 'price', 'num_in_stock')
+
+        now = timezone.now()
+        changed = []
+        for stock in stockrecords:
+            price, num_in_stock = values.pop(
+                (stock.partner_id, stock.partner_sku))
+            # Empty cells leave the stored values unchanged
+            if price is None:
+                price = stock.price
+            if num_in_stock is None:
+                num_in_stock = stock.num_in_stock
+            if stock.price == price and stock.num_in_stock == num_in_stock:
+                stats['unchanged'] += 1
+                continue
+            stock.price = price
+            stock.num_in_stock = num_in_stock
+            stock.date_updated = now
+            changed.append(stock)
+
+        for partner_id, partner_sku in values:
+            self.logger.error(
+                "No stock record with partner SKU '%s', skipping..."
+                % partner_sku)
+        stats['skipped'] += len(values)
+
+        StockRecord.objects.bulk_update(
+            changed, ['price', 'num_in_stock', 'date_updated'])
+        stats['updated'] += len(changed)
+        return [stock.pk for stock in changed]
 
 
 class Validator(object):
@@ -1,6 +1,8 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils.timezone import now
 
+from oscar.apps.partner.signals import stockrecords_changed
 from oscar.core.loading import get_model
 
 StockAlert = get_model('partner', 'StockAlert')
@@ -26,3 +28,41 @@ def update_stock_alerts(sender, instance, created, **kwargs):
                                   threshold=stockrecord.low_stock_threshold)
     elif not stockrecord.is_below_threshold and alert:
         alert.close()
+
+
+#: The number of stock records whose alerts are updated at a time
+STOCK_ALERTS_BATCH_SIZE = 1000
+
+
+@receiver(stockrecords_changed)
+def update_stock_alerts_in_bulk(sender, stockrecord_ids, **kwargs):
+    """
+    Update the low-stock alerts of stock records changed in bulk
+    """
+    stockrecord_ids = list(stockrecord_ids)
+    for start in range(0, len(stockrecord_ids), STOCK_ALERTS_BATCH_SIZE):
+        _update_stock_alerts_of_batch(
+            stockrecord_ids[start:start + STOCK_ALERTS_BATCH_SIZE])
+
+
+def _update_stock_alerts_of_batch(stockrecord_ids):
+    stockrecords = StockRecord.objects.filter(pk__in=stockrecord_ids).only(
+        'pk', 'num_in_stock', 'num_allocated', 'low_stock_threshold')
+    open_alerts = set(StockAlert.objects.filter(
+        stockrecord_id__in=stockrecord_ids, status=StockAlert.OPEN,
+    ).values_list('stockrecord_id', flat=True))
+
+    new_alerts, closed_ids = [], []
+    for stockrecord in stockrecords:
+        if stockrecord.is_below_threshold and stockrecord.pk not in open_alerts:
+            new_alerts.append(StockAlert(
+                stockrecord=stockrecord,
+                threshold=stockrecord.low_stock_threshold))
+        elif not stockrecord.is_below_threshold and stockrecord.pk in open_alerts:
+            closed_ids.append(stockrecord.pk)
+
+    StockAlert.objects.bulk_create(new_alerts)
+    if closed_ids:
+        StockAlert.objects.filter(
+            stockrecord_id__in=closed_ids, status=StockAlert.OPEN,
+        ).update(status=StockAlert.CLOSED, date_closed=now())
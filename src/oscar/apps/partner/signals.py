@@ -0,0 +1,3 @@
+import django.dispatch
+
+stockrecords_changed = django.dispatch.Signal()
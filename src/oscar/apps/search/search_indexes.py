@@ -36,8 +36,11 @@ class ProductIndex(indexes.SearchIndex, indexes.Indexable):
         return get_model('catalogue', 'Product')
 
     def index_queryset(self, using=None):
-        # Only index browsable products (not each individual child product)
-        return self.get_model().objects.browsable().order_by('-date_updated')
+        # Only index browsable products (not each individual child product).
+        # The attribute values are prefetched for the templates and prepare
+        # methods of custom indexes.
+        return self.get_model().objects.browsable().with_attributes().order_by(
+            '-date_updated')
 
     def read_queryset(self, using=None):
         return self.get_model().objects.browsable().base_queryset()
@@ -2,7 +2,7 @@ from decimal import Decimal
 
 from django.core import exceptions
 from django.db import models
-from django.db.models import Sum
+from django.db.models import F, Sum
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -217,16 +217,18 @@ class AbstractVoucher(models.Model):
             self.applications.create(voucher=self, order=order, user=user)
         else:
             self.applications.create(voucher=self, order=order)
-        self.num_orders += 1
-        self.save()
+        self.__class__._default_manager.filter(pk=self.pk).update(
+            num_orders=F('num_orders') + 1)
+        self.refresh_from_db(fields=['num_orders'])
     record_usage.alters_data = True
 
     def record_discount(self, discount):
         """
         Record a discount that this offer has given
         """
-        self.total_discount += discount['discount']
-        self.save()
+        self.__class__._default_manager.filter(pk=self.pk).update(
+            total_discount=F('total_discount') + discount['discount'])
+        self.refresh_from_db(fields=['total_discount'])
     record_discount.alters_data = True
 
     @property
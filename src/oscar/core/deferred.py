@@ -0,0 +1,211 @@
+"""
+Deferred execution of signal receivers that don't need to run within the
+request/response cycle, e.g. analytics and alert emails.
+
+Receivers registered with :func:`deferred_receiver` are handed to the backend
+configured with ``OSCAR_DEFERRED_RECEIVERS_BACKEND``. The default
+:class:`ImmediateBackend` runs them straight away, like regular receivers.
+:class:`ThreadPoolBackend` runs them in a pool of worker threads once the
+response has been sent, and :class:`InMemoryBackend` collects them until
+``run_pending()`` is called, which is useful in tests.
+"""
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('oscar.deferred')
+
+_local = threading.local()
+_backends = {}
+
+
+class Task(object):
+    """
+    A call of a deferred receiver
+    """
+
+    def __init__(self, func, args=(), kwargs=None, max_retries=0, atomic=True):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.max_retries = max_retries
+        self.atomic = atomic
+
+    def __str__(self):
+        name = getattr(self.func, '__qualname__', None)
+        if name is None:
+            return repr(self.func)
+        return '%s.%s' % (self.func.__module__, name)
+
+    def run(self):
+        """
+        Call the function, retrying up to ``max_retries`` times if it raises
+        an exception. Exceptions are logged and never propagated.
+
+        Unless ``atomic`` is false, each attempt runs in its own transaction
+        so a failed attempt doesn't leave partial writes behind.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                if not self.atomic:
+                    return self.func(*self.args, **self.kwargs)
+                with transaction.atomic():
+                    return self.func(*self.args, **self.kwargs)
+            except Exception:
+                if attempt < self.max_retries:
+                    logger.warning("Deferred task %s failed, retrying (%d/%d)",
+                                   self, attempt + 1, self.max_retries,
+                                   exc_info=True)
+                else:
+                    logger.exception("Deferred task %s failed after %d attempts",
+                                     self, attempt + 1)
+
+
+class BaseBackend(object):
+    """
+    Base class of the backends that run deferred tasks
+    """
+    #: Whether tasks deferred while a request is processed are held back
+    #: until the response has been sent
+    wait_for_response = False
+
+    def enqueue(self, task):
+        raise NotImplementedError
+
+
+class ImmediateBackend(BaseBackend):
+    """
+    Runs tasks as soon as they are deferred. Exceptions are propagated
+    without retrying, as with regular receivers.
+    """
+
+    def enqueue(self, task):
+        task.func(*task.args, **task.kwargs)
+
+
+class InMemoryBackend(BaseBackend):
+    """
+    Collects tasks in memory until ``run_pending()`` is called
+    """
+
+    def __init__(self):
+        self.tasks = []
+
+    def enqueue(self, task):
+        self.tasks.append(task)
+
+    def run_pending(self):
+        tasks, self.tasks = self.tasks, []
+        for task in tasks:
+            task.run()
+        return len(tasks)
+
+
+class ThreadPoolBackend(BaseBackend):
+    """
+    Runs tasks in a pool of ``OSCAR_DEFERRED_RECEIVERS_MAX_WORKERS`` threads
+    of the current process, after the response has been sent.
+    Tasks that haven't run when the process is killed are lost.
+    """
+    wait_for_response = True
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.OSCAR_DEFERRED_RECEIVERS_MAX_WORKERS,
+            thread_name_prefix='oscar-deferred')
+
+    def enqueue(self, task):
+        self.executor.submit(self.run_task, task)
+
+    def run_task(self, task):
+        try:
+            task.run()
+        finally:
+            # Worker threads have their own database connections
+            connections.close_all()
+
+
+def get_backend(path=None):
+    """
+    Return the backend with the passed import path, by default the one
+    configured for deferred receivers
+    """
+    if path is None:
+        path = settings.OSCAR_DEFERRED_RECEIVERS_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def defer(func, *args, **kwargs):
+    """
+    Run ``func(*args, **kwargs)`` with the configured backend.
+    """
+    _defer(Task(func, args, kwargs))
+
+
+def _defer(task):
+    backend = get_backend()
+    if not backend.wait_for_response:
+        backend.enqueue(task)
+    else:
+        # Make sure the task sees the data written by the current transaction,
+        # and drop it if that transaction is rolled back
+        transaction.on_commit(functools.partial(_release, task))
+
+
+def _release(task):
+    if getattr(_local, 'pending', None) is not None:
+        # Hold the task back until the response has been sent
+        _local.pending.append(task)
+    else:
+        get_backend().enqueue(task)
+
+
+def deferred_receiver(signal, retries=0, **kwargs):
+    """
+    A decorator like Django's ``receiver`` that connects a function to a
+    signal so that it is called through :func:`defer`.
+
+    Backends other than :class:`ImmediateBackend` retry a failing receiver up
+    to ``retries`` times, so only receivers that are safe to run more than
+    once should set it.
+
+    The function itself is returned unchanged so it can still be called
+    directly.
+    """
+    def _decorator(func):
+        @functools.wraps(func)
+        def _defer_receiver(sender, **signal_kwargs):
+            signal_kwargs['sender'] = sender
+            _defer(Task(func, kwargs=signal_kwargs, max_retries=retries))
+        kwargs.setdefault('weak', False)
+        if isinstance(signal, (list, tuple)):
+            for s in signal:
+                s.connect(_defer_receiver, **kwargs)
+        else:
+            signal.connect(_defer_receiver, **kwargs)
+        return func
+    return _decorator
+
+
+def _start_request(sender, **kwargs):
+    _local.pending = []
+
+
+def _finish_request(sender, **kwargs):
+    pending, _local.pending = getattr(_local, 'pending', None), None
+    if pending:
+        backend = get_backend()
+        for task in pending:
+            backend.enqueue(task)
+
+
+request_started.connect(_start_request, dispatch_uid='oscar_deferred_start')
+request_finished.connect(_finish_request, dispatch_uid='oscar_deferred_finish')
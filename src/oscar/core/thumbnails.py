@@ -1,12 +1,32 @@
+import hashlib
+import logging
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
 from django.apps import apps
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.module_loading import import_string
 
+logger = logging.getLogger('oscar.thumbnail')
+
 
 class AbstractThumbnailer(object):
     def generate_thumbnail(self, source, **opts):
         raise NotImplementedError
 
+    def get_existing_thumbnail(self, source, **opts):
+        """
+        Return the thumbnail of the source for the passed options if it has
+        been generated already, or ``None`` without generating it.
+        """
+        raise NotImplementedError
+
     def delete_thumbnails(self, source):
         raise NotImplementedError
 
@@ -17,21 +37,38 @@ class SorlThumbnail(AbstractThumbnailer):
         if not apps.is_installed('sorl.thumbnail'):
             raise ValueError('"sorl.thumbnail" is not listed in "INSTALLED_APPS".')
 
-    def generate_thumbnail(self, source, **opts):
-        from sorl.thumbnail import get_thumbnail
-
+    def get_geometry(self, size):
         # Sorl can accept only: "width x height", "width", "x height".
         # https://sorl-thumbnail.readthedocs.io/en/latest/template.html#geometry
         # So for example value '50x' must be converted to '50'.
-        size = opts.pop('size')
         width, height = size.split('x')
         # Set `size` to `width` if `height` is not provided.
-        size = size if height else width
+        return size if height else width
+
+    def generate_thumbnail(self, source, **opts):
+        from sorl.thumbnail import get_thumbnail
+
+        size = self.get_geometry(opts.pop('size'))
         return get_thumbnail(source, size, **opts)
 
+    def get_existing_thumbnail(self, source, **opts):
+        from sorl.thumbnail import default
+        from sorl.thumbnail.images import ImageFile
+
+        name = get_sorl_thumbnail_name(
+            source, self.get_geometry(opts.pop('size')), opts)
+        if name is None:
+            # The thumbnail can't be looked up without generating it
+            logger.warning(
+                "Existing thumbnails can't be looked up with sorl-thumbnail %s",
+                sorl_version())
+            return None
+        return default.kvstore.get(ImageFile(name, default.storage))
+
     def delete_thumbnails(self, source):
         from sorl.thumbnail import delete
         from sorl.thumbnail.helpers import ThumbnailError
+        thumbnail_url_cache.delete(source)
         try:
             delete(source)
         except ThumbnailError:
@@ -44,19 +81,250 @@ class EasyThumbnails(AbstractThumbnailer):
         if not apps.is_installed('easy_thumbnails'):
             raise ValueError('"easy_thumbnails" is not listed in "INSTALLED_APPS".')
 
-    def generate_thumbnail(self, source, **opts):
-        from easy_thumbnails.files import get_thumbnailer
+    def get_options(self, opts):
         width, height = opts['size'].split('x')
         width = width or 0
         height = height or 0
         opts['size'] = (width, height)
-        return get_thumbnailer(source).get_thumbnail(opts)
+        return opts
+
+    def generate_thumbnail(self, source, **opts):
+        from easy_thumbnails.files import get_thumbnailer
+        return get_thumbnailer(source).get_thumbnail(self.get_options(opts))
+
+    def get_existing_thumbnail(self, source, **opts):
+        from easy_thumbnails.files import get_thumbnailer
+        return get_thumbnailer(source).get_existing_thumbnail(
+            self.get_options(opts))
 
     def delete_thumbnails(self, source):
         from easy_thumbnails.files import get_thumbnailer
+        thumbnail_url_cache.delete(source)
         get_thumbnailer(source).delete(save=False)
 
 
+#: The sorl-thumbnail versions (from, up to but excluding) whose thumbnail
+#: names can be resolved by ``get_sorl_thumbnail_name``
+SORL_THUMBNAIL_VERSIONS = ((12, 4), (13, 0))
+
+
+def sorl_version():
+    import sorl
+    return getattr(sorl, '__version__', '')
+
+
+def get_sorl_thumbnail_name(source, geometry, options):
+    """
+    Return the name sorl-thumbnail gives the thumbnail of the source for the
+    passed geometry and options, or ``None`` if the installed version of
+    sorl-thumbnail isn't supported.
+
+    sorl-thumbnail has no public API to look a thumbnail up without
+    generating it, so this resolves the name like its backend does in
+    ``get_thumbnail``, which relies on private methods of the backend. Hence
+    it's only done for the versions in ``SORL_THUMBNAIL_VERSIONS``.
+    """
+    from sorl.thumbnail import default
+    from sorl.thumbnail.conf import defaults as default_settings
+    from sorl.thumbnail.conf import settings as sorl_settings
+    from sorl.thumbnail.images import ImageFile
+
+    try:
+        version = tuple(int(part) for part in sorl_version().split('.')[:2])
+    except ValueError:
+        return None
+    lowest, highest = SORL_THUMBNAIL_VERSIONS
+    if not lowest <= version < highest:
+        return None
+
+    backend = default.backend
+    options = dict(options)
+    source = ImageFile(source)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
+
+
 def get_thumbnailer():
     thumbnailer = import_string(settings.OSCAR_THUMBNAILER)
     return thumbnailer()
+
+
+class CachedThumbnail(object):
+    """
+    The URL and dimensions of a thumbnail, as stored in the thumbnail URL
+    cache
+    """
+
+    def __init__(self, url, width, height):
+        self.url = url
+        self.width = width
+        self.height = height
+
+    def __str__(self):
+        return self.url
+
+
+class ThumbnailURLCache(object):
+    """
+    Caches the URLs and dimensions of the thumbnails of each source image, so
+    that rendering a thumbnail that exists doesn't need a lookup in the key
+    value store or storage of the thumbnailer (see
+    ``OSCAR_THUMBNAIL_URL_CACHE_TIMEOUT``).
+
+    The thumbnails of a source are stored in a single entry of the Django
+    cache. The most recently used entries are also kept in process memory
+    for ``local_timeout`` seconds, which is how long other processes may keep
+    using thumbnails after ``delete`` was called for their source.
+    """
+    key_prefix = 'oscar_thumbnail_urls'
+    #: The number of sources whose thumbnails are kept in process memory
+    max_size = 1000
+    local_timeout = 60
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, source, options):
+        """
+        Return the cached thumbnail of the source for the passed options of
+        the ``oscar_thumbnail`` tag, or ``None``
+        """
+        name = self.get_name(source)
+        if not name:
+            return None
+        values = self.get_thumbnails(name).get(self.get_options_key(options))
+        if values is not None:
+            return CachedThumbnail(*values)
+
+    def set(self, source, options, thumbnail):
+        name = self.get_name(source)
+        if not name:
+            return
+        thumbnails = dict(self.get_thumbnails(name))
+        thumbnails[self.get_options_key(options)] = (
+            thumbnail.url, thumbnail.width, thumbnail.height)
+        cache.set(self.get_cache_key(name), thumbnails,
+                  settings.OSCAR_THUMBNAIL_URL_CACHE_TIMEOUT)
+        self.remember(name, thumbnails)
+
+    def delete(self, source):
+        """
+        Forget the thumbnails of the source, e.g. because they are deleted
+        """
+        name = self.get_name(source)
+        if not name:
+            return
+        cache.delete(self.get_cache_key(name))
+        with self.lock:
+            self.entries.pop(name, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_thumbnails(self, name):
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(name)
+                return entry[1]
+        thumbnails = cache.get(self.get_cache_key(name), {})
+        self.remember(name, thumbnails)
+        return thumbnails
+
+    def remember(self, name, thumbnails):
+        with self.lock:
+            self.entries[name] = (
+                time.monotonic() + self.local_timeout, thumbnails)
+            self.entries.move_to_end(name)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def get_name(self, source):
+        name = getattr(source, 'name', source)
+        return name if isinstance(name, str) else None
+
+    def get_cache_key(self, name):
+        return '%s_%s' % (self.key_prefix,
+                          hashlib.md5(name.encode('utf-8')).hexdigest())
+
+    def get_options_key(self, options):
+        # Thumbnails of other thumbnailers have other URLs
+        return repr((settings.OSCAR_THUMBNAILER, sorted(options.items())))
+
+
+thumbnail_url_cache = ThumbnailURLCache()
+
+
+def generate_missing_thumbnail(source, options):
+    """
+    Generate the thumbnail of the source for the passed options of the
+    ``oscar_thumbnail`` tag, unless it exists already. Returns whether the
+    thumbnail was generated.
+    """
+    thumbnailer = get_thumbnailer()
+    if thumbnailer.get_existing_thumbnail(source, **dict(options)) is not None:
+        return False
+    thumbnailer.generate_thumbnail(source, **dict(options))
+    return True
+
+
+def generate_thumbnails(tasks, processes=None, chunksize=10, batch_size=1000):
+    """
+    Generate the missing thumbnails of an iterable of (source, options)
+    tasks, using a pool of ``processes`` worker processes (one per CPU by
+    default), or the current process if ``processes`` is 1.
+
+    Returns a dict with the numbers of ``generated`` thumbnails, thumbnails
+    that were ``existing`` already and thumbnails that ``failed``.
+    """
+    counts = {'generated': 0, 'existing': 0, 'failed': 0}
+    if processes == 1:
+        results = map(_generate_missing_thumbnail, tasks)
+        _count_results(results, counts)
+        return counts
+
+    # Workers are spawned rather than forked, so that they don't share the
+    # database connections of this process (e.g. for sorl's key value store)
+    with ProcessPoolExecutor(
+            max_workers=processes, initializer=django.setup,
+            mp_context=multiprocessing.get_context('spawn')) as executor:
+        # Tasks are submitted in batches, as the executor would otherwise
+        # queue all of them at once
+        tasks = iter(tasks)
+        while True:
+            batch = list(islice(tasks, batch_size))
+            if not batch:
+                break
+            results = executor.map(
+                _generate_missing_thumbnail, batch, chunksize=chunksize)
+            _count_results(results, counts)
+    return counts
+
+
+def _generate_missing_thumbnail(task):
+    source, options = task
+    try:
+        return generate_missing_thumbnail(source, options)
+    except Exception:
+        logger.exception("Couldn't generate the thumbnail of %s with %s",
+                         source, options)
+        return None
+
+
+def _count_results(results, counts):
+    for generated in results:
+        if generated is None:
+            counts['failed'] += 1
+        elif generated:
+            counts['generated'] += 1
+        else:
+            counts['existing'] += 1
@@ -6,6 +6,7 @@ import unicodedata
 
 from babel.dates import format_timedelta as format_td
 from django.conf import settings
+from django.db.models.functions import Trunc
 from django.shortcuts import redirect, resolve_url
 from django.template.defaultfilters import date as date_filter
 from django.utils.http import url_has_allowed_host_and_scheme
@@ -131,6 +132,74 @@ def datetime_combine(date, time):
         datetime.datetime.combine(date, time), get_current_timezone())
 
 
+TIME_SERIES_INTERVALS = {
+    'hour': datetime.timedelta(hours=1),
+    'day': datetime.timedelta(days=1),
+    'week': datetime.timedelta(weeks=1),
+}
+
+
+def _truncate_datetime(value, interval):
+    if interval == 'hour':
+        # Subtract rather than replace so that an ambiguous hour keeps its
+        # UTC offset
+        return value - datetime.timedelta(
+            minutes=value.minute, seconds=value.second,
+            microseconds=value.microsecond)
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == 'week':
+        value -= datetime.timedelta(days=value.weekday())
+    if not is_naive(value):
+        value = make_aware(value.replace(tzinfo=None), get_current_timezone(),
+                           is_dst=False)
+    return value
+
+
+def time_series(queryset, field_name, interval, start, end, **aggregates):
+    """
+    Aggregate the objects of a queryset per hour, day or week of a datetime
+    field, using a single grouped query.
+
+    Returns a list of dicts with the ``start`` and ``end`` of each interval
+    between *start* (inclusive) and *end* (exclusive) and the values of the
+    passed aggregates, which are ``None`` for intervals without objects.
+    Intervals are aligned to the current timezone; weeks start on Monday.
+
+    :param interval: One of ``'hour'``, ``'day'`` or ``'week'``
+    """
+    if interval not in TIME_SERIES_INTERVALS:
+        raise ValueError("Unsupported interval '%s'" % interval)
+    if queryset.query.distinct:
+        # Grouping a distinct query with joins would count rows twice
+        queryset = queryset.model._default_manager.filter(
+            pk__in=queryset.values('pk'))
+    tzinfo = get_current_timezone() if settings.USE_TZ else None
+    rows = queryset.filter(**{
+        '%s__gte' % field_name: start,
+        '%s__lt' % field_name: end,
+    }).annotate(
+        period=Trunc(field_name, interval, tzinfo=tzinfo)
+    ).values('period').annotate(**aggregates).order_by('period')
+    values = {row.pop('period'): row for row in rows}
+
+    series = []
+    step = TIME_SERIES_INTERVALS[interval] * 1.5
+    period_start = _truncate_datetime(
+        start if is_naive(start) else start.astimezone(get_current_timezone()),
+        interval)
+    while period_start < end:
+        period_end = period_start + step
+        if not is_naive(period_end):
+            period_end = period_end.astimezone(get_current_timezone())
+        period_end = _truncate_datetime(period_end, interval)
+        item = {'start': period_start, 'end': period_end}
+        item.update(values.get(
+            period_start, dict.fromkeys(aggregates)))
+        series.append(item)
+        period_start = period_end
+    return series
+
+
 def safe_referrer(request, default):
     """
     Takes the request and a default URL. Returns HTTP_REFERER if it's safe
@@ -50,6 +50,25 @@ OSCAR_DASHBOARD_ITEMS_PER_PAGE = 20
 # Checkout
 OSCAR_ALLOW_ANON_CHECKOUT = False
 
+# Catalogue
+OSCAR_PRODUCT_ATTRIBUTE_INDEX = False
+
+# Orders
+OSCAR_ORDER_SEARCH_INDEX = False
+
+# Analytics
+OSCAR_ANALYTICS_BUFFER_COUNTERS = False
+OSCAR_ANALYTICS_BUFFER_MAX_SIZE = 1000
+OSCAR_ANALYTICS_BUFFER_FLUSH_INTERVAL = 10
+OSCAR_ANALYTICS_DAILY_PRODUCT_RECORDS = False
+OSCAR_ANALYTICS_COMPACT_AFTER_DAYS = 90
+OSCAR_ANALYTICS_DAILY_PRODUCT_RECORDS_RETENTION_DAYS = None
+OSCAR_ANALYTICS_ORDER_STATS_ROLLUPS = False
+
+# Deferred receivers
+OSCAR_DEFERRED_RECEIVERS_BACKEND = 'oscar.core.deferred.ImmediateBackend'
+OSCAR_DEFERRED_RECEIVERS_MAX_WORKERS = 2
+
 # Reviews
 OSCAR_ALLOW_ANON_REVIEWS = True
 OSCAR_MODERATE_REVIEWS = False
@@ -211,6 +230,15 @@ OSCAR_DASHBOARD_NAVIGATION = [
     },
 ]
 OSCAR_DASHBOARD_DEFAULT_ACCESS_FUNCTION = 'oscar.apps.dashboard.nav.default_access_fn'  # noqa
+OSCAR_DASHBOARD_NAVIGATION_CACHE_TIMEOUT = 60 * 60
+
+# Reports
+OSCAR_REPORTS_IN_BACKGROUND = False
+OSCAR_REPORTS_BACKEND = 'oscar.core.deferred.ThreadPoolBackend'
+OSCAR_REPORTS_FOLDER = 'reports'
+OSCAR_REPORTS_STORAGE = None
+OSCAR_REPORTS_EXPIRE_AFTER_DAYS = 7
+OSCAR_REPORTS_CHUNK_SIZE = 2000
 
 # Search facets
 OSCAR_SEARCH_FACETS = {
@@ -249,6 +277,20 @@ OSCAR_PRODUCT_SEARCH_HANDLER = None
 
 OSCAR_THUMBNAILER = 'oscar.core.thumbnails.SorlThumbnail'
 
+# The thumbnails generated ahead of time by the oscar_generate_thumbnails
+# command, as the options of the oscar_thumbnail tags in Oscar's templates
+OSCAR_THUMBNAIL_GEOMETRIES = [
+    {'size': 'x155', 'upscale': False},
+    {'size': '70x70', 'upscale': False},
+    {'size': '100x100', 'upscale': False},
+    {'size': '200x200', 'upscale': False},
+    {'size': '440x400', 'upscale': False},
+    {'size': '65x55', 'crop': 'center'},
+]
+OSCAR_THUMBNAIL_GENERATE_INLINE = True
+OSCAR_THUMBNAIL_GENERATE_ON_UPLOAD = False
+OSCAR_THUMBNAIL_URL_CACHE_TIMEOUT = 0
+
 OSCAR_URL_SCHEMA = 'http'
 
 OSCAR_SAVE_SENT_EMAILS_TO_DB = True
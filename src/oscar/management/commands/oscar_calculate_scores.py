@@ -2,9 +2,10 @@ import logging
 
 from django.core.management.base import BaseCommand
 
-from oscar.core.loading import get_class
+from oscar.core.loading import get_classes
 
-Calculator = get_class('analytics.scores', 'Calculator')
+Calculator, DecayedCalculator = get_classes(
+    'analytics.scores', ['Calculator', 'DecayedCalculator'])
 
 logger = logging.getLogger(__name__)
 
@@ -12,5 +13,27 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = 'Calculate product scores based on analytics data'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--half-life',
+            type=float,
+            help='calculate time-decayed scores from the daily product'
+                 ' records, using the given half-life in days.')
+        parser.add_argument(
+            '--window',
+            type=int,
+            help='the number of days of daily product records to include in'
+                 ' time-decayed scores.')
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='recalculate the time-decayed scores of all products instead'
+                 ' of only those with new activity.')
+
     def handle(self, *args, **options):
-        Calculator(logger).run()
+        if options['half_life'] or options['window'] or options['full']:
+            DecayedCalculator(
+                logger, half_life=options['half_life'],
+                window=options['window'], full=options['full']).run()
+        else:
+            Calculator(logger).run()
@@ -0,0 +1,56 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from oscar.core.loading import get_class, get_model
+
+Order = get_model('order', 'Order')
+EventHandler = get_class('order.processing', 'EventHandler')
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Command to move many orders to a new status in one go
+    """
+    help = "Change the status of the given orders, validating each transition"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'new_status',
+            help='the status to move the orders to.')
+        parser.add_argument(
+            '--number',
+            dest='numbers',
+            action='append',
+            default=[],
+            help='number of an order to change (can be given several times).')
+        parser.add_argument(
+            '--from-status',
+            dest='from_status',
+            help='change all orders currently having this status.')
+
+    def handle(self, *args, **options):
+        if not options['numbers'] and options['from_status'] is None:
+            raise CommandError(
+                "You need to specify either --number or --from-status")
+
+        orders = Order._default_manager.all()
+        if options['numbers']:
+            orders = orders.filter(number__in=options['numbers'])
+        if options['from_status'] is not None:
+            orders = orders.filter(status=options['from_status'])
+
+        new_status = options['new_status']
+        status_changes, invalid_orders = \
+            EventHandler().handle_bulk_order_status_change(
+                orders.values_list('pk', flat=True), new_status)
+
+        for order in invalid_orders:
+            logger.warning("'%s' is not a valid status for order %s"
+                           " (current status: '%s')",
+                           new_status, order.number, order.status)
+        self.stdout.write(
+            'Changed the status of %d orders to %s\n'
+            % (len(status_changes), new_status))
@@ -0,0 +1,34 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from oscar.core.loading import get_class
+
+Compactor = get_class('analytics.compaction', 'Compactor')
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ("Roll old product views and searches of users into daily"
+            " aggregates and delete them")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='compact records older than this number of days (defaults to'
+                 ' OSCAR_ANALYTICS_COMPACT_AFTER_DAYS).')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=Compactor.batch_size,
+            help='the number of records to compact per transaction.')
+
+    def handle(self, *args, **options):
+        num_views, num_searches = Compactor(
+            logger, days=options['days'],
+            batch_size=options['batch_size']).run()
+        self.stdout.write(
+            'Compacted %d product views and %d searches\n'
+            % (num_views, num_searches))
@@ -0,0 +1,30 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from oscar.core.loading import get_model
+
+ReportJob = get_model('reports_dashboard', 'ReportJob')
+
+
+class Command(BaseCommand):
+    help = "Delete report jobs generated in the background, and their files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='delete jobs older than this number of days (defaults to'
+                 ' OSCAR_REPORTS_EXPIRE_AFTER_DAYS).')
+
+    def handle(self, *args, **options):
+        days = options['days']
+        if days is None:
+            days = settings.OSCAR_REPORTS_EXPIRE_AFTER_DAYS
+        cutoff = timezone.now() - datetime.timedelta(days=days)
+        # The files are deleted by a post_delete receiver of the jobs
+        num_deleted, __ = ReportJob._default_manager.filter(
+            date_created__lt=cutoff).delete()
+        self.stdout.write('Deleted %d report jobs\n' % num_deleted)
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import get_current_timezone, is_naive, make_aware
+
+from oscar.core.loading import get_class
+
+ThumbnailGenerator = get_class('catalogue.utils', 'ThumbnailGenerator')
+
+
+class Command(BaseCommand):
+    help = """Generate the missing thumbnails of product images for the
+              geometries in OSCAR_THUMBNAIL_GEOMETRIES."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            dest='processes',
+            type=int,
+            default=None,
+            help='number of worker processes, by default one per CPU.')
+        parser.add_argument(
+            '--since',
+            dest='since',
+            default=None,
+            help='only check images created since this date or time, '
+                 'e.g. 2021-03-01 or "2021-03-01 12:00".')
+
+    def handle(self, *args, **options):
+        generator = ThumbnailGenerator(processes=options['processes'])
+        since = None
+        if options['since']:
+            since = self.parse_since(options['since'])
+        counts = generator.generate(generator.get_images(since=since))
+        self.stdout.write(
+            'Generated %(generated)s thumbnails, %(existing)s existed '
+            'already and %(failed)s failed\n' % counts)
+
+    def parse_since(self, value):
+        since = parse_datetime(value)
+        if since is None:
+            date = parse_date(value)
+            if date is None:
+                raise CommandError('Invalid date: %s' % value)
+            since = parse_datetime('%sT00:00' % date.isoformat())
+        if settings.USE_TZ and is_naive(since):
+            since = make_aware(since, get_current_timezone())
+        return since
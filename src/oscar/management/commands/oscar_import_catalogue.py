@@ -28,12 +28,25 @@ class Command(BaseCommand):
             dest='delimiter',
             default=",",
             help='Delimiter used within CSV file(s)')
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=CatalogueImporter.chunk_size,
+            help='Number of rows imported at once')
+        parser.add_argument(
+            '--workers',
+            dest='workers',
+            type=int,
+            default=1,
+            help='Number of threads importing chunks in parallel')
 
     def handle(self, *args, **options):
         logger.info("Starting catalogue import")
         importer = CatalogueImporter(
             logger, delimiter=options.get('delimiter'),
-            flush=options.get('flush'))
+            flush=options.get('flush'), chunk_size=options['chunk_size'],
+            workers=options['workers'])
         for file_path in options['filename']:
             logger.info(" - Importing records from '%s'" % file_path)
             try:
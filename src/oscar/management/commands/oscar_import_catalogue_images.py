@@ -1,4 +1,5 @@
 import logging
+import os
 
 from django.core.management.base import BaseCommand
 
@@ -21,8 +22,25 @@ class Command(BaseCommand):
             default='upc',
             help='Product field to lookup from image filename')
 
+        parser.add_argument(
+            '--workers',
+            dest='workers',
+            type=int,
+            default=None,
+            help='Number of threads checking and storing images')
+
+        parser.add_argument(
+            '--journal',
+            dest='journal',
+            default=None,
+            help='File recording the imported images, so that an interrupted'
+                 ' import can be resumed (default: the path followed by'
+                 ' ".journal")')
+
     def handle(self, *args, **options):
         logger.info("Starting image import")
         dirname = options['path']
-        importer = Importer(logger, field=options.get('filename'))
+        journal = options['journal'] or '%s.journal' % os.path.normpath(dirname)
+        importer = Importer(logger, field=options.get('filename'),
+                            workers=options['workers'], journal=journal)
         importer.handle(dirname)
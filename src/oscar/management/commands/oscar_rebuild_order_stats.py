@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from oscar.core.loading import get_class
+
+OrderStatsRollups = get_class('analytics.rollups', 'OrderStatsRollups')
+
+
+class Command(BaseCommand):
+    help = "Rebuild the order statistics rollups used by the dashboard"
+
+    def handle(self, *args, **options):
+        num_rollups = OrderStatsRollups().rebuild()
+        self.stdout.write(
+            'Successfully rebuilt %d order statistics rollups\n' % num_rollups)
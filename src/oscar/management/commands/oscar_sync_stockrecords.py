@@ -0,0 +1,45 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from oscar.core.loading import get_class
+
+StockSyncImporter = get_class('partner.importers', 'StockSyncImporter')
+ImportingError = get_class('partner.exceptions', 'ImportingError')
+
+logger = logging.getLogger('oscar.partner.sync')
+
+
+class Command(BaseCommand):
+    help = ('Update the prices and stock levels of stock records from CSV '
+            'files of partner name, partner SKU, price and number in stock')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'filename', nargs='+',
+            help='/path/to/file1.csv /path/to/file2.csv ...')
+        parser.add_argument(
+            '--delimiter',
+            dest='delimiter',
+            default=",",
+            help='Delimiter used within CSV file(s)')
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=StockSyncImporter.batch_size,
+            help='Number of rows compared and updated at once')
+
+    def handle(self, *args, **options):
+        importer = StockSyncImporter(
+            logger, delimiter=options['delimiter'],
+            batch_size=options['batch_size'])
+        num_changed = 0
+        for file_path in options['filename']:
+            logger.info(" - Synchronising stock records with '%s'" % file_path)
+            try:
+                num_changed += len(importer.handle(file_path))
+            except ImportingError as e:
+                raise CommandError(str(e))
+        self.stdout.write(
+            'Successfully updated %s stock records\n' % num_changed)
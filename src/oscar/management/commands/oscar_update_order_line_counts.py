@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from oscar.core.loading import get_model
+
+Order = get_model('order', 'Order')
+Line = get_model('order', 'Line')
+
+
+class Command(BaseCommand):
+    help = """Recalculate the denormalised number of lines and items on all
+              Order instances. Only necessary to backfill orders placed before
+              these counts were stored."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=5000,
+            help='number of orders updated per query.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        lines = Line._default_manager.filter(
+            order=OuterRef('pk')).order_by().values('order')
+        num_lines = lines.annotate(count=Count('id')).values('count')
+        num_items = lines.annotate(total=Sum('quantity')).values('total')
+
+        ids = Order._default_manager.order_by('pk').values_list('pk', flat=True)
+        num_updated, last_id = 0, 0
+        while True:
+            batch = list(ids.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1]
+            num_updated += Order._default_manager.filter(
+                pk__gte=batch[0], pk__lte=last_id,
+            ).update(
+                num_lines=Coalesce(
+                    Subquery(num_lines, output_field=IntegerField()), 0),
+                num_items=Coalesce(
+                    Subquery(num_items, output_field=IntegerField()), 0),
+            )
+        self.stdout.write(
+            'Successfully updated %s orders\n' % num_updated)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from oscar.core.loading import get_class
+
+OrderSearchIndexer = get_class('order.utils', 'OrderSearchIndexer')
+
+
+class Command(BaseCommand):
+    help = """(Re)build the search terms used by the dashboard to search
+              orders when OSCAR_ORDER_SEARCH_INDEX is enabled."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=1000,
+            help='number of orders indexed at a time.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        indexer = OrderSearchIndexer()
+        orders = indexer.get_indexing_queryset()
+
+        num_indexed, last_id = 0, 0
+        while True:
+            batch = list(orders.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            indexer.index_orders(batch)
+            num_indexed += len(batch)
+            last_id = batch[-1].pk
+        self.stdout.write('Successfully indexed %s orders\n' % num_indexed)
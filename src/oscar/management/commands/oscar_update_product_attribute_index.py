@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from oscar.core.loading import get_class
+
+ProductAttributeIndexer = get_class('catalogue.utils', 'ProductAttributeIndexer')
+
+
+class Command(BaseCommand):
+    help = """(Re)build the attribute values products are filtered and sorted
+              by when OSCAR_PRODUCT_ATTRIBUTE_INDEX is enabled."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=1000,
+            help='number of products indexed at a time.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        indexer = ProductAttributeIndexer()
+        products = indexer.get_indexing_queryset()
+
+        num_indexed, last_id = 0, 0
+        while True:
+            batch = list(products.filter(pk__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            indexer.index_products(batch)
+            num_indexed += len(batch)
+            last_id = batch[-1].pk
+        self.stdout.write('Successfully indexed %s products\n' % num_indexed)
@@ -10,12 +10,31 @@ Product = get_model('catalogue', 'Product')
 class Command(BaseCommand):
     help = """Update the denormalised reviews average on all Product instances.
               Should only be necessary when changing to e.g. a weight-based
-              rating."""
+              rating by overriding Product.calculate_rating(), which is then
+              called for every product."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=10000,
+            help='number of products checked per UPDATE statement.')
 
     def handle(self, *args, **options):
-        # Iterate over all Products (not just ones with reviews)
-        products = Product.objects.all()
-        for product in products:
-            product.update_rating()
+        batch_size = options['batch_size']
+        products = Product._default_manager.order_by('pk')
+
+        # Each batch is a single UPDATE over a range of primary keys, which
+        # only writes the products whose rating changed
+        num_updated, last_id = 0, 0
+        while True:
+            pks = list(products.filter(pk__gt=last_id).values_list(
+                'pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            num_updated += products.filter(
+                pk__gte=pks[0], pk__lte=pks[-1]).update_ratings()
+            last_id = pks[-1]
         self.stdout.write(
-            'Successfully updated %s products\n' % products.count())
+            'Successfully updated %s products\n' % num_updated)
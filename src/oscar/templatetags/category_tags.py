@@ -1,4 +1,7 @@
+import bisect
+
 from django import template
+from django.utils.translation import get_language
 
 from oscar.core.loading import get_model
 
@@ -67,69 +70,130 @@ class CheapCategoryInfo(dict, metaclass=CategoryFieldPassThroughMetaClass):
         yield self
 
 
+def _get_full_slug(category, parent_slug):
+    return category.get_full_slug(parent_slug)
+
+
+class CategoryTree(object):
+    """
+    An in-memory copy of the browsable categories, in tree order, with their
+    full slug and URL.
+
+    A copy is kept per process and language, and the annotated lists of the
+    ``category_tree`` tag are kept per depth and parent. They are discarded
+    when ``Category.get_tree_version()`` changes, i.e. when a category is
+    saved, moved or deleted.
+    """
+    _cache = {'version': None, 'trees': {}, 'lists': {}}
+
+    def __init__(self, categories):
+        self.categories = list(categories)
+        self.paths = [category.path for category in self.categories]
+        # The full slugs are joined in a single pass, without looking up the
+        # cached slugs, unless the slugs or URLs are customised
+        get_full_slug = None
+        if Category.has_custom_full_slug():
+            get_full_slug = _get_full_slug
+        full_slugs = Category.get_full_slugs(self.categories, get_full_slug)
+        if Category.has_custom_url():
+            self.urls = {
+                category.pk: category._get_absolute_url(
+                    full_slugs.get(category.path[:-category.steplen]))
+                for category in self.categories}
+        else:
+            self.urls = {
+                category.pk: category.get_url_for_full_slug(
+                    full_slugs[category.path])
+                for category in self.categories}
+
+    @classmethod
+    def _get_cache(cls):
+        version = Category.get_tree_version()
+        if cls._cache['version'] != version:
+            cls._cache = {'version': version, 'trees': {}, 'lists': {}}
+        return cls._cache
+
+    @classmethod
+    def get(cls):
+        trees = cls._get_cache()['trees']
+        language = get_language()
+        if language not in trees:
+            trees[language] = cls(Category.get_tree().browsable())
+        return trees[language]
+
+    @classmethod
+    def get_annotated_list(cls, max_depth=None, parent=None):
+        lists = cls._get_cache()['lists']
+        key = (get_language(), max_depth, parent.pk if parent else None)
+        if key not in lists:
+            lists[key] = cls.get().annotate(max_depth, parent)
+        return list(lists[key])
+
+    def get_branch(self, max_depth=None, parent=None):
+        """
+        Return the categories below the parent, or all categories, up to the
+        given depth below it
+        """
+        if parent:
+            start = bisect.bisect_right(self.paths, parent.path)
+            end = bisect.bisect_left(
+                self.paths, parent.path + chr(0x10FFFF), lo=start)
+            categories = self.categories[start:end]
+            if max_depth is not None:
+                max_depth += parent.depth
+        else:
+            categories = self.categories
+        if max_depth is not None:
+            categories = [category for category in categories
+                          if category.depth <= max_depth]
+        return categories
+
+    def annotate(self, max_depth=None, parent=None):
+        """
+        Borrows heavily from treebeard's get_annotated_list
+        """
+        annotated_categories = []
+        start_depth, prev_depth = (None, None)
+        info = CheapCategoryInfo(parent, url="")
+
+        for node in self.get_branch(max_depth, parent):
+            node_depth = node.depth
+            if start_depth is None:
+                start_depth = node_depth
+
+            # Update previous node's info
+            if prev_depth is None or node_depth > prev_depth:
+                info["has_children"] = True
+
+            if prev_depth is not None and node_depth < prev_depth:
+                info["num_to_close"] = list(range(0, prev_depth - node_depth))
+
+            info = CheapCategoryInfo(
+                node,
+                url=self.urls[node.pk],
+                num_to_close=[],
+                level=node_depth - start_depth,
+            )
+            annotated_categories.append(info)
+
+            prev_depth = node_depth
+
+        if prev_depth is not None:
+            # close last leaf
+            info['num_to_close'] = list(range(0, prev_depth - start_depth))
+            info['has_children'] = prev_depth > prev_depth
+
+        return annotated_categories
+
+
 @register.simple_tag(name="category_tree")
-def get_annotated_list(depth=None, parent=None):    # noqa: C901 too complex
+def get_annotated_list(depth=None, parent=None):
     """
     Gets an annotated list from a tree branch.
 
-    Borrows heavily from treebeard's get_annotated_list
+    The list is sliced from an in-memory copy of the category tree, see
+    ``CategoryTree``.
     """
     # 'depth' is the backwards-compatible name for the template tag,
     # 'max_depth' is the better variable name.
-    max_depth = depth
-
-    annotated_categories = []
-    tree_slug = ""
-
-    start_depth, prev_depth = (None, None)
-    if parent:
-        categories = parent.get_descendants()
-        tree_slug = parent.get_full_slug()
-        if max_depth is not None:
-            max_depth += parent.get_depth()
-    else:
-        categories = Category.get_tree()
-
-    if max_depth is not None:
-        categories = categories.filter(depth__lte=max_depth)
-
-    categories = categories.browsable()
-
-    info = CheapCategoryInfo(parent, url="")
-
-    for node in categories:
-        node_depth = node.get_depth()
-        if start_depth is None:
-            start_depth = node_depth
-
-        # Update previous node's info
-        if prev_depth is None or node_depth > prev_depth:
-            info["has_children"] = True
-            if info.category is not None:
-                tree_slug = info.category.get_full_slug(tree_slug)
-
-        if prev_depth is not None and node_depth < prev_depth:
-            depth_difference = prev_depth - node_depth
-            info["num_to_close"] = list(range(0, depth_difference))
-            tree_slugs = tree_slug.rsplit(node._slug_separator, depth_difference)
-            if tree_slugs:
-                tree_slug = tree_slugs[0]
-            else:
-                tree_slug = node.slug
-
-        info = CheapCategoryInfo(
-            node,
-            url=node._get_absolute_url(tree_slug),
-            num_to_close=[],
-            level=node_depth - start_depth,
-        )
-        annotated_categories.append(info)
-
-        prev_depth = node_depth
-
-    if prev_depth is not None:
-        # close last leaf
-        info['num_to_close'] = list(range(0, prev_depth - start_depth))
-        info['has_children'] = prev_depth > prev_depth
-
-    return annotated_categories
+    return CategoryTree.get_annotated_list(max_depth=depth, parent=parent)
@@ -7,7 +7,10 @@ from django.db.models.fields.files import ImageFieldFile
 from django.utils.encoding import smart_str
 from django.utils.html import escape
 
-from oscar.core.thumbnails import get_thumbnailer
+from oscar.core.loading import get_class
+from oscar.core.thumbnails import get_thumbnailer, thumbnail_url_cache
+
+MissingProductImage = get_class('catalogue.models', 'MissingProductImage')
 
 register = template.Library()
 kw_pat = re.compile(r'^(?P<key>[\w]+)=(?P<value>.+)$')
@@ -122,8 +125,21 @@ class ThumbnailNode(template.Node):
             value = self.no_resolve.get(str(expr), expr.resolve(context))
             options[key] = value
 
-        thumbnailer = get_thumbnailer()
-        thumbnail = thumbnailer.generate_thumbnail(source, **options)
+        # Cached thumbnails only have the url, width and height attributes,
+        # which is documented for the "as" form of the tag
+        use_cache = bool(settings.OSCAR_THUMBNAIL_URL_CACHE_TIMEOUT)
+        thumbnail = None
+        if use_cache:
+            thumbnail = thumbnail_url_cache.get(source, options)
+        if thumbnail is None:
+            thumbnailer = get_thumbnailer()
+            if settings.OSCAR_THUMBNAIL_GENERATE_INLINE:
+                thumbnail = thumbnailer.generate_thumbnail(source, **dict(options))
+                if use_cache:
+                    thumbnail_url_cache.set(source, options, thumbnail)
+            else:
+                thumbnail = self.get_existing_thumbnail(
+                    thumbnailer, source, options, use_cache)
 
         if self.context_name is None:
             return escape(thumbnail.url)
@@ -131,6 +147,23 @@ class ThumbnailNode(template.Node):
             context[self.context_name] = thumbnail
             return ''
 
+    def get_existing_thumbnail(self, thumbnailer, source, options,
+                               use_cache=False):
+        """
+        Return the thumbnail if it has been generated already, e.g. by the
+        ``oscar_generate_thumbnails`` command, or a thumbnail of the "missing
+        image" image otherwise, which is only generated once per geometry.
+        """
+        thumbnail = thumbnailer.get_existing_thumbnail(source, **dict(options))
+        if thumbnail is None:
+            return thumbnailer.generate_thumbnail(
+                MissingProductImage().name, **options)
+        if use_cache:
+            # Placeholders aren't cached, as they are replaced once the
+            # thumbnail has been generated
+            thumbnail_url_cache.set(source, options, thumbnail)
+        return thumbnail
+
 
 def oscar_thumbnail(parser, token):
     return ThumbnailNode(parser, token)
@@ -103,6 +103,7 @@ class OrderFactory(factory.django.DjangoModelFactory):
                 obj.basket.add_product(product)
             for line in obj.basket.all_lines():
                 OrderCreator().create_line_models(obj, line)
+            obj.update_line_counts()
 
 
 class OrderLineFactory(factory.django.DjangoModelFactory):
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogue', '0021_auto_20201005_0844'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedAttributeValue',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=128, verbose_name='Code')),
+                ('value_text', models.CharField(blank=True, max_length=255, null=True, verbose_name='Text')),
+                ('value_number', models.FloatField(blank=True, null=True, verbose_name='Number')),
+                ('value_boolean', models.BooleanField(blank=True, null=True, verbose_name='Boolean')),
+                ('value_date', models.DateField(blank=True, null=True, verbose_name='Date')),
+                ('value_datetime', models.DateTimeField(blank=True, null=True, verbose_name='DateTime')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indexed_attribute_values', to='catalogue.product', verbose_name='Product')),
+            ],
+            options={
+                'verbose_name': 'Indexed attribute value',
+                'verbose_name_plural': 'Indexed attribute values',
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='indexedattributevalue',
+            index=models.Index(fields=['code', 'value_text'], name='catalogue_attr_index_text'),
+        ),
+        migrations.AddIndex(
+            model_name='indexedattributevalue',
+            index=models.Index(fields=['code', 'value_number'], name='catalogue_attr_index_number'),
+        ),
+        migrations.AddIndex(
+            model_name='indexedattributevalue',
+            index=models.Index(fields=['code', 'value_boolean'], name='catalogue_attr_index_boolean'),
+        ),
+        migrations.AddIndex(
+            model_name='indexedattributevalue',
+            index=models.Index(fields=['code', 'value_date'], name='catalogue_attr_index_date'),
+        ),
+        migrations.AddIndex(
+            model_name='indexedattributevalue',
+            index=models.Index(fields=['code', 'value_datetime'], name='catalogue_attr_index_datetime'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from decimal import Decimal as D
 
+from django.test import override_settings
 from django.urls import reverse
 
 from oscar.apps.dashboard.views import IndexView
@@ -185,3 +186,9 @@ class TestDashboardIndexStatsForNonStaffUser(WebTestCase):
         self.assertEqual(context['total_orders'], 9)
         self.assertEqual(context['total_lines'], 9)
         self.assertEqual(context['total_revenue'], D(288))
+
+
+@override_settings(OSCAR_ANALYTICS_ORDER_STATS_ROLLUPS=True)
+class TestDashboardIndexStatsFromRollupsForNonStaffUser(
+        TestDashboardIndexStatsForNonStaffUser):
+    pass
@@ -1,13 +1,14 @@
 from http import client as http_client
 
 from django.conf import settings
+from django.test import override_settings
 from django.urls import reverse
 
 from oscar.apps.order.models import (
     Order, OrderNote, PaymentEvent, PaymentEventType)
 from oscar.core.loading import get_model
 from oscar.test.factories import (
-    PartnerFactory, ShippingAddressFactory, SourceTypeFactory,
+    PartnerFactory, ShippingAddressFactory, SourceTypeFactory, UserFactory,
     create_basket, create_order)
 from oscar.test.testcases import WebTestCase
 
@@ -35,6 +36,28 @@ class TestOrderListDashboard(WebTestCase):
         form['selected_order'].checked = True
         form.submit('download_selected')
 
+    def test_streams_csv_of_search_results(self):
+        order = create_order(shipping_address=ShippingAddressFactory())
+        response = self.get(
+            reverse('dashboard:order-list'), params={'response_format': 'csv'})
+        self.assertEqual('text/csv', response['Content-Type'])
+        rows = response.text.splitlines()
+        self.assertEqual(2, len(rows))
+        self.assertTrue(rows[0].startswith('Order number,'))
+        self.assertIn(str(order.number), rows[1])
+        self.assertIn(',%d,' % order.num_items, rows[1])
+
+    def test_streams_csv_of_selected_orders(self):
+        order = create_order(shipping_address=ShippingAddressFactory())
+        create_order()
+        page = self.get(reverse('dashboard:order-list'))
+        form = page.forms['orders_form']
+        form['selected_order'] = [order.pk]
+        response = form.submit('action', value='download_selected_orders')
+        rows = response.text.splitlines()
+        self.assertEqual(2, len(rows))
+        self.assertIn(str(order.number), rows[1])
+
     def test_allows_order_number_search(self):
         page = self.get(reverse('dashboard:order-list'))
         form = page.forms['search_form']
@@ -214,6 +237,41 @@ class TestOrderListSearch(WebTestCase):
             self.assertEqual(applied_filters, expected_filters)
 
 
+@override_settings(OSCAR_ORDER_SEARCH_INDEX=True)
+class TestOrderListSearchIndex(WebTestCase):
+    is_staff = True
+
+    def setUp(self):
+        super().setUp()
+        self.order = create_order()
+        self.other_order = create_order()
+        self.line = self.order.lines.get()
+
+    def search(self, **params):
+        params.setdefault('order_number', '')
+        response = self.get(reverse('dashboard:order-list'), params=params)
+        return list(response.context['orders'])
+
+    def test_finds_orders_by_product_title_prefix(self):
+        self.line.title = 'The Art of War'
+        self.line.save()
+        self.assertEqual([self.order], self.search(product_title='the art'))
+
+    def test_finds_orders_by_upc_and_partner_sku(self):
+        self.line.upc = 'UPC-1234'
+        self.line.save()
+        self.assertEqual([self.order], self.search(upc='upc-1234'))
+        self.assertEqual(
+            [self.order], self.search(partner_sku=self.line.partner_sku))
+        self.assertEqual([], self.search(upc='unknown'))
+
+    def test_finds_orders_by_customer_name(self):
+        self.order.user = UserFactory(first_name='Barry', last_name='Smith')
+        self.order.save()
+        self.assertEqual([self.order], self.search(name='barry'))
+        self.assertEqual([self.order], self.search(name='Bob Smith'))
+
+
 class TestOrderDetailPage(WebTestCase):
     is_staff = True
 
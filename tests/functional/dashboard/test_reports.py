@@ -1,7 +1,15 @@
+import shutil
+import tempfile
+
+from django.test import override_settings
 from django.urls import reverse
 
+from oscar.apps.dashboard.reports.models import ReportJob
+from oscar.test.factories import UserFactory, create_order
 from oscar.test.testcases import WebTestCase
 
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
 
 class ReportsDashboardTests(WebTestCase):
     is_staff = True
@@ -39,3 +47,42 @@ class ReportsDashboardTests(WebTestCase):
         response.form['download'] = 'true'
         response.form.submit()
         self.assertIsOk(response)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, OSCAR_REPORTS_IN_BACKGROUND=True,
+                   OSCAR_REPORTS_BACKEND='oscar.core.deferred.ImmediateBackend')
+class BackgroundReportsDashboardTests(WebTestCase):
+    is_staff = True
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_download_generates_report_in_background(self):
+        create_order(user=self.user)
+        response = self.get(reverse('dashboard:reports-index'))
+        response.form['report_type'] = 'order_report'
+        response.form['download'] = 'true'
+        with self.captureOnCommitCallbacks(execute=True):
+            response = response.form.submit()
+        self.assertRedirects(response, reverse('dashboard:reports-jobs'))
+
+        job = ReportJob.objects.get()
+        self.assertEqual(self.user, job.user)
+        self.assertEqual(ReportJob.COMPLETE, job.status)
+
+        response = response.follow()
+        self.assertContains(response, reverse('dashboard:reports-job-download', kwargs={'pk': job.pk}))
+        response = self.get(reverse('dashboard:reports-job-download', kwargs={'pk': job.pk}))
+        self.assertIsOk(response)
+        self.assertIn('attachment', response['Content-Disposition'])
+
+    def test_reports_of_other_users_cannot_be_downloaded(self):
+        job = ReportJob.objects.create(
+            user=UserFactory(is_staff=True), report_type='order_report',
+            status=ReportJob.COMPLETE)
+        response = self.get(
+            reverse('dashboard:reports-job-download', kwargs={'pk': job.pk}),
+            status=404)
+        self.assertEqual(404, response.status_code)
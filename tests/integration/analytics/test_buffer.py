@@ -0,0 +1,116 @@
+import threading
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from oscar.apps.analytics.buffer import CounterBuffer, counter_buffer
+from oscar.apps.analytics.models import (
+    ProductRecord, UserProductView, UserRecord)
+from oscar.apps.analytics.receivers import receive_product_view
+from oscar.test.factories import ProductFactory, UserFactory
+
+
+@override_settings(OSCAR_ANALYTICS_BUFFER_MAX_SIZE=100,
+                   OSCAR_ANALYTICS_BUFFER_FLUSH_INTERVAL=3600)
+class TestCounterBuffer(TestCase):
+
+    def setUp(self):
+        self.buffer = CounterBuffer()
+        patcher = mock.patch.object(self.buffer, 'start_flusher')
+        self.start_flusher = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.product = ProductFactory()
+        self.user = UserFactory()
+
+    def test_accumulates_until_flushed(self):
+        for __ in range(3):
+            self.buffer.increment(
+                ProductRecord, 'product_id', self.product.pk, 'num_views')
+        self.buffer.add_product_view(self.user.pk, self.product.pk)
+        self.assertFalse(ProductRecord.objects.exists())
+
+        self.buffer.flush()
+
+        self.assertEqual(3, ProductRecord.objects.get().num_views)
+        self.assertEqual(1, UserProductView.objects.count())
+        self.assertEqual(0, len(self.buffer))
+
+    def test_writes_several_counters_of_a_record_together(self):
+        other = ProductFactory()
+        ProductRecord.objects.create(product=self.product, num_views=5)
+        self.buffer.increment(
+            ProductRecord, 'product_id', self.product.pk, 'num_views', 3)
+        self.buffer.increment(
+            ProductRecord, 'product_id', other.pk, 'num_basket_additions')
+
+        # The upsert and the savepoint around it
+        with self.assertNumQueries(3):
+            self.buffer.flush()
+
+        record = ProductRecord.objects.get(product=self.product)
+        self.assertEqual((8, 0), (record.num_views, record.num_basket_additions))
+        record = ProductRecord.objects.get(product=other)
+        self.assertEqual((0, 1), (record.num_views, record.num_basket_additions))
+
+    def test_full_buffer_is_only_swapped_when_recording(self):
+        with self.settings(OSCAR_ANALYTICS_BUFFER_MAX_SIZE=2), \
+                self.assertNumQueries(0):
+            self.buffer.increment(
+                UserRecord, 'user_id', self.user.pk, 'num_product_views')
+            self.buffer.add_product_view(self.user.pk, self.product.pk)
+        self.assertEqual(0, len(self.buffer))
+        self.assertEqual(1, len(self.buffer.batches))
+        self.assertTrue(self.buffer.wakeup.is_set())
+        self.start_flusher.assert_called_with()
+
+        self.buffer.flush()
+        self.assertEqual(1, UserRecord.objects.get().num_product_views)
+        self.assertEqual([], self.buffer.batches)
+
+    def test_flusher_waits_for_the_interval(self):
+        with self.settings(OSCAR_ANALYTICS_BUFFER_FLUSH_INTERVAL=0):
+            self.buffer.wait_for_flush()
+        self.assertFalse(self.buffer.wakeup.is_set())
+
+    def test_flusher_is_started_once(self):
+        buffer = CounterBuffer()
+        started = threading.Event()
+        with mock.patch.object(buffer, '_run_flusher', side_effect=started.wait):
+            buffer.start_flusher()
+            flusher = buffer.flusher
+            buffer.start_flusher()
+            self.assertIs(flusher, buffer.flusher)
+            self.assertTrue(flusher.daemon)
+            started.set()
+        flusher.join()
+
+    def test_failing_flush_leaves_the_transaction_usable(self):
+        self.buffer.increment(
+            ProductRecord, 'product_id', self.product.pk, 'num_views')
+        # Inserting a product view with an existing primary key fails
+        UserProductView.objects.create(user=self.user, product=self.product)
+        self.buffer.product_views.append(UserProductView(
+            pk=UserProductView.objects.get().pk, user=self.user,
+            product=self.product))
+
+        self.buffer.flush()
+
+        self.assertFalse(ProductRecord.objects.exists())
+        self.assertEqual(1, UserProductView.objects.count())
+
+
+@override_settings(OSCAR_ANALYTICS_BUFFER_COUNTERS=True,
+                   OSCAR_ANALYTICS_BUFFER_FLUSH_INTERVAL=3600)
+class TestBufferedProductViews(TestCase):
+
+    @mock.patch.object(counter_buffer, 'start_flusher')
+    def test_product_views_are_buffered(self, start_flusher):
+        product, user = ProductFactory(), UserFactory()
+
+        receive_product_view(sender=self, product=product, user=user)
+        self.assertFalse(ProductRecord.objects.exists())
+
+        counter_buffer.flush()
+        self.assertEqual(1, ProductRecord.objects.get().num_views)
+        self.assertEqual(1, UserRecord.objects.get().num_product_views)
+        self.assertEqual(1, UserProductView.objects.count())
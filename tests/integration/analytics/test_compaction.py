@@ -0,0 +1,88 @@
+import datetime
+import logging
+
+from django.test import TestCase, override_settings
+from django.utils.timezone import localdate, now
+
+from oscar.apps.analytics.compaction import Compactor
+from oscar.apps.analytics.models import (
+    DailyUserProductView, DailyUserSearch, ProductDailyRecord,
+    UserProductView, UserSearch)
+from oscar.apps.analytics.utils import (
+    get_search_queries, get_viewed_product_ids)
+from oscar.test.factories import ProductFactory, UserFactory
+
+logger = logging.getLogger(__name__)
+
+
+class TestCompactor(TestCase):
+
+    def setUp(self):
+        self.user = UserFactory()
+        self.products = [ProductFactory(), ProductFactory()]
+
+    def view(self, product, days_ago):
+        view = UserProductView.objects.create(user=self.user, product=product)
+        view.date_created = now() - datetime.timedelta(days=days_ago)
+        view.save()
+
+    def search(self, query, days_ago):
+        search = UserSearch.objects.create(user=self.user, query=query)
+        search.date_created = now() - datetime.timedelta(days=days_ago)
+        search.save()
+
+    def test_keeps_daily_product_records_by_default(self):
+        ProductDailyRecord.objects.create(
+            product=self.products[0],
+            date=localdate() - datetime.timedelta(days=400), num_views=1)
+        Compactor(logger).run()
+        self.assertTrue(ProductDailyRecord.objects.exists())
+
+    @override_settings(OSCAR_ANALYTICS_DAILY_PRODUCT_RECORDS_RETENTION_DAYS=30)
+    def test_deletes_daily_product_records_after_retention_period(self):
+        for days_ago in (40, 10):
+            ProductDailyRecord.objects.create(
+                product=self.products[0],
+                date=localdate() - datetime.timedelta(days=days_ago),
+                num_views=1)
+        Compactor(logger).run()
+        self.assertEqual(
+            [localdate() - datetime.timedelta(days=10)],
+            list(ProductDailyRecord.objects.values_list('date', flat=True)))
+
+    def test_compacts_old_records_into_daily_aggregates(self):
+        old, recent = self.products
+        for days_ago in (40, 40, 50):
+            self.view(old, days_ago)
+        self.view(recent, 1)
+        self.search('shirt', 40)
+        self.search('shirt', 40)
+        self.search('shoes', 1)
+
+        self.assertEqual((3, 2), Compactor(logger, days=30, batch_size=2).run())
+
+        self.assertEqual(recent, UserProductView.objects.get().product)
+        self.assertEqual(
+            [1, 2], sorted(DailyUserProductView.objects.filter(
+                product=old).values_list('num_views', flat=True)))
+        self.assertEqual('shoes', UserSearch.objects.get().query)
+        self.assertEqual(2, DailyUserSearch.objects.get(query='shirt').num_searches)
+
+    def test_adds_to_existing_aggregates(self):
+        self.view(self.products[0], 40)
+        Compactor(logger, days=30).run()
+        self.view(self.products[0], 40)
+        Compactor(logger, days=30).run()
+        self.assertEqual(2, DailyUserProductView.objects.get().num_views)
+
+    def test_history_includes_compacted_records(self):
+        old, recent = self.products
+        self.view(old, 40)
+        self.view(recent, 1)
+        self.search('shirt', 40)
+        self.search('shoes', 1)
+        Compactor(logger, days=30).run()
+
+        self.assertEqual([recent.pk, old.pk], get_viewed_product_ids(self.user))
+        self.assertEqual(['shoes', 'shirt'], get_search_queries(self.user))
+        self.assertEqual(['shoes'], get_search_queries(self.user, limit=1))
@@ -0,0 +1,93 @@
+from decimal import Decimal as D
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from oscar.apps.analytics.counters import upsert_counters
+from oscar.apps.analytics.models import ProductRecord, UserRecord
+from oscar.apps.analytics.receivers import receive_order_placed
+from oscar.test.basket import add_products
+from oscar.test.factories import (
+    ProductFactory, UserFactory, create_basket, create_order)
+
+
+class TestUpsertCounters(TestCase):
+
+    def setUp(self):
+        self.existing, self.missing = ProductFactory(), ProductFactory()
+        ProductRecord.objects.create(
+            product=self.existing, num_views=5, num_purchases=1)
+        self.rows = [
+            {'product_id': self.existing.pk, 'num_views': 3},
+            {'product_id': self.missing.pk, 'num_views': 2},
+        ]
+
+    def assert_counters_updated(self):
+        record = ProductRecord.objects.get(product=self.existing)
+        self.assertEqual((8, 1), (record.num_views, record.num_purchases))
+        record = ProductRecord.objects.get(product=self.missing)
+        self.assertEqual((2, 0), (record.num_views, record.num_purchases))
+
+    def test_increments_existing_rows_and_creates_missing_ones(self):
+        with self.assertNumQueries(1):
+            upsert_counters(ProductRecord, 'product_id', self.rows,
+                            increment_fields=['num_views'])
+        self.assert_counters_updated()
+
+    def test_falls_back_to_update_or_create(self):
+        with mock.patch('oscar.apps.analytics.counters.supports_upsert',
+                        return_value=False):
+            upsert_counters(ProductRecord, 'product_id', self.rows,
+                            increment_fields=['num_views'])
+        self.assert_counters_updated()
+
+    def test_overwrites_update_fields(self):
+        user = UserFactory()
+        first, second = timezone.now() - timezone.timedelta(days=1), timezone.now()
+        for date in (first, second):
+            upsert_counters(
+                UserRecord, 'user_id',
+                [{'user_id': user.pk, 'num_orders': 1,
+                  'total_spent': D('9.99'), 'date_last_order': date}],
+                increment_fields=['num_orders', 'total_spent'],
+                update_fields=['date_last_order'])
+
+        record = UserRecord.objects.get(user=user)
+        self.assertEqual(2, record.num_orders)
+        self.assertEqual(D('19.98'), record.total_spent)
+        self.assertEqual(second, record.date_last_order)
+
+
+class TestOrderPlacedRecording(TestCase):
+
+    def test_records_purchases_and_user_order(self):
+        user = UserFactory()
+        # Placing the order records it once
+        order = create_order(user=user)
+        product = order.lines.get().product
+
+        receive_order_placed(sender=self, order=order, user=user)
+
+        self.assertEqual(
+            2, ProductRecord.objects.get(product=product).num_purchases)
+        record = UserRecord.objects.get(user=user)
+        self.assertEqual(2, record.num_orders)
+        self.assertEqual(2 * order.num_items, record.num_order_items)
+        self.assertEqual(2 * order.total_incl_tax, record.total_spent)
+
+    def test_uses_a_constant_number_of_queries(self):
+        user = UserFactory()
+        basket = create_basket(empty=True)
+        add_products(basket, [(D('5.00'), 2), (D('3.00'), 1), (D('7.00'), 4)])
+        order = create_order(user=user, basket=basket)
+
+        # One query to aggregate the lines and one upsert per record model
+        with self.assertNumQueries(3):
+            receive_order_placed(sender=self, order=order, user=user)
+
+        # The order was recorded once when it was placed
+        self.assertEqual(
+            [2, 4, 8],
+            sorted(ProductRecord.objects.values_list(
+                'num_purchases', flat=True)))
@@ -0,0 +1,83 @@
+from decimal import Decimal as D
+
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from oscar.apps.analytics.models import OrderStatsRollup
+from oscar.apps.analytics.rollups import SHOP, OrderStatsRollups
+from oscar.core.loading import get_model
+from oscar.test.factories import (
+    UserFactory, create_basket, create_order, create_product)
+
+Order = get_model('order', 'Order')
+
+
+@override_settings(OSCAR_ANALYTICS_ORDER_STATS_ROLLUPS=True)
+class TestOrderStatsRollups(TestCase):
+
+    def setUp(self):
+        self.customer = UserFactory()
+        self.product1 = create_product(partner_name='Partner 1', price=D(5))
+        self.product2 = create_product(partner_name='Partner 2', price=D(10))
+        self.partner1 = self.product1.stockrecords.get().partner
+        self.partner2 = self.product2.stockrecords.get().partner
+
+    def place_order(self, *products, **kwargs):
+        basket = create_basket(empty=True)
+        for product in products:
+            basket.add_product(product)
+        return create_order(basket=basket, user=self.customer, **kwargs)
+
+    def get_stats(self, partner_key=SHOP):
+        return OrderStatsRollups().get_stats(partner_key, now())
+
+    def test_are_updated_when_orders_are_placed(self):
+        order1 = self.place_order(self.product1, self.product2)
+        order2 = self.place_order(self.product2)
+
+        stats = self.get_stats()
+        self.assertEqual(2, stats['total_orders_last_day'])
+        self.assertEqual(3, stats['total_lines'])
+        self.assertEqual(order1.total_incl_tax + order2.total_incl_tax,
+                         stats['total_revenue'])
+        self.assertEqual(1, stats['total_customers'])
+        self.assertEqual(1, stats['total_customers_last_day'])
+
+        stats = self.get_stats(self.partner1.pk)
+        self.assertEqual(1, stats['total_orders'])
+        self.assertEqual(1, stats['total_lines'])
+        self.assertEqual(order1.total_incl_tax, stats['total_revenue'])
+        self.assertEqual(1, stats['total_customers'])
+
+        stats = self.get_stats(self.partner2.pk)
+        self.assertEqual((2, 2, 1), (stats['total_orders'], stats['total_lines'],
+                                     stats['total_customers']))
+
+    def test_track_status_changes(self):
+        order1 = self.place_order(self.product1, status='A')
+        order2 = self.place_order(self.product2, status='A')
+        order1.pipeline = order2.pipeline = {'A': ('B',), 'B': ()}
+        order1.set_status('B')
+        Order.bulk_set_status([order2], 'B')
+
+        self.assertEqual([{'status': 'B', 'freq': 2}],
+                         list(self.get_stats()['order_status_breakdown']))
+        self.assertEqual([{'status': 'B', 'freq': 1}],
+                         list(self.get_stats(self.partner1.pk)['order_status_breakdown']))
+
+    def test_can_be_rebuilt(self):
+        self.place_order(self.product1, self.product2)
+        self.place_order(self.product2)
+        stats = {key: self.get_stats(key)
+                 for key in (SHOP, self.partner1.pk, self.partner2.pk)}
+
+        OrderStatsRollup.objects.all().delete()
+        OrderStatsRollups().rebuild()
+
+        for key, expected in stats.items():
+            actual = self.get_stats(key)
+            for name in ('total_orders', 'total_lines', 'total_revenue',
+                         'total_customers'):
+                self.assertEqual(expected[name], actual[name])
+            self.assertEqual(list(expected['order_status_breakdown']),
+                             list(actual['order_status_breakdown']))
@@ -0,0 +1,101 @@
+import datetime
+import logging
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils.timezone import localdate
+
+from oscar.apps.analytics.models import ProductDailyRecord, ProductRecord
+from oscar.apps.analytics.receivers import receive_product_view
+from oscar.apps.analytics.scores import DecayedCalculator
+from oscar.test.factories import ProductFactory
+
+logger = logging.getLogger(__name__)
+
+
+class TestDecayedCalculator(TestCase):
+
+    def setUp(self):
+        self.today = localdate()
+        self.recent, self.old = ProductFactory(), ProductFactory()
+
+    def record(self, product, days_ago, **counts):
+        return ProductDailyRecord.objects.create(
+            product=product, date=self.today - datetime.timedelta(days=days_ago),
+            **counts)
+
+    def calculate(self, **kwargs):
+        kwargs.setdefault('half_life', 7)
+        DecayedCalculator(logger, **kwargs).run()
+
+    def score(self, product):
+        return ProductRecord.objects.get(product=product).score
+
+    def test_recent_activity_outweighs_older_activity(self):
+        self.record(self.recent, 0, num_views=10)
+        self.record(self.old, 14, num_views=30)
+        self.calculate()
+        self.assertGreater(self.score(self.recent), self.score(self.old))
+
+        # Two half-lives later, the old activity counts for a quarter
+        self.record(self.old, 0, num_views=3)
+        self.calculate()
+        self.assertLess(self.score(self.recent), self.score(self.old))
+
+    def test_only_updates_products_with_new_activity(self):
+        self.record(self.recent, 1, num_views=1)
+        self.record(self.old, 1, num_views=1)
+        self.calculate()
+        ProductRecord.objects.filter(product=self.old).update(score=-1)
+
+        self.record(self.recent, 0, num_purchases=1)
+        self.calculate()
+
+        self.assertEqual(-1, self.score(self.old))
+        self.assertGreater(self.score(self.recent), 0)
+
+        self.calculate(full=True)
+        self.assertGreater(self.score(self.old), 0)
+
+    def test_ignores_but_keeps_records_outside_the_window(self):
+        self.record(self.recent, 0, num_views=1)
+        self.record(self.old, 10, num_views=1)
+        self.calculate(window=30)
+        self.assertGreater(self.score(self.old), 0)
+
+        self.calculate(window=7)
+        self.assertTrue(
+            ProductDailyRecord.objects.filter(product=self.old).exists())
+        self.assertEqual(0, self.score(self.old))
+        self.assertGreater(self.score(self.recent), 0)
+
+        # The records count again once they are within the window
+        self.calculate(window=30)
+        self.assertGreater(self.score(self.old), 0)
+
+    def test_log_sum(self):
+        self.assertAlmostEqual(
+            3, DecayedCalculator.log_sum([1, 1, 2]))
+        self.assertAlmostEqual(
+            5001.5849625, DecayedCalculator.log_sum([5000, 5000, 5000]))
+
+
+@override_settings(OSCAR_ANALYTICS_DAILY_PRODUCT_RECORDS=True)
+class TestDailyProductRecords(TestCase):
+
+    def test_are_recorded_for_product_views(self):
+        product = ProductFactory()
+        for __ in range(2):
+            receive_product_view(sender=self, product=product, user=None)
+        record = ProductDailyRecord.objects.get()
+        self.assertEqual((product.pk, localdate(), 2),
+                         (record.product_id, record.date, record.num_views))
+
+
+class OscarCalculateScoresTestCase(TestCase):
+
+    def test_uses_the_decayed_calculator_when_given_a_half_life(self):
+        with mock.patch.object(DecayedCalculator, 'run') as run:
+            call_command('oscar_calculate_scores', half_life=3, window=30)
+        self.assertTrue(run.called)
@@ -3,8 +3,10 @@ from django.test import TestCase
 
 from oscar.apps.catalogue.reviews import models
 from oscar.core.compat import get_user_model
+from oscar.core.loading import get_model
 from oscar.test.factories import UserFactory, create_product
 
+Product = get_model('catalogue', 'Product')
 User = get_user_model()
 
 
@@ -165,3 +167,54 @@ class TestVotingOnAReview(TestCase):
         self.review.vote_up(self.voter)
         is_allowed, reason = self.review.can_user_vote(self.voter)
         self.assertFalse(is_allowed, reason)
+
+
+class TestProductRating(TestCase):
+
+    def setUp(self):
+        self.product = create_product()
+
+    def add_review(self, score, status=models.ProductReview.APPROVED):
+        return self.product.reviews.create(
+            title='Review', body='Body', score=score, status=status,
+            user=UserFactory())
+
+    def test_is_the_average_score_of_approved_reviews(self):
+        self.add_review(2)
+        self.add_review(5)
+        self.add_review(0, status=models.ProductReview.FOR_MODERATION)
+        self.product.refresh_from_db()
+        self.assertEqual(3.5, self.product.rating)
+
+    def test_is_updated_when_a_review_is_approved_or_deleted(self):
+        review = self.add_review(4, status=models.ProductReview.FOR_MODERATION)
+        self.assertIsNone(self.product.rating)
+
+        review = models.ProductReview.objects.get(pk=review.pk)
+        review.status = models.ProductReview.APPROVED
+        review.save()
+        self.assertEqual(4, review.product.rating)
+
+        review.delete()
+        self.product.refresh_from_db()
+        self.assertIsNone(self.product.rating)
+
+    def test_is_not_recalculated_when_votes_change(self):
+        review = self.add_review(4)
+        voter = UserFactory()
+        # Inserting the vote, and aggregating and saving the vote totals
+        with self.assertNumQueries(3):
+            review.vote_up(voter)
+
+    def test_update_ratings_only_writes_changed_products(self):
+        self.add_review(4)
+        other_product = create_product()
+        Product.objects.filter(pk=self.product.pk).update(rating=None)
+
+        products = Product.objects.all()
+        self.assertEqual(1, products.update_ratings())
+        self.assertEqual(0, products.update_ratings())
+        self.product.refresh_from_db()
+        other_product.refresh_from_db()
+        self.assertEqual(4, self.product.rating)
+        self.assertIsNone(other_product.rating)
@@ -0,0 +1,143 @@
+import datetime
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from oscar.apps.catalogue.models import IndexedAttributeValue, Product
+from oscar.apps.catalogue.utils import ProductAttributeIndexer
+from oscar.test import factories
+
+
+class TestProductAttributeIndexer(TestCase):
+
+    def setUp(self):
+        self.product_class = factories.ProductClassFactory()
+        self.product = factories.ProductFactory(product_class=self.product_class)
+        self.option_group = factories.AttributeOptionGroupFactory()
+        self.red = factories.AttributeOptionFactory(
+            group=self.option_group, option='red')
+        self.blue = factories.AttributeOptionFactory(
+            group=self.option_group, option='blue')
+        for code, type in [('weight', 'float'), ('published', 'date'),
+                           ('colour', 'option'), ('colours', 'multi_option'),
+                           ('description', 'richtext')]:
+            factories.ProductAttributeFactory(
+                code=code, name=code, type=type,
+                product_class=self.product_class,
+                option_group=self.option_group
+                if type in ('option', 'multi_option') else None)
+
+    def set_attributes(self, product, **values):
+        for code, value in values.items():
+            setattr(product.attr, code, value)
+        product.attr.save()
+
+    def test_indexes_typed_values(self):
+        self.set_attributes(
+            self.product, weight=2.5, published=datetime.date(2021, 1, 1),
+            colour=self.red, colours=[self.red, self.blue],
+            description='<p>Not indexed</p>')
+
+        self.assertCountEqual(
+            ProductAttributeIndexer().get_values(self.product), [
+                ('weight', 'value_number', 2.5),
+                ('published', 'value_date', datetime.date(2021, 1, 1)),
+                ('colour', 'value_text', 'red'),
+                ('colours', 'value_text', 'red'),
+                ('colours', 'value_text', 'blue'),
+            ])
+
+    def test_replaces_existing_values(self):
+        self.set_attributes(self.product, weight=2.5)
+        indexer = ProductAttributeIndexer()
+        indexer.index(self.product)
+        indexer.index(self.product)
+        self.assertEqual(1, self.product.indexed_attribute_values.count())
+
+    def test_products_are_not_indexed_by_default(self):
+        self.set_attributes(self.product, weight=2.5)
+        self.assertFalse(IndexedAttributeValue.objects.exists())
+
+    @override_settings(OSCAR_PRODUCT_ATTRIBUTE_INDEX=True)
+    def test_saved_values_are_indexed_when_enabled(self):
+        self.set_attributes(self.product, weight=2.5, colours=[self.red])
+        self.assertTrue(Product.objects.filter_by_attributes(
+            weight=2.5, colours='red').exists())
+
+        self.set_attributes(self.product, weight=3, colours=[self.blue])
+        self.assertFalse(Product.objects.filter_by_attributes(
+            weight=2.5).exists())
+        self.assertFalse(Product.objects.filter_by_attributes(
+            colours='red').exists())
+        self.assertTrue(Product.objects.filter_by_attributes(
+            weight__gt=2.5, colours='blue').exists())
+
+        self.set_attributes(self.product, weight=None)
+        self.assertFalse(self.product.indexed_attribute_values.filter(
+            code='weight').exists())
+
+    @override_settings(OSCAR_PRODUCT_ATTRIBUTE_INDEX=True)
+    def test_product_is_indexed_once_per_save(self):
+        with mock.patch.object(ProductAttributeIndexer, 'index_products') as index_products:
+            self.set_attributes(
+                self.product, weight=2.5, published=datetime.date(2021, 1, 1),
+                colours=[self.red, self.blue])
+        index_products.assert_called_once_with([self.product])
+
+    @override_settings(OSCAR_PRODUCT_ATTRIBUTE_INDEX=True)
+    def test_long_text_is_filtered_by_attribute_values(self):
+        factories.ProductAttributeFactory(
+            code='subtitle', name='subtitle', type='text',
+            product_class=self.product_class)
+        subtitle = 'x' * 300
+        self.set_attributes(self.product, subtitle=subtitle)
+        self.assertFalse(self.product.indexed_attribute_values.exists())
+        self.assertTrue(Product.objects.filter_by_attributes(
+            subtitle=subtitle).exists())
+        self.assertTrue(Product.objects.filter_by_attributes(
+            subtitle__in=[subtitle]).exists())
+
+    @override_settings(OSCAR_PRODUCT_ATTRIBUTE_INDEX=True)
+    def test_renamed_options_are_reindexed(self):
+        self.set_attributes(self.product, colour=self.red)
+        self.red.option = 'crimson'
+        self.red.save()
+        self.assertTrue(Product.objects.filter_by_attributes(
+            colour='crimson').exists())
+
+    @override_settings(OSCAR_PRODUCT_ATTRIBUTE_INDEX=True)
+    def test_filters_on_unindexed_types_use_attribute_values(self):
+        self.set_attributes(self.product, weight=2.5, description='<p>Hi</p>')
+        self.assertTrue(Product.objects.filter_by_attributes(
+            weight=2.5, description='<p>Hi</p>').exists())
+
+    def test_order_by_attribute(self):
+        light = factories.ProductFactory(product_class=self.product_class)
+        unweighed = factories.ProductFactory(product_class=self.product_class)
+        self.set_attributes(self.product, weight=2.5)
+        self.set_attributes(light, weight=1)
+        ProductAttributeIndexer().index_products(Product.objects.all())
+        expected = [light, self.product, unweighed]
+
+        for indexed in (False, True):
+            with self.settings(OSCAR_PRODUCT_ATTRIBUTE_INDEX=indexed):
+                products = Product.objects.filter(
+                    pk__in=[product.pk for product in expected])
+                self.assertEqual(
+                    expected, list(products.order_by_attribute('weight')))
+                self.assertEqual(
+                    [self.product, light, unweighed],
+                    list(products.order_by_attribute('weight', descending=True)))
+
+    def test_management_command_builds_index(self):
+        other_product = factories.ProductFactory(product_class=self.product_class)
+        self.set_attributes(self.product, weight=2.5)
+        self.set_attributes(other_product, colour=self.blue)
+        out = io.StringIO()
+        call_command('oscar_update_product_attribute_index', batch_size=1,
+                     stdout=out)
+        self.assertIn('Successfully indexed 2 products', out.getvalue())
+        self.assertTrue(self.product.indexed_attribute_values.exists())
+        self.assertTrue(other_product.indexed_attribute_values.exists())
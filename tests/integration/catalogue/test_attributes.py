@@ -45,6 +45,66 @@ class TestContainer(TestCase):
         assert product.attr.a1 == "v2"
 
 
+class TestWithAttributes(TestCase):
+
+    def setUp(self):
+        self.product_class = factories.ProductClassFactory()
+        self.product_class.attributes.create(name='Size', code='size', type='text')
+        self.product_class.attributes.create(name='Weight', code='weight', type='integer')
+        group = factories.AttributeOptionGroupFactory()
+        self.options = [factories.AttributeOptionFactory(group=group, option=option)
+                        for option in ('red', 'blue')]
+        self.product_class.attributes.create(
+            name='Colour', code='colour', type='option', option_group=group)
+        self.product_class.attributes.create(
+            name='Colours', code='colours', type='multi_option', option_group=group)
+
+        for weight in range(3):
+            product = factories.ProductFactory(product_class=self.product_class)
+            product.attr.size = 'L'
+            product.attr.weight = weight
+            product.attr.colour = self.options[0]
+            product.attr.colours = self.options
+            product.attr.save()
+
+        self.parent = factories.ProductFactory(
+            product_class=self.product_class, structure='parent')
+        self.parent.attr.size = 'M'
+        self.parent.attr.weight = 10
+        self.parent.attr.save()
+        self.child = factories.ProductFactory(
+            parent=self.parent, product_class=None, structure='child')
+        self.child.attr.weight = 20
+        self.child.attr.save()
+
+    def test_loads_attributes_with_constant_number_of_queries(self):
+        with self.assertNumQueries(3):
+            products = list(Product.objects.filter(
+                product_class=self.product_class, structure='standalone').with_attributes())
+        with self.assertNumQueries(0):
+            for product in products:
+                self.assertEqual('L', product.attr.size)
+                self.assertEqual(self.options[0], product.attr.colour)
+                self.assertEqual(set(self.options), set(product.attr.colours))
+                self.assertEqual(4, len(list(product.attr)))
+                self.assertTrue(product.attribute_summary)
+
+    def test_child_products_inherit_parent_attributes(self):
+        child = Product.objects.with_attributes().get(pk=self.child.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(20, child.attr.weight)
+            self.assertEqual('M', child.attr.size)
+            summary = child.attribute_summary
+        self.assertEqual(Product.objects.get(pk=self.child.pk).attribute_summary, summary)
+
+    def test_saving_discards_prefetched_values(self):
+        product = Product.objects.filter(
+            product_class=self.product_class, structure='standalone').with_attributes().first()
+        product.attr.size = 'XL'
+        product.attr.save()
+        self.assertIn('XL', [value.value for value in product.attr])
+
+
 class TestBooleanAttributes(TestCase):
 
     def setUp(self):
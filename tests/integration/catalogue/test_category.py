@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from unittest import mock
+
 from django.core.cache import cache
 from django.test import TestCase
 from django.test.utils import override_settings
@@ -76,6 +78,9 @@ class TestMovingACategory(TestCase):
         # Reload horror instance to pick up changes
         self.horror = Category.objects.get(name="Horror")
 
+    def tearDown(self):
+        cache.clear()
+
     def test_updates_instance_name(self):
         self.assertEqual('Books > Non-fiction > Horror', self.horror.full_name)
 
@@ -203,6 +208,7 @@ class TestCategoryTemplateTags(TestCase):
         """
 
     def setUp(self):
+        cache.clear()
         breadcrumbs = (
             'Books > Fiction > Horror > Teen',
             'Books > Fiction > Horror > Gothic',
@@ -252,3 +258,106 @@ class TestCategoryTemplateTags(TestCase):
         actual_categories = self.get_category_names(depth=1, parent=parent)
         expected_categories = {'Horror', 'Comedy'}
         self.assertEqual(expected_categories, actual_categories)
+
+    def test_tree_is_reused_until_categories_change(self):
+        get_annotated_list()
+        with self.assertNumQueries(0):
+            get_annotated_list()
+            get_annotated_list(depth=2)
+
+        Category.objects.get(name="Children").delete()
+        self.assertNotIn('Children', self.get_category_names())
+
+        Category.objects.get(name="Comedy").move(
+            Category.objects.get(name="Non-fiction"), pos='last-child')
+        comedy = [info for info in get_annotated_list() if info.name == 'Comedy'][0]
+        self.assertEqual(comedy.get_absolute_url(), '/catalogue/category/books/non-fiction/comedy_%s/' % comedy.pk)
+
+        Category.objects.filter(name="Fiction").update(is_public=False)
+        Category.objects.get(name="Fiction").save()
+        self.assertNotIn('Fiction', self.get_category_names())
+
+    def test_urls_are_built_by_the_categories(self):
+        def _get_absolute_url(category, parent_slug=None):
+            return '/%s/' % category.get_full_slug(parent_slug).upper()
+
+        Category.bump_tree_version()
+        with mock.patch.object(Category, '_get_absolute_url', _get_absolute_url):
+            annotated = {info.name: info for info in get_annotated_list()}
+        self.assertEqual('/BOOKS/FICTION/COMEDY/', annotated['Comedy']['url'])
+
+    def test_full_slugs_are_joined_without_the_cache(self):
+        with mock.patch.object(Category, 'get_tree_version', return_value='new'), \
+                mock.patch('oscar.apps.catalogue.abstract_models.cache') as mock_cache:
+            annotated = {info.name: info for info in get_annotated_list()}
+        mock_cache.get.assert_not_called()
+        mock_cache.set.assert_not_called()
+        comedy = Category.objects.get(name='Comedy')
+        self.assertEqual(comedy.get_absolute_url(), annotated['Comedy']['url'])
+
+    def test_custom_full_slugs_are_used(self):
+        def get_full_slug(category, parent_slug=None):
+            return category.join_full_slug(parent_slug).upper()
+
+        Category.bump_tree_version()
+        with mock.patch.object(Category, 'get_full_slug', get_full_slug):
+            self.assertTrue(Category.has_custom_full_slug())
+            annotated = {info.name: info for info in get_annotated_list()}
+        self.assertFalse(Category.has_custom_full_slug())
+        self.assertIn('/BOOKS/FICTION/COMEDY_', annotated['Comedy']['url'])
+
+    def test_annotations(self):
+        annotated = {info.name: info for info in get_annotated_list(depth=2)}
+        self.assertTrue(annotated['Books']['has_children'])
+        self.assertEqual(0, annotated['Books']['level'])
+        self.assertEqual(1, annotated['Fiction']['level'])
+        self.assertEqual([0], annotated['Children']['num_to_close'])
+
+
+class TestCategoryFullSlugs(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for trail in ('A > B > C', 'A > B > D', 'A > E', 'F > G'):
+            create_from_breadcrumbs(trail)
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cache_full_slugs_of_all_categories(self):
+        with self.assertNumQueries(1):
+            full_slugs = Category.cache_full_slugs()
+        self.assertEqual(
+            {'a', 'a/b', 'a/b/c', 'a/b/d', 'a/e', 'f', 'f/g'}, set(full_slugs.values()))
+        d = Category.objects.get(name='D')
+        self.assertEqual('a/b/d', cache.get(d.get_url_cache_key()))
+
+    def test_cache_full_slugs_of_subtree(self):
+        b = Category.objects.get(name='B')
+        with self.assertNumQueries(1):
+            full_slugs = Category.cache_full_slugs(b.path)
+        self.assertEqual({'a/b', 'a/b/c', 'a/b/d'}, set(full_slugs.values()))
+
+    def test_cache_miss_caches_ancestors(self):
+        b, c, d = [Category.objects.get(name=name) for name in 'BCD']
+        with self.assertNumQueries(1):
+            self.assertEqual('a/b/c', c.get_full_slug())
+        with self.assertNumQueries(0):
+            self.assertEqual('a/b', b.get_full_slug())
+        self.assertIsNone(cache.get(d.get_url_cache_key()))
+
+    def test_saving_without_changing_the_slug_keeps_cached_slugs(self):
+        b = Category.objects.get(name='B')
+        b.description = 'Changed'
+        with mock.patch.object(Category, 'cache_full_slugs') as cache_full_slugs:
+            b.save()
+        cache_full_slugs.assert_not_called()
+
+    def test_renaming_updates_subtree_slugs(self):
+        Category.cache_full_slugs()
+        b = Category.objects.get(name='B')
+        b.slug = 'bee'
+        b.save()
+        d = Category.objects.get(name='D')
+        self.assertEqual('a/bee/d', cache.get(d.get_url_cache_key()))
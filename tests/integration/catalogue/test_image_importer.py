@@ -0,0 +1,90 @@
+import logging
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+from PIL import Image
+
+from oscar.apps.catalogue.exceptions import ImageImportError
+from oscar.apps.catalogue.models import ProductImage
+from oscar.apps.catalogue.utils import Importer
+from oscar.test.factories import create_product
+from oscar.test.utils import remove_image_folders
+
+logger = logging.getLogger('oscar.catalogue.import')
+
+
+class TestImageImporter(TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.journal = os.path.join(tempfile.mkdtemp(), 'import.journal')
+        self.addCleanup(shutil.rmtree, self.dirname)
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.journal))
+        self.addCleanup(remove_image_folders)
+
+    def create_image(self, filename, colour='red'):
+        Image.new('RGB', (10, 10), colour).save(
+            os.path.join(self.dirname, filename))
+
+    def importer(self, **kwargs):
+        kwargs.setdefault('journal', self.journal)
+        return Importer(logger, field='upc', **kwargs)
+
+    def test_imports_images_of_matching_products(self):
+        product = create_product(upc='123')
+        other_product = create_product(upc='456')
+        self.create_image('123.jpg')
+        self.create_image('456.png', colour='blue')
+        self.create_image('789.jpg')
+
+        importer = self.importer(workers=2)
+        importer.batch_size = 2
+        with self.assertLogs(logger, 'INFO') as logs:
+            importer.handle(self.dirname)
+
+        self.assertEqual(1, product.images.count())
+        self.assertEqual(1, other_product.images.count())
+        self.assertIn('2 imported, 1 skipped', logs.output[-1])
+        self.assertFalse(os.path.exists(self.journal))
+
+    def test_skips_identical_images(self):
+        product = create_product(upc='123')
+        self.create_image('123.jpg')
+        self.importer().handle(self.dirname)
+        self.importer().handle(self.dirname)
+        self.assertEqual(1, product.images.count())
+
+        self.create_image('123.jpg', colour='blue')
+        self.importer().handle(self.dirname)
+        self.assertEqual([0, 1], [image.display_order
+                                  for image in product.images.all()])
+
+    def test_resumes_from_the_journal(self):
+        product = create_product(upc='123')
+        other_product = create_product(upc='456')
+        self.create_image('123.jpg')
+        self.create_image('456.jpg', colour='blue')
+        with open(self.journal, 'w') as f:
+            f.write('123.jpg\n')
+
+        self.importer().handle(self.dirname)
+
+        self.assertFalse(product.images.exists())
+        self.assertEqual(1, other_product.images.count())
+
+    def test_invalid_images_abort_the_import_after_committed_batches(self):
+        create_product(upc='123')
+        self.create_image('123.jpg')
+        with open(os.path.join(self.dirname, '456.jpg'), 'w') as f:
+            f.write('not an image')
+
+        importer = self.importer()
+        importer.batch_size = 1
+        with self.assertRaises(ImageImportError):
+            importer.handle(self.dirname)
+
+        self.assertEqual(1, ProductImage.objects.count())
+        with open(self.journal) as f:
+            self.assertEqual('123.jpg\n', f.read())
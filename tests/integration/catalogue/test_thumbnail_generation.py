@@ -0,0 +1,117 @@
+import io
+from unittest import mock
+
+from django import template
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from oscar.apps.catalogue.utils import ThumbnailGenerator
+from oscar.core.thumbnails import generate_thumbnails
+from oscar.test.factories import ProductImageFactory
+
+GEOMETRIES = [{'size': 'x155', 'upscale': False}, {'size': '70x70'}]
+
+
+class FakeThumbnailer(object):
+    """
+    Records generated thumbnails instead of resizing images
+    """
+
+    def __init__(self):
+        self.thumbnails = {}
+
+    def get_key(self, source, opts):
+        return (str(source), tuple(sorted(opts.items())))
+
+    def generate_thumbnail(self, source, **opts):
+        thumbnail = mock.Mock(url='/thumbnails/%s' % source)
+        self.thumbnails[self.get_key(source, opts)] = thumbnail
+        return thumbnail
+
+    def get_existing_thumbnail(self, source, **opts):
+        return self.thumbnails.get(self.get_key(source, opts))
+
+
+class ThumbnailerTestCase(TestCase):
+
+    def setUp(self):
+        self.thumbnailer = FakeThumbnailer()
+        for target in ('oscar.templatetags.image_tags.get_thumbnailer',
+                       'oscar.core.thumbnails.get_thumbnailer'):
+            patcher = mock.patch(target, return_value=self.thumbnailer)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+@override_settings(OSCAR_THUMBNAIL_GEOMETRIES=GEOMETRIES)
+class TestThumbnailGenerator(ThumbnailerTestCase):
+
+    def test_generates_missing_thumbnails_of_all_geometries(self):
+        images = ProductImageFactory.create_batch(2)
+        generator = ThumbnailGenerator(processes=1)
+
+        counts = generator.generate()
+        self.assertEqual(
+            {'generated': 4, 'existing': 0, 'failed': 0}, counts)
+        for image in images:
+            for options in GEOMETRIES:
+                self.assertIsNotNone(self.thumbnailer.get_existing_thumbnail(
+                    image.original.name, **options))
+
+        counts = generator.generate()
+        self.assertEqual(
+            {'generated': 0, 'existing': 4, 'failed': 0}, counts)
+
+    def test_counts_failed_thumbnails(self):
+        ProductImageFactory()
+        with mock.patch.object(self.thumbnailer, 'generate_thumbnail',
+                               side_effect=IOError):
+            counts = ThumbnailGenerator(processes=1).generate()
+        self.assertEqual(
+            {'generated': 0, 'existing': 0, 'failed': 2}, counts)
+
+    def test_generates_thumbnails_in_worker_processes(self):
+        # The workers are spawned and set up Django themselves, so they use
+        # the real thumbnailer, which fails for a missing source
+        counts = generate_thumbnails(
+            [('images/missing.jpg', {'size': '70x70'})], processes=2)
+        self.assertEqual(
+            {'generated': 0, 'existing': 0, 'failed': 1}, counts)
+
+    def test_management_command(self):
+        ProductImageFactory()
+        out = io.StringIO()
+        call_command('oscar_generate_thumbnails', processes=1,
+                     since='2000-01-01', stdout=out)
+        self.assertIn('Generated 2 thumbnails, 0 existed already and 0 failed',
+                      out.getvalue())
+
+    @override_settings(OSCAR_THUMBNAIL_GENERATE_ON_UPLOAD=True)
+    def test_thumbnails_are_generated_on_upload_when_enabled(self):
+        image = ProductImageFactory()
+        for options in GEOMETRIES:
+            self.assertIsNotNone(self.thumbnailer.get_existing_thumbnail(
+                image.original.name, **options))
+
+
+@override_settings(OSCAR_THUMBNAIL_GENERATE_INLINE=False)
+class TestThumbnailTagWithoutInlineGeneration(ThumbnailerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.image = ProductImageFactory()
+        self.template = template.Template(
+            '{% load image_tags %}'
+            '{% oscar_thumbnail image.original "x155" upscale=False %}')
+        self.context = template.Context({'image': self.image})
+
+    def test_serves_a_placeholder_until_the_thumbnail_exists(self):
+        self.assertEqual('/thumbnails/image_not_found.jpg',
+                         self.template.render(self.context))
+        self.assertIsNone(self.thumbnailer.get_existing_thumbnail(
+            self.image.original, size='x155', upscale=False))
+
+        self.thumbnailer.generate_thumbnail(
+            self.image.original, size='x155', upscale=False)
+        self.assertEqual('/thumbnails/%s' % self.image.original,
+                         self.template.render(self.context))
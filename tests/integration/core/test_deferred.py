@@ -0,0 +1,141 @@
+from unittest import mock
+
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.dispatch import Signal
+from django.test import TestCase, override_settings
+
+from oscar.core import deferred
+from oscar.core.deferred import Task, deferred_receiver, get_backend
+
+test_signal = Signal()
+calls = []
+
+
+@deferred_receiver(test_signal)
+def record_call(sender, value, **kwargs):
+    calls.append(value)
+
+
+class TestTask(TestCase):
+
+    def test_retries_failing_functions(self):
+        func = mock.Mock(side_effect=[ValueError, ValueError, 'done'])
+        with self.assertLogs('oscar.deferred', 'WARNING') as logs:
+            Task(func, max_retries=2).run()
+        self.assertEqual(3, func.call_count)
+        self.assertEqual(2, len(logs.records))
+
+    def test_logs_the_final_failure(self):
+        func = mock.Mock(side_effect=ValueError)
+        with self.assertLogs('oscar.deferred', 'ERROR'):
+            Task(func, max_retries=1).run()
+        self.assertEqual(2, func.call_count)
+
+    def test_isnt_retried_by_default(self):
+        func = mock.Mock(side_effect=ValueError)
+        with self.assertLogs('oscar.deferred', 'ERROR'):
+            Task(func).run()
+        self.assertEqual(1, func.call_count)
+
+    def test_runs_each_attempt_in_a_transaction(self):
+        func = mock.Mock(side_effect=[ValueError, 'done'])
+        with mock.patch.object(deferred.transaction, 'atomic') as atomic:
+            with self.assertLogs('oscar.deferred', 'WARNING'):
+                Task(func, max_retries=1).run()
+        self.assertEqual(2, atomic.call_count)
+
+    def test_can_run_outside_a_transaction(self):
+        with mock.patch.object(deferred.transaction, 'atomic') as atomic:
+            Task(mock.Mock(), atomic=False).run()
+        atomic.assert_not_called()
+
+
+class TestDeferredReceivers(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_run_immediately_by_default(self):
+        test_signal.send(sender=self, value=1)
+        self.assertEqual([1], calls)
+
+    @override_settings(
+        OSCAR_DEFERRED_RECEIVERS_BACKEND='oscar.core.deferred.InMemoryBackend')
+    def test_can_be_collected_in_memory(self):
+        test_signal.send(sender=self, value=1)
+        self.assertEqual([], calls)
+
+        self.assertEqual(1, get_backend().run_pending())
+        self.assertEqual([1], calls)
+
+    def test_are_held_back_until_the_response_is_sent(self):
+        backend = deferred.InMemoryBackend()
+        backend.wait_for_response = True
+        with mock.patch.object(deferred, 'get_backend', return_value=backend):
+            request_started.send(sender=self)
+            with self.captureOnCommitCallbacks(execute=True):
+                test_signal.send(sender=self, value=1)
+            self.assertEqual([], backend.tasks)
+
+            request_finished.send(sender=self)
+            self.assertEqual(1, len(backend.tasks))
+
+    def test_are_held_back_until_the_transaction_is_committed(self):
+        backend = deferred.InMemoryBackend()
+        backend.wait_for_response = True
+        with mock.patch.object(deferred, 'get_backend', return_value=backend):
+            request_started.send(sender=self)
+            with self.captureOnCommitCallbacks() as callbacks:
+                test_signal.send(sender=self, value=1)
+            request_finished.send(sender=self)
+            self.assertEqual([], backend.tasks)
+
+            # Committing after the response has been sent enqueues directly
+            for callback in callbacks:
+                callback()
+            self.assertEqual(1, len(backend.tasks))
+
+    def test_are_discarded_when_the_transaction_is_rolled_back(self):
+        backend = deferred.InMemoryBackend()
+        backend.wait_for_response = True
+        with mock.patch.object(deferred, 'get_backend', return_value=backend):
+            request_started.send(sender=self)
+            with self.captureOnCommitCallbacks() as callbacks:
+                try:
+                    with transaction.atomic():
+                        test_signal.send(sender=self, value=1)
+                        raise ValueError
+                except ValueError:
+                    pass
+            request_finished.send(sender=self)
+        self.assertEqual([], callbacks)
+        self.assertEqual([], backend.tasks)
+
+    def test_can_be_retried(self):
+        signal = Signal()
+        func = mock.Mock(side_effect=[ValueError, None])
+        func.__name__ = 'func'
+        deferred_receiver(signal, retries=1)(func)
+        backend = deferred.InMemoryBackend()
+        with mock.patch.object(deferred, 'get_backend', return_value=backend):
+            signal.send(sender=self)
+        with self.assertLogs('oscar.deferred', 'WARNING'):
+            backend.run_pending()
+        self.assertEqual(2, func.call_count)
+
+    def test_receiver_can_be_called_directly(self):
+        record_call(sender=self, value=2)
+        self.assertEqual([2], calls)
+
+
+class TestThreadPoolBackend(TestCase):
+
+    def test_runs_tasks_in_worker_threads(self):
+        backend = deferred.ThreadPoolBackend()
+        func = mock.Mock()
+        with mock.patch.object(deferred, 'connections'):
+            future = backend.executor.submit(backend.run_task, Task(func))
+            future.result()
+        func.assert_called_once_with()
+        backend.executor.shutdown()
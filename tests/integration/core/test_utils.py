@@ -1,8 +1,13 @@
 # coding=utf-8
+import datetime
+
+from django.db.models import Count
 from django.test import TestCase
 from django.test.utils import override_settings
+from django.utils import timezone
 
 from oscar.core import utils
+from oscar.test.factories import create_order
 
 
 def sluggish(value, allow_unicode=False):
@@ -37,3 +42,49 @@ class TestSlugify(TestCase):
     @override_settings(OSCAR_SLUG_BLACKLIST=['the', 'bible'])
     def test_uses_blacklist_doesnt_reduce_to_nothing(self):
         self.assertEqual('bible', utils.slugify('The Bible'))
+
+
+class TestTimeSeries(TestCase):
+
+    def setUp(self):
+        self.orders = [create_order() for __ in range(3)]
+        Order = type(self.orders[0])
+        self.queryset = Order.objects.all()
+        self.start = datetime.datetime(2021, 3, 1, 10, 30, tzinfo=timezone.utc)
+        # Two orders in the first hour, one the next day
+        dates = [self.start, self.start + datetime.timedelta(minutes=20),
+                 self.start + datetime.timedelta(days=1)]
+        for order, date in zip(self.orders, dates):
+            Order.objects.filter(pk=order.pk).update(date_placed=date)
+
+    @override_settings(TIME_ZONE='UTC')
+    def test_groups_by_hour(self):
+        with self.assertNumQueries(1):
+            series = utils.time_series(
+                self.queryset, 'date_placed', 'hour', self.start,
+                self.start + datetime.timedelta(hours=3), num=Count('id'))
+        self.assertEqual([2, None, None, None], [item['num'] for item in series])
+        self.assertEqual(
+            datetime.datetime(2021, 3, 1, 10, tzinfo=timezone.utc),
+            series[0]['start'])
+        self.assertEqual(series[0]['end'], series[1]['start'])
+
+    @override_settings(TIME_ZONE='UTC')
+    def test_groups_by_day_and_week(self):
+        end = self.start + datetime.timedelta(days=7)
+        series = utils.time_series(
+            self.queryset, 'date_placed', 'day', self.start, end,
+            num=Count('id'))
+        self.assertEqual([2, 1, None, None, None, None, None, None],
+                         [item['num'] for item in series])
+
+        series = utils.time_series(
+            self.queryset, 'date_placed', 'week', self.start, end,
+            num=Count('id'))
+        # 2021-03-01 is a Monday
+        self.assertEqual([3, None], [item['num'] for item in series])
+
+    def test_rejects_unknown_intervals(self):
+        with self.assertRaises(ValueError):
+            utils.time_series(self.queryset, 'date_placed', 'month',
+                              self.start, self.start, num=Count('id'))
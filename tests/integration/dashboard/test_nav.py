@@ -1,10 +1,17 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from django.urls.exceptions import NoReverseMatch
 
-from oscar.apps.dashboard.menu import get_nodes
+from oscar.apps.dashboard.menu import get_cache_key, get_nodes
 from oscar.apps.dashboard.nav import default_access_fn
-from oscar.test.factories import UserFactory
+from oscar.core.compat import get_user_model
+from oscar.test.factories import PartnerFactory, UserFactory
+
+User = get_user_model()
 
 
 class DashboardAccessFunctionTestCase(TestCase):
@@ -41,3 +48,52 @@ class DashboardNavTestCase(TestCase):
     def test_non_staff_user_has_empty_menu(self):
         menu = get_nodes(UserFactory())
         self.assertEqual(menu, [])
+
+
+class CachedDashboardNavTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_nodes_are_cached_per_permission_set(self):
+        get_nodes(UserFactory(is_staff=True))
+        with mock.patch('oscar.apps.dashboard.nav.Node.is_visible') as is_visible:
+            menu = get_nodes(UserFactory(is_staff=True))
+        self.assertFalse(is_visible.called)
+        self.assertEqual(menu[0].label, 'Dashboard')
+
+    def test_cached_nodes_match_filtered_nodes(self):
+        user = UserFactory(is_staff=True)
+        with self.settings(OSCAR_DASHBOARD_NAVIGATION_CACHE_TIMEOUT=0):
+            expected = get_nodes(user)
+        get_nodes(user)
+        cached = get_nodes(user)
+        self.assertEqual(
+            [(node.label, [child.url_name for child in node.children]) for node in expected],
+            [(node.label, [child.url_name for child in node.children]) for node in cached])
+
+    def test_permission_changes_are_picked_up(self):
+        partner = PartnerFactory()
+        user = UserFactory()
+        self.assertEqual(get_nodes(user), [])
+
+        user.user_permissions.add(
+            Permission.objects.get(codename='dashboard_access'))
+        partner.users.add(user)
+        user = User.objects.get(pk=user.pk)
+        self.assertTrue(get_nodes(user))
+
+    def test_permission_changes_invalidate_cache(self):
+        user = UserFactory()
+        old_key = get_cache_key(user)
+        Group.objects.create(name='staff').permissions.add(
+            Permission.objects.get(codename='dashboard_access'))
+        self.assertNotEqual(old_key, get_cache_key(user))
+
+    def test_navigation_changes_are_picked_up(self):
+        user = UserFactory(is_staff=True)
+        get_nodes(user)
+        navigation = [{'label': 'Reports', 'url_name': 'dashboard:reports-index'}]
+        with self.settings(OSCAR_DASHBOARD_NAVIGATION=navigation):
+            menu = get_nodes(user)
+        self.assertEqual(['Reports'], [node.label for node in menu])
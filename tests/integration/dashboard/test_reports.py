@@ -0,0 +1,70 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from oscar.apps.dashboard.reports.models import ReportJob
+from oscar.apps.dashboard.reports.utils import ReportJobRunner
+from oscar.test.factories import UserFactory, create_order
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT,
+                   OSCAR_REPORTS_BACKEND='oscar.core.deferred.ImmediateBackend',
+                   OSCAR_REPORTS_CHUNK_SIZE=2)
+class TestReportJobRunner(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = UserFactory(is_staff=True)
+        self.orders = [create_order(user=self.user) for __ in range(5)]
+
+    def test_writes_report_into_file(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = ReportJobRunner().create_job(self.user, 'order_report')
+
+        job.refresh_from_db()
+        self.assertEqual(ReportJob.COMPLETE, job.status)
+        self.assertEqual((5, 5), (job.num_rows, job.total_rows))
+        self.assertEqual(100, job.progress)
+        self.assertEqual('orders-None-to-None.csv', job.filename)
+        with job.file.open('r') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(6, len(lines))
+        self.assertTrue(lines[0].startswith('Order number'))
+        self.assertEqual({str(order.number) for order in self.orders},
+                         {line.split(',')[0] for line in lines[1:]})
+
+    def test_records_progress_per_chunk(self):
+        job = ReportJob.objects.create(user=self.user, report_type='order_report')
+        runner = ReportJobRunner()
+        progress = []
+        runner.update_progress = lambda job, num_rows, total: progress.append(num_rows)
+
+        runner.run(job.pk)
+
+        self.assertEqual([0, 2, 4, 5], progress)
+
+    def test_records_failures(self):
+        job = ReportJob.objects.create(user=self.user, report_type='invalid')
+
+        ReportJobRunner().run(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(ReportJob.FAILED, job.status)
+        self.assertIn('invalid', job.error)
+        self.assertIsNotNone(job.date_finished)
+
+    def test_works_with_aggregated_reports(self):
+        job = ReportJob.objects.create(
+            user=self.user, report_type='conditional-offers')
+
+        ReportJobRunner().run(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(ReportJob.COMPLETE, job.status)
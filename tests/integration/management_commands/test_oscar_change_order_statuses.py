@@ -0,0 +1,37 @@
+import io
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from oscar.core.loading import get_model
+from oscar.test.factories import create_order
+
+Order = get_model('order', 'Order')
+
+
+class OscarChangeOrderStatusesTestCase(TestCase):
+
+    def setUp(self):
+        Order.pipeline = {'A': ('B',), 'B': ()}
+        self.orders = [create_order(status='A') for __ in range(2)]
+
+    def tearDown(self):
+        Order.pipeline = {}
+
+    def test_requires_orders_to_be_selected(self):
+        with self.assertRaises(CommandError):
+            call_command('oscar_change_order_statuses', 'B')
+
+    def test_changes_orders_by_number(self):
+        out = io.StringIO()
+        call_command('oscar_change_order_statuses', 'B',
+                     number=[self.orders[0].number], stdout=out)
+        self.assertEqual('B', Order.objects.get(pk=self.orders[0].pk).status)
+        self.assertEqual('A', Order.objects.get(pk=self.orders[1].pk).status)
+        self.assertIn('Changed the status of 1 orders', out.getvalue())
+
+    def test_changes_orders_by_current_status(self):
+        call_command('oscar_change_order_statuses', 'B', from_status='A',
+                     stdout=io.StringIO())
+        self.assertEqual(2, Order.objects.filter(status='B').count())
@@ -0,0 +1,28 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import now
+
+from oscar.core.loading import get_model
+from oscar.test.factories import UserFactory
+
+DailyUserSearch = get_model('analytics', 'DailyUserSearch')
+UserSearch = get_model('analytics', 'UserSearch')
+
+
+class OscarCompactAnalyticsTestCase(TestCase):
+
+    def test_compacts_old_records(self):
+        user = UserFactory()
+        for query in ('shirt', 'shirt', 'shoes'):
+            UserSearch.objects.create(user=user, query=query)
+        UserSearch.objects.update(date_created=now() - datetime.timedelta(days=10))
+
+        out = io.StringIO()
+        call_command('oscar_compact_analytics', days=7, stdout=out)
+
+        self.assertIn('Compacted 0 product views and 3 searches', out.getvalue())
+        self.assertFalse(UserSearch.objects.exists())
+        self.assertEqual(2, DailyUserSearch.objects.count())
@@ -0,0 +1,52 @@
+import datetime
+import io
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from oscar.core.loading import get_model
+
+ReportJob = get_model('reports_dashboard', 'ReportJob')
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class OscarDeleteExpiredReportsTestCase(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_job(self, days_ago):
+        job = ReportJob.objects.create(
+            report_type='order_report', status=ReportJob.COMPLETE)
+        job.file.save('orders.csv', ContentFile(b'number\n'), save=False)
+        job.date_created = timezone.now() - datetime.timedelta(days=days_ago)
+        job.save()
+        return job
+
+    def test_deletes_expired_jobs_and_their_files(self):
+        expired, recent = self.create_job(10), self.create_job(1)
+        storage = expired.file.storage
+
+        out = io.StringIO()
+        call_command('oscar_delete_expired_reports', stdout=out)
+
+        self.assertIn('Deleted 1 report jobs', out.getvalue())
+        self.assertEqual([recent], list(ReportJob.objects.all()))
+        self.assertFalse(storage.exists(expired.file.name))
+        self.assertTrue(storage.exists(recent.file.name))
+
+    def test_deleting_a_job_deletes_its_file(self):
+        job = self.create_job(0)
+        storage, name = job.file.storage, job.file.name
+
+        job.delete()
+
+        self.assertFalse(storage.exists(name))
@@ -0,0 +1,27 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import now
+
+from oscar.core.loading import get_class
+from oscar.test.factories import create_order
+
+OrderStatsRollups = get_class('analytics.rollups', 'OrderStatsRollups')
+
+
+class OscarRebuildOrderStatsTestCase(TestCase):
+
+    def test_rebuilds_rollups_from_orders(self):
+        # Rollups aren't maintained as OSCAR_ANALYTICS_ORDER_STATS_ROLLUPS is
+        # disabled
+        order = create_order()
+
+        out = io.StringIO()
+        call_command('oscar_rebuild_order_stats', stdout=out)
+
+        self.assertIn('Successfully rebuilt 2 order statistics rollups',
+                      out.getvalue())
+        stats = OrderStatsRollups().get_stats(0, now())
+        self.assertEqual(1, stats['total_orders'])
+        self.assertEqual(order.total_incl_tax, stats['total_revenue'])
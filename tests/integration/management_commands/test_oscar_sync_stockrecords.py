@@ -0,0 +1,40 @@
+import csv
+import io
+import os
+import tempfile
+from decimal import Decimal as D
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from oscar.core.loading import get_model
+from oscar.test.factories import create_stockrecord
+
+StockRecord = get_model('partner', 'StockRecord')
+
+
+class OscarSyncStockrecordsTestCase(TestCase):
+
+    def test_updates_changed_stockrecords(self):
+        for sku in ('sku-1', 'sku-2'):
+            create_stockrecord(partner_name='Gardners', partner_sku=sku,
+                               price=D('10.00'), num_in_stock=5)
+        with tempfile.NamedTemporaryFile(
+                'w', suffix='.csv', delete=False) as f:
+            csv.writer(f, delimiter=';').writerows([
+                ('Gardners', 'sku-1', '10.00', '5'),
+                ('Gardners', 'sku-2', '10.00', '7'),
+            ])
+        self.addCleanup(os.remove, f.name)
+
+        out = io.StringIO()
+        call_command('oscar_sync_stockrecords', f.name, delimiter=';',
+                     stdout=out)
+
+        self.assertIn('Successfully updated 1 stock records', out.getvalue())
+        self.assertEqual(
+            7, StockRecord.objects.get(partner_sku='sku-2').num_in_stock)
+
+    def test_raises_command_error_for_missing_file(self):
+        with self.assertRaises(CommandError):
+            call_command('oscar_sync_stockrecords', '/tmp/missing-stock.csv')
@@ -0,0 +1,26 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from oscar.core.loading import get_model
+from oscar.test.factories import create_order
+
+Order = get_model('order', 'Order')
+
+
+class OscarUpdateOrderLineCountsTestCase(TestCase):
+
+    def test_backfills_line_counts(self):
+        orders = [create_order() for __ in range(3)]
+        Order.objects.update(num_lines=0, num_items=0)
+
+        out = io.StringIO()
+        call_command('oscar_update_order_line_counts', batch_size=2, stdout=out)
+
+        self.assertIn('Successfully updated 3 orders', out.getvalue())
+        for order in orders:
+            num_items = order.num_items
+            order.refresh_from_db()
+            self.assertEqual(1, order.num_lines)
+            self.assertEqual(num_items, order.num_items)
@@ -0,0 +1,43 @@
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from oscar.core.loading import get_model
+from oscar.test.factories import UserFactory, create_product
+
+Product = get_model('catalogue', 'Product')
+ProductReview = get_model('reviews', 'ProductReview')
+
+
+class OscarUpdateProductRatingsTestCase(TestCase):
+
+    def test_recalculates_changed_ratings(self):
+        products = [create_product() for __ in range(3)]
+        for product, score in zip(products, [1, 3]):
+            product.reviews.create(
+                title='Review', body='Body', score=score, user=UserFactory(),
+                status=ProductReview.APPROVED)
+        Product.objects.update(rating=5)
+
+        out = io.StringIO()
+        call_command('oscar_update_product_ratings', batch_size=2, stdout=out)
+
+        self.assertIn('Successfully updated 3 products', out.getvalue())
+        ratings = [product.rating for product in Product.objects.order_by('pk')]
+        self.assertEqual([1, 3, None], ratings)
+
+    def test_uses_custom_ratings(self):
+        product = create_product()
+        product.reviews.create(
+            title='Review', body='Body', score=1, user=UserFactory(),
+            status=ProductReview.APPROVED)
+
+        out = io.StringIO()
+        with mock.patch.object(Product, 'calculate_rating', lambda product: 4.0):
+            call_command('oscar_update_product_ratings', stdout=out)
+
+        self.assertIn('Successfully updated 1 products', out.getvalue())
+        product.refresh_from_db()
+        self.assertEqual(4.0, product.rating)
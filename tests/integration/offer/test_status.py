@@ -30,3 +30,14 @@ class TestAnOfferChangesStatusWhen(TestCase):
         self.offer.num_applications += 10
         self.offer.save()
         self.assertFalse(self.offer.is_open)
+
+    def test_its_usage_is_recorded_beyond_the_max_global_applications(self):
+        self.offer.max_global_applications = 5
+        self.offer.save()
+
+        self.offer.record_usage({'freq': 5, 'discount': D('2.00')})
+
+        self.offer.refresh_from_db()
+        self.assertEqual(5, self.offer.num_applications)
+        self.assertEqual(1, self.offer.num_orders)
+        self.assertFalse(self.offer.is_open)
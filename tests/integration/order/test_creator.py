@@ -5,9 +5,10 @@ from decimal import Decimal as D
 
 import pytest
 from django.contrib.auth.models import AnonymousUser
+from django.db import connection
 from django.http import HttpRequest
 from django.test import TestCase, TransactionTestCase
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.utils import timezone
 
 from oscar.apps.catalogue.models import Product, ProductClass
@@ -84,6 +85,22 @@ class TestSuccessfulOrderCreation(TestCase):
         lines = order.lines.all()
         self.assertEqual(1, len(lines))
 
+    def test_sets_line_counts(self):
+        add_product(self.basket, D('12.00'), quantity=3)
+        add_product(self.basket, D('5.00'))
+        place_order(self.creator, surcharges=self.surcharges, basket=self.basket, order_number='1234')
+        order = Order.objects.get(number='1234')
+        self.assertEqual(2, order.num_lines)
+        self.assertEqual(4, order.num_items)
+
+    def test_line_counts_are_not_updated_per_line(self):
+        add_product(self.basket, D('12.00'), quantity=3)
+        add_product(self.basket, D('5.00'))
+        with CaptureQueriesContext(connection) as queries:
+            place_order(self.creator, surcharges=self.surcharges, basket=self.basket, order_number='1234')
+        self.assertFalse([query for query in queries.captured_queries
+                          if query['sql'].startswith('UPDATE') and 'num_lines' in query['sql']])
+
     def test_sets_correct_order_status(self):
         add_product(self.basket, D('12.00'))
         place_order(self.creator, surcharges=self.surcharges, basket=self.basket,
@@ -57,6 +57,65 @@ class TestEventHandler(TestCase):
             self.handler.handle_shipping_event(
                 order, self.shipped, lines, [4])
 
+    def test_handles_shipping_events_for_many_orders(self):
+        orders = [self.order, factories.create_order()]
+        shipments = [(order, order.lines.all(), [1]) for order in orders]
+
+        events = self.handler.handle_shipping_events(
+            self.shipped, shipments, reference='batch-1')
+
+        self.assertEqual(2, len(events))
+        for order in orders:
+            event = order.shipping_events.get()
+            self.assertEqual('batch-1', event.notes)
+            self.assertEqual(1, event.line_quantities.get().quantity)
+
+    def test_batch_shipping_events_accept_iterators_of_lines(self):
+        lines = iter(self.order.lines.all())
+
+        self.handler.handle_shipping_events(
+            self.shipped, [(self.order, lines, [0])])
+
+        event_quantity = self.order.shipping_events.get().line_quantities.get()
+        self.assertEqual(event_quantity.line.quantity, event_quantity.quantity)
+
+    def test_batch_shipping_events_respect_prior_events(self):
+        basket = factories.create_basket(empty=True)
+        add_product(basket, D('10.00'), 5)
+        order = factories.create_order(basket=basket)
+        lines = order.lines.all()
+        self.handler.handle_shipping_event(order, self.shipped, lines, [4])
+
+        with self.assertRaises(exceptions.InvalidShippingEvent):
+            self.handler.handle_shipping_events(
+                self.shipped, [(order, lines, [2])])
+        # Quantities for the same line are added up across the batch
+        with self.assertRaises(exceptions.InvalidShippingEvent):
+            self.handler.handle_shipping_events(
+                self.shipped, [(order, lines, [1]), (order, lines, [1])])
+        self.assertEqual(1, order.shipping_events.count())
+
+    def test_batch_shipping_events_consume_stock(self):
+        product_class = factories.ProductClassFactory(
+            requires_shipping=False, track_stock=True)
+        product = factories.ProductFactory(product_class=product_class)
+        orders = []
+        for __ in range(2):
+            basket = factories.create_basket(empty=True)
+            add_product(basket, D('10.00'), 2, product=product)
+            orders.append(factories.create_order(basket=basket))
+        stockrecord = product.stockrecords.get()
+        num_in_stock = stockrecord.num_in_stock
+        num_allocated = stockrecord.num_allocated
+
+        self.handler.handle_shipping_events(
+            self.shipped, [(order, order.lines.all(), [2]) for order in orders],
+            consume_stock=True)
+
+        stockrecord.refresh_from_db()
+        self.assertEqual(num_allocated - 4, stockrecord.num_allocated)
+        self.assertEqual(num_in_stock - 4, stockrecord.num_in_stock)
+
     def test_are_stock_allocations_available(self):
         product_class = factories.ProductClassFactory(
             requires_shipping=False, track_stock=True)
@@ -2,7 +2,9 @@ from datetime import datetime, timedelta
 from decimal import Decimal as D
 from unittest import mock
 
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -12,7 +14,7 @@ from oscar.apps.order.models import (
     Line, Order, OrderDiscount, OrderNote, ShippingEvent,
     ShippingEventQuantity, ShippingEventType)
 from oscar.apps.order.signals import (
-    order_line_status_changed, order_status_changed)
+    order_line_status_changed, order_status_changed, order_statuses_changed)
 from oscar.test.basket import add_product
 from oscar.test.contextmanagers import mock_signal_receiver
 from oscar.test.factories import (
@@ -102,6 +104,58 @@ class OrderStatusPipelineTests(TestCase):
         self.assertEqual(order_status_change.new_status, 'SHIPPED')
 
 
+class OrderBulkStatusTests(TestCase):
+
+    def setUp(self):
+        Order.pipeline = {'PENDING': ('SHIPPED', 'CANCELLED'),
+                          'SHIPPED': ('COMPLETE',),
+                          'COMPLETE': (),
+                          'CANCELLED': ()}
+        Order.cascade = {'SHIPPED': 'SHIPPED'}
+
+    def tearDown(self):
+        Order.pipeline = {}
+        Order.cascade = {}
+
+    def test_changes_valid_orders_and_rejects_invalid_ones(self):
+        pending = [create_order(status='PENDING') for __ in range(3)]
+        complete = create_order(status='COMPLETE')
+        shipped = create_order(status='SHIPPED')
+
+        status_changes, invalid_orders = Order.bulk_set_status(
+            pending + [complete, shipped], 'SHIPPED')
+
+        self.assertEqual(3, len(status_changes))
+        self.assertEqual([complete.pk], [order.pk for order in invalid_orders])
+        self.assertEqual(4, Order.objects.filter(status='SHIPPED').count())
+        self.assertEqual('SHIPPED', pending[0].status)
+        self.assertEqual('COMPLETE', Order.objects.get(pk=complete.pk).status)
+
+    def test_creates_status_changes_and_cascades_to_lines(self):
+        order = create_order(status='PENDING')
+        Order.bulk_set_status([order.pk], 'SHIPPED')
+
+        status_change = order.status_changes.get()
+        self.assertEqual('PENDING', status_change.old_status)
+        self.assertEqual('SHIPPED', status_change.new_status)
+        for line in order.lines.all():
+            self.assertEqual('SHIPPED', line.status)
+
+    def test_sends_a_single_signal(self):
+        orders = [create_order(status='PENDING') for __ in range(2)]
+        with mock_signal_receiver(order_statuses_changed) as receiver:
+            Order.bulk_set_status(orders, 'CANCELLED')
+            self.assertEqual(receiver.call_count, 1)
+            self.assertEqual(
+                2, len(receiver.call_args[1]['status_changes']))
+
+    def test_sends_no_signal_when_nothing_changes(self):
+        order = create_order(status='COMPLETE')
+        with mock_signal_receiver(order_statuses_changed) as receiver:
+            Order.bulk_set_status([order], 'COMPLETE')
+            self.assertEqual(receiver.call_count, 0)
+
+
 class OrderNoteTests(TestCase):
 
     def setUp(self):
@@ -379,6 +433,57 @@ class OrderTests(TestCase):
 
         self.assertEqual(order.date_placed, datetime(2012, 8, 11, 16, 14, tzinfo=tzinfo))
 
+    def test_line_counts_are_updated_when_lines_change(self):
+        order = OrderFactory()
+        line = OrderLineFactory(order=order, quantity=2)
+        OrderLineFactory(order=order, quantity=1)
+        order.refresh_from_db()
+        self.assertEqual((2, 3), (order.num_lines, order.num_items))
+
+        line.quantity = 5
+        line.save()
+        order.refresh_from_db()
+        self.assertEqual((2, 6), (order.num_lines, order.num_items))
+
+        line.delete()
+        order.refresh_from_db()
+        self.assertEqual((1, 1), (order.num_lines, order.num_items))
+
+    def test_deleting_a_line_decrements_the_line_counts(self):
+        order = OrderFactory()
+        OrderLineFactory(order=order, quantity=2)
+        OrderLineFactory(order=order, quantity=1)
+        line = Line.objects.get(order=order, quantity=2)
+        # The related rows and the line are deleted, then the counts updated
+        with self.assertNumQueries(6):
+            line.delete()
+        order.refresh_from_db()
+        self.assertEqual((1, 1), (order.num_lines, order.num_items))
+
+    def test_deleting_an_order_doesnt_update_its_line_counts(self):
+        order = OrderFactory()
+        OrderLineFactory(order=order)
+        OrderLineFactory(order=order)
+        order = Order.objects.get(pk=order.pk)
+        with CaptureQueriesContext(connection) as queries:
+            order.delete()
+        self.assertFalse([query for query in queries.captured_queries
+                          if 'num_lines' in query['sql']])
+
+    def test_line_counts_are_only_recalculated_when_quantity_changes(self):
+        order = OrderFactory()
+        OrderLineFactory(order=order, quantity=2)
+        line = order.lines.get()
+
+        line.status = 'Shipped'
+        with self.assertNumQueries(1):
+            line.save()
+        line.quantity = 3
+        with self.assertNumQueries(3):
+            line.save()
+        order.refresh_from_db()
+        self.assertEqual((1, 3), (order.num_lines, order.num_items))
+
     def test_shipping_status(self):
         order = OrderFactory()
 
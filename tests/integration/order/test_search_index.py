@@ -0,0 +1,109 @@
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from oscar.apps.order.models import OrderSearchTerm
+from oscar.apps.order.utils import OrderSearchIndexer
+from oscar.test.factories import OrderLineFactory, UserFactory, create_order
+
+
+class TestOrderSearchIndexer(TestCase):
+
+    def setUp(self):
+        self.order = create_order(
+            user=UserFactory(first_name='Barry', last_name='Smith'))
+        self.line = self.order.lines.get()
+
+    def test_indexes_lower_cased_terms(self):
+        terms = OrderSearchIndexer().get_terms(self.order)
+        self.assertIn((OrderSearchTerm.NUMBER, str(self.order.number)), terms)
+        self.assertIn((OrderSearchTerm.FIRST_NAME, 'barry'), terms)
+        self.assertIn((OrderSearchTerm.LAST_NAME, 'smith'), terms)
+        self.assertIn(
+            (OrderSearchTerm.PRODUCT_TITLE, self.line.title.lower()), terms)
+
+    def test_replaces_existing_terms(self):
+        indexer = OrderSearchIndexer()
+        indexer.index(self.order)
+        indexer.index(self.order)
+        self.assertEqual(
+            len(indexer.get_terms(self.order)),
+            self.order.search_terms.count())
+
+    def test_orders_are_not_indexed_by_default(self):
+        self.assertFalse(OrderSearchTerm.objects.exists())
+
+    @override_settings(OSCAR_ORDER_SEARCH_INDEX=True)
+    def test_placed_orders_are_indexed_when_enabled(self):
+        order = create_order()
+        self.assertTrue(order.search_terms.filter(
+            field=OrderSearchTerm.NUMBER, value=order.number).exists())
+
+    @override_settings(OSCAR_ORDER_SEARCH_INDEX=True)
+    def test_orders_are_only_reindexed_when_indexed_values_change(self):
+        order = create_order()
+        order = type(order).objects.get(pk=order.pk)
+
+        order.status = 'Shipped'
+        with self.assertNumQueries(1):
+            order.save()
+
+        order.number = 'NEW-NUMBER'
+        order.save()
+        self.assertTrue(order.search_terms.filter(
+            field=OrderSearchTerm.NUMBER, value='new-number').exists())
+
+    @override_settings(OSCAR_ORDER_SEARCH_INDEX=True)
+    def test_orders_are_reindexed_when_indexed_line_values_change(self):
+        order = create_order()
+        line = order.lines.get()
+
+        line.status = 'Shipped'
+        with self.assertNumQueries(1):
+            line.save()
+
+        line.title = 'The Art of War'
+        line.save()
+        self.assertTrue(order.search_terms.filter(
+            field=OrderSearchTerm.PRODUCT_TITLE, value='the art of war').exists())
+
+    @override_settings(OSCAR_ORDER_SEARCH_INDEX=True)
+    def test_orders_are_reindexed_when_lines_are_added_or_deleted(self):
+        order = create_order()
+        line = OrderLineFactory(order=order, title='The Art of War')
+        self.assertTrue(order.search_terms.filter(
+            field=OrderSearchTerm.PRODUCT_TITLE, value='the art of war').exists())
+
+        line.delete()
+        self.assertFalse(order.search_terms.filter(
+            field=OrderSearchTerm.PRODUCT_TITLE, value='the art of war').exists())
+
+    @override_settings(OSCAR_ORDER_SEARCH_INDEX=True)
+    def test_orders_are_reindexed_when_the_customer_is_renamed(self):
+        user = UserFactory(first_name='Barry', last_name='Smith')
+        order = create_order(user=user)
+
+        user.last_login = timezone.now()
+        with mock.patch.object(OrderSearchIndexer, 'index_orders') as index_orders:
+            user.save(update_fields=['last_login'])
+            user.save()
+        index_orders.assert_not_called()
+
+        user.first_name = 'Harry'
+        user.save()
+        self.assertTrue(order.search_terms.filter(
+            field=OrderSearchTerm.FIRST_NAME, value='harry').exists())
+        self.assertFalse(order.search_terms.filter(
+            field=OrderSearchTerm.FIRST_NAME, value='barry').exists())
+
+    def test_management_command_builds_index(self):
+        other_order = create_order()
+        out = io.StringIO()
+        call_command('oscar_update_order_search_index', batch_size=1,
+                     stdout=out)
+        self.assertIn('Successfully indexed 2 orders', out.getvalue())
+        self.assertTrue(self.order.search_terms.exists())
+        self.assertTrue(other_order.search_terms.exists())
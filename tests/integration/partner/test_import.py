@@ -1,14 +1,21 @@
+import csv
 import logging
 import os
+import tempfile
+import time
+from collections import defaultdict
 from decimal import Decimal as D
+from unittest import mock, skipIf
 
-from django.test import TestCase
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase
 
 from oscar.apps.catalogue.models import Product, ProductClass
 from oscar.apps.partner.exceptions import ImportingError
-from oscar.apps.partner.importers import CatalogueImporter
-from oscar.apps.partner.models import Partner
-from oscar.test.factories import create_product
+from oscar.apps.partner.importers import CatalogueImporter, StockSyncImporter
+from oscar.apps.partner.models import Partner, StockAlert
+from oscar.apps.partner.signals import stockrecords_changed
+from oscar.test.factories import create_product, create_stockrecord
 from tests._site.apps.partner.models import StockRecord
 
 TEST_BOOKS_CSV = os.path.join(os.path.dirname(__file__), 'fixtures/books-small.csv')
@@ -125,3 +132,266 @@ class ImportWithFlushTest(TestCase):
 
         with self.assertRaises(Product.DoesNotExist):
             Product.objects.get(upc=upc)
+
+
+class ImportUpdateTest(TestCase):
+
+    def setUp(self):
+        self.importer = CatalogueImporter(logger)
+
+    def test_existing_products_and_stockrecords_are_updated(self):
+        product = create_product(
+            upc='9780115531446', title='Old title', price=D('1.00'),
+            partner_name='Gardners', partner_sku='9780115531446',
+            num_in_stock=1)
+
+        self.importer.handle(TEST_BOOKS_CSV)
+
+        product.refresh_from_db()
+        self.assertEqual(
+            "Prepare for Your Practical Driving Test", product.title)
+        self.assertEqual(10, Product.objects.count())
+        stockrecord = StockRecord.objects.get(partner_sku='9780115531446')
+        self.assertEqual(product, stockrecord.product)
+        self.assertEqual(D('10.32'), stockrecord.price)
+        self.assertEqual(6, stockrecord.num_in_stock)
+        self.assertEqual(1, product.categories.count())
+
+    def test_importing_twice_doesnt_duplicate_anything(self):
+        self.importer.handle(TEST_BOOKS_CSV)
+        self.importer.handle(TEST_BOOKS_CSV)
+
+        self.assertEqual(10, Product.objects.count())
+        self.assertEqual(10, Product.categories.through.objects.count())
+        self.assertEqual(
+            StockRecord.objects.count(),
+            StockRecord.objects.values('partner_sku').distinct().count())
+
+
+class ImportInChunksTest(TestCase):
+
+    def test_all_rows_are_imported_in_small_chunks(self):
+        importer = CatalogueImporter(logger, chunk_size=3)
+        with self.assertLogs(logger, level='INFO') as logs:
+            importer.handle(TEST_BOOKS_CSV)
+
+        self.assertEqual(10, Product.objects.count())
+        chunk_logs = [line for line in logs.output if 'Rows ' in line]
+        self.assertEqual(4, len(chunk_logs))
+        self.assertIn("New items: 10, updated items: 0", logs.output[-1])
+
+    def test_chunk_is_imported_with_a_constant_number_of_queries(self):
+        # Create the product class, categories and partner up front
+        CatalogueImporter(logger).handle(TEST_BOOKS_CSV)
+        Product.objects.all().delete()
+
+        importer = CatalogueImporter(logger, chunk_size=100)
+        with self.assertNumQueries(13):
+            importer.handle(TEST_BOOKS_CSV)
+
+
+class ImportInParallelTest(TestCase):
+
+    def test_chunks_are_imported_by_workers_and_retried(self):
+        importer = CatalogueImporter(logger, chunk_size=3, workers=2)
+        imported_rows = []
+
+        def import_chunk_in_thread(chunk):
+            # The first chunk clashes with a chunk of another worker
+            if chunk[0][0] == 1:
+                raise IntegrityError
+            imported_rows.extend(row_number for row_number, __ in chunk)
+            return chunk, defaultdict(int, new_items=len(chunk))
+
+        with mock.patch.object(importer, '_import_chunk_in_thread',
+                               side_effect=import_chunk_in_thread):
+            with self.assertLogs(logger, level='INFO') as logs:
+                importer.handle(TEST_BOOKS_CSV)
+
+        self.assertEqual(list(range(4, 11)), sorted(imported_rows))
+        # The failed chunk is imported again by the main thread, before the
+        # results of the later chunks are used
+        self.assertEqual(3, Product.objects.count())
+        chunk_logs = [line for line in logs.output if 'Rows ' in line]
+        self.assertIn("Rows 1-3", chunk_logs[0])
+        self.assertIn("New items: 10, updated items: 0", logs.output[-1])
+
+    def test_chunks_with_the_same_upcs_are_imported_in_order(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            csv.writer(f).writerows([
+                ['Book', 'Books', '1', 'First', 'NULL'],
+                ['Book', 'Books', '2', 'Other', 'NULL'],
+                ['Book', 'Books', '1', 'Second', 'NULL'],
+            ])
+        self.addCleanup(os.remove, f.name)
+        importer = CatalogueImporter(logger, chunk_size=1, workers=3)
+        finished = []
+
+        def import_chunk_in_thread(chunk):
+            row_number = chunk[0][0]
+            if row_number == 1:
+                time.sleep(0.1)
+            elif row_number == 3:
+                # Row 3 may only be imported once row 1 has been
+                self.assertIn(1, finished)
+            finished.append(row_number)
+            return chunk, defaultdict(int)
+
+        with mock.patch.object(importer, '_import_chunk_in_thread',
+                               side_effect=import_chunk_in_thread):
+            importer.handle(f.name)
+
+        self.assertEqual([1, 2, 3], sorted(finished))
+        self.assertEqual(
+            {('upc', '1')},
+            importer._get_chunk_keys([(1, ['Book', 'Books', '1', 'First', 'NULL'])]))
+
+    def test_thread_closes_its_database_connections(self):
+        importer = CatalogueImporter(logger)
+        chunk = [(1, ['Book', 'Books', '123', 'Title', 'NULL'])]
+        with mock.patch.object(importer, '_import_chunk',
+                               return_value=(chunk, {})), \
+                mock.patch('oscar.apps.partner.importers.connections') as connections:
+            importer._import_chunk_in_thread(chunk)
+        connections.close_all.assert_called_once_with()
+
+
+@skipIf(connection.vendor == 'sqlite',
+        "SQLite doesn't allow concurrent writes")
+class ImportInParallelThreadsTest(TransactionTestCase):
+
+    def test_later_rows_win(self):
+        rows = []
+        for i in range(3):
+            for upc in range(10):
+                rows.append([
+                    'Book', 'Books', str(upc), 'Title %d' % i, 'NULL',
+                    'Partner', 'SKU%d' % upc, str(i), str(i)])
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            csv.writer(f).writerows(rows)
+        self.addCleanup(os.remove, f.name)
+
+        CatalogueImporter(logger, chunk_size=5, workers=4).handle(f.name)
+
+        self.assertEqual(10, Product.objects.count())
+        self.assertEqual(
+            {'Title 2'}, set(Product.objects.values_list('title', flat=True)))
+        self.assertEqual(
+            {D('2.00')}, set(StockRecord.objects.values_list('price', flat=True)))
+
+
+class ImportRowsWithoutUPCTest(TestCase):
+
+    def test_rows_without_upc_are_skipped(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            csv.writer(f).writerows([
+                ['Book', 'Books', '', 'No UPC', 'NULL'],
+                ['Book', 'Books', '123', 'With UPC', 'NULL'],
+            ])
+        self.addCleanup(os.remove, f.name)
+
+        with self.assertLogs(logger, level='ERROR') as logs:
+            CatalogueImporter(logger).handle(f.name)
+
+        self.assertEqual(['With UPC'], [product.title for product in Product.objects.all()])
+        self.assertIn("Row number 1 has no UPC", logs.output[0])
+
+
+class StockSyncTest(TestCase):
+
+    def setUp(self):
+        self.partner = Partner.objects.create(name='Gardners')
+        self.stockrecords = [
+            create_stockrecord(
+                partner_name='Gardners', partner_sku=sku, price=D('10.00'),
+                num_in_stock=5)
+            for sku in ('sku-1', 'sku-2', 'sku-3')]
+        self.importer = StockSyncImporter(logger, batch_size=2)
+
+    def sync(self, rows):
+        with tempfile.NamedTemporaryFile(
+                'w', suffix='.csv', delete=False) as f:
+            csv.writer(f).writerows(rows)
+        self.addCleanup(os.remove, f.name)
+        return self.importer.handle(f.name)
+
+    def test_only_changed_stockrecords_are_updated(self):
+        unchanged_date = self.stockrecords[0].date_updated
+        changed_ids = self.sync([
+            ('Gardners', 'sku-1', '10.00', '5'),
+            ('Gardners', 'sku-2', '12.50', '5'),
+            ('Gardners', 'sku-3', '10.00', '0'),
+        ])
+
+        self.assertEqual(
+            [self.stockrecords[1].pk, self.stockrecords[2].pk],
+            sorted(changed_ids))
+        first, second, third = StockRecord.objects.order_by('partner_sku')
+        self.assertEqual(unchanged_date, first.date_updated)
+        self.assertEqual(D('12.50'), second.price)
+        self.assertEqual(0, third.num_in_stock)
+
+    def test_unknown_and_invalid_rows_are_skipped(self):
+        with self.assertLogs(logger, level='INFO') as logs:
+            changed_ids = self.sync([
+                ('Gardners', 'sku-4', '12.50', '5'),
+                ('Unknown partner', 'sku-1', '12.50', '5'),
+                ('Gardners', 'sku-1', 'not a price', '5'),
+                ('Gardners', 'sku-1'),
+            ])
+
+        self.assertEqual([], changed_ids)
+        self.assertIn(
+            "Updated stock records: 0, unchanged stock records: 0,"
+            " skipped rows: 4", logs.output[-1])
+
+    def test_sends_one_signal_for_all_changed_stockrecords(self):
+        received = []
+
+        def receiver(sender, stockrecord_ids, **kwargs):
+            received.append(stockrecord_ids)
+        stockrecords_changed.connect(receiver)
+        self.addCleanup(stockrecords_changed.disconnect, receiver)
+
+        self.sync([('Gardners', sku, '9.99', '5')
+                   for sku in ('sku-1', 'sku-2', 'sku-3')])
+
+        self.assertEqual(1, len(received))
+        self.assertEqual(
+            [stock.pk for stock in self.stockrecords], sorted(received[0]))
+
+    def test_updates_stock_alerts_of_changed_stockrecords(self):
+        first, second = self.stockrecords[:2]
+        StockRecord.objects.filter(pk__in=[first.pk, second.pk]).update(
+            low_stock_threshold=3)
+        StockAlert.objects.create(stockrecord=second, threshold=3)
+
+        self.sync([('Gardners', 'sku-1', '10.00', '2'),
+                   ('Gardners', 'sku-2', '10.00', '4')])
+
+        self.assertEqual(
+            StockAlert.OPEN, StockAlert.objects.get(stockrecord=first).status)
+        self.assertEqual(
+            StockAlert.CLOSED, StockAlert.objects.get(stockrecord=second).status)
+
+    def test_stock_alerts_are_updated_in_batches(self):
+        StockRecord.objects.update(low_stock_threshold=10)
+        with mock.patch('oscar.apps.partner.receivers.STOCK_ALERTS_BATCH_SIZE', 2):
+            self.sync([('Gardners', sku, '10.00', '4')
+                       for sku in ('sku-1', 'sku-2', 'sku-3')])
+
+        self.assertEqual(3, StockAlert.objects.filter(status=StockAlert.OPEN).count())
+
+    def test_empty_cells_leave_values_unchanged(self):
+        self.sync([
+            ('Gardners', 'sku-1', '', '2'),
+            ('Gardners', 'sku-2', '12.50', ''),
+            ('Gardners', 'sku-3', '', ''),
+            ('Gardners', 'sku-3', '9.99', ''),
+            ('Gardners', 'sku-3', '', '7'),
+        ])
+
+        first, second, third = StockRecord.objects.order_by('partner_sku')
+        self.assertEqual((D('10.00'), 2), (first.price, first.num_in_stock))
+        self.assertEqual((D('12.50'), 5), (second.price, second.num_in_stock))
+        self.assertEqual((D('9.99'), 7), (third.price, third.num_in_stock))
@@ -1,10 +1,12 @@
 import os
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from django import template
+from django.core.cache import cache
 from django.test import TestCase
 from django.test.utils import override_settings
 
+from oscar.core.thumbnails import SorlThumbnail, thumbnail_url_cache
 from oscar.test.factories.catalogue import ProductImageFactory
 from oscar.test.utils import EASY_THUMBNAIL_BASEDIR, get_thumbnail_full_path
 
@@ -100,3 +102,51 @@ class TestOscarThumbnailWithSorlThumbnail(OscarThumbnailMixin, TestCase):
 )
 class TestOscarThumbnailWithEasyThumbnails(OscarThumbnailMixin, TestCase):
     crop_value = True
+
+
+@override_settings(OSCAR_THUMBNAIL_URL_CACHE_TIMEOUT=60)
+class TestOscarThumbnailURLCache(TestCase):
+
+    def setUp(self):
+        self.thumbnailer = Mock()
+        self.thumbnailer.generate_thumbnail.return_value = Mock(
+            url='/media/cache/thumb.jpg', width=50, height=155)
+        patcher = patch('oscar.templatetags.image_tags.get_thumbnailer',
+                        return_value=self.thumbnailer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(thumbnail_url_cache.clear)
+        self.addCleanup(cache.clear)
+
+        self.context = template.Context({'image': 'images/products/image.jpg'})
+        self.template = template.Template(
+            '{% load image_tags %}'
+            '{% oscar_thumbnail image "x155" upscale=False as thumb %}'
+            '{{ thumb.url }} {{ thumb.width }}x{{ thumb.height }}'
+        )
+
+    def test_renders_cached_thumbnails_without_the_thumbnailer(self):
+        for __ in range(3):
+            self.assertEqual('/media/cache/thumb.jpg 50x155',
+                             self.template.render(self.context))
+        self.assertEqual(1, self.thumbnailer.generate_thumbnail.call_count)
+
+    def test_cache_is_shared_between_processes(self):
+        self.template.render(self.context)
+        # Another process only has the Django cache
+        thumbnail_url_cache.clear()
+        self.template.render(self.context)
+        self.assertEqual(1, self.thumbnailer.generate_thumbnail.call_count)
+
+    def test_deleting_thumbnails_invalidates_the_cache(self):
+        self.template.render(self.context)
+        SorlThumbnail().delete_thumbnails('images/products/image.jpg')
+        self.template.render(self.context)
+        self.assertEqual(2, self.thumbnailer.generate_thumbnail.call_count)
+
+    @override_settings(OSCAR_THUMBNAIL_GENERATE_INLINE=False)
+    def test_placeholders_are_not_cached(self):
+        self.thumbnailer.get_existing_thumbnail.return_value = None
+        self.template.render(self.context)
+        self.template.render(self.context)
+        self.assertEqual(2, self.thumbnailer.get_existing_thumbnail.call_count)
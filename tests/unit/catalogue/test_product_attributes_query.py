@@ -1,10 +1,12 @@
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-from oscar.core.loading import get_model
+from oscar.core.loading import get_class, get_model
 
 Product = get_model("catalogue", "Product")
 
+ProductAttributeIndexer = get_class("catalogue.utils", "ProductAttributeIndexer")
+
 
 class ProductAttributeQuerysetTest(TestCase):
     fixtures = ["productattributes"]
@@ -118,3 +120,12 @@ class ProductAttributeQuerysetTest(TestCase):
 
         result = Product.objects.filter_by_attributes(facets__lt=8)
         self.assertEqual(result.count(), 1)
+
+
+@override_settings(OSCAR_PRODUCT_ATTRIBUTE_INDEX=True)
+class IndexedProductAttributeQuerysetTest(ProductAttributeQuerysetTest):
+    "The same queries should give the same results using the attribute index"
+
+    def setUp(self):
+        ProductAttributeIndexer().index_products(
+            ProductAttributeIndexer().get_indexing_queryset())
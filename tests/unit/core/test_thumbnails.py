@@ -1,6 +1,8 @@
+from unittest import mock
+
 from django.test import TestCase, override_settings
 
-from oscar.core.thumbnails import get_thumbnailer
+from oscar.core.thumbnails import get_sorl_thumbnail_name, get_thumbnailer
 from oscar.test.utils import EASY_THUMBNAIL_BASEDIR, ThumbnailMixin
 
 
@@ -14,9 +16,18 @@ class TestThumbnailer(ThumbnailMixin, TestCase):
 
         self._test_thumbnails_not_exist(thumbnails_full_paths)
 
+    def _test_existing_thumbnails(self):
+        thumbnailer = get_thumbnailer()
+        for image in self.images:
+            self.assertIsNotNone(thumbnailer.get_existing_thumbnail(
+                image.original, **self.thumbnail_options))
+            self.assertIsNone(thumbnailer.get_existing_thumbnail(
+                image.original, size='x60', upscale=False))
+
     def _test_thumbnailer(self, images_qty=5):
         self.create_product_images(qty=images_qty)
         thumbnails_full_paths = self.create_thumbnails()
+        self._test_existing_thumbnails()
         self._test_thumbnails_deletion(thumbnails_full_paths)
 
     @override_settings(
@@ -31,3 +42,18 @@ class TestThumbnailer(ThumbnailMixin, TestCase):
     )
     def test_easy_thumbnails(self):
         self._test_thumbnailer()
+
+
+@override_settings(OSCAR_THUMBNAILER='oscar.core.thumbnails.SorlThumbnail')
+class TestSorlThumbnailNames(TestCase):
+
+    def test_names_are_resolved_for_supported_versions(self):
+        name = get_sorl_thumbnail_name('images/image.jpg', '50', {})
+        self.assertTrue(name.startswith('cache/'))
+
+    def test_unsupported_versions_are_not_looked_up(self):
+        with mock.patch('oscar.core.thumbnails.sorl_version', return_value='13.0.0'):
+            self.assertIsNone(get_sorl_thumbnail_name('images/image.jpg', '50', {}))
+            with self.assertLogs('oscar.thumbnail', level='WARNING'):
+                self.assertIsNone(get_thumbnailer().get_existing_thumbnail(
+                    'images/image.jpg', size='50x'))